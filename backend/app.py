@@ -1,14 +1,98 @@
-import json
+import asyncio
+import orjson
+import time
 import uuid
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Literal, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.routing import Match
+from fastapi.responses import ORJSONResponse, PlainTextResponse, Response, StreamingResponse
 
 from .store import store
-from .schemas import DebateConfig, DebateState
-from .debate import astream_turn_text, judge
+from .catalog import catalog
+from .schemas import DebateConfig, DebateState, JudgeResult, TournamentConfig, TurnScore
+from .debate import (
+    add_turn_score, astream_judge, astream_turn_text, judge, parallel_turns,
+    record_prefix_window, record_turn_timing, schedule_summary_refresh, schedule_turn_score, turn_record,
+)
+from .http_pool import http_pool
+from .config import settings
+from .events import event_logs, sse_frame
+from .export import FORMATS, ExportFilter, FormatUnavailable, check_format, export_stream
+from .llm_cache import llm_cache
+from .llm_client import StreamBudget
+from .locks import session_locks
+from .metrics import counters, histograms, render_prometheus
+from .resilience import OverloadedError, breakers, scheduler
+from .streaming import coalesce_deltas, merge_streams
+from .tournament import plan_matches, tournaments
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_pool.start()
+    store.start_sweeper()
+    catalog.start()
+    try:
+        yield
+    finally:
+        await tournaments.aclose()
+        await catalog.aclose()
+        await store.aclose()
+        await http_pool.close()
+        llm_cache.close()
+
+
+app = FastAPI(title="AI Debate Simulator", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+class RequestMetrics:
+    """Times every request until its last body byte is sent, so streaming
+    routes count their whole stream, labelled by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or _route_template(scope)
+            counters.inc("http_requests_total", method=scope["method"], route=path, status=status)
+            histograms.observe("http_request_seconds", time.perf_counter() - started, method=scope["method"], route=path)
+
+
+def _route_template(scope) -> str:
+    # unmatched or pre-routing paths share one label, keeping the series count bounded
+    for route in app.routes:
+        if route.matches(scope)[0] == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+app.add_middleware(RequestMetrics)
 
-app = FastAPI(title="AI Debate Simulator", default_response_class=ORJSONResponse)
+
+@app.exception_handler(OverloadedError)
+async def overloaded(request: Request, exc: OverloadedError):
+    return ORJSONResponse(
+        {"detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(int(exc.retry_after))},
+    )
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,49 +105,430 @@ app.add_middleware(
 def read_root():
     return "AI Debate Simulator Backend is running."
 
+@app.get("/store/stats")
+async def store_stats():
+    return await store.astats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/llm/stats")
+async def llm_stats():
+    return {
+        **counters.snapshot(),
+        "circuits": breakers.snapshot(),
+        "cache": llm_cache.stats(),
+        "scheduler": scheduler.snapshot(),
+        "catalog": catalog.stats(),
+        "latency": histograms.snapshot(),
+    }
+
+@app.get("/models")
+async def list_models(request: Request, tier: Literal["all", "free", "paid"] = "all"):
+    body, etag = catalog.view(tier)
+    age = catalog.age()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if age is not None:
+        headers["Age"] = str(int(age))
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 @app.post("/debate/start")
 async def start_debate(cfg: DebateConfig):
     if not cfg.open_router_api_key or cfg.open_router_api_key.strip() == "":
         raise HTTPException(400, "OpenRouter API key is required.")
     
     sid = str(uuid.uuid4())
-    state = DebateState(session_id=sid, config=cfg, next_role="pro")
+    state = DebateState(session_id=sid, config=cfg, next_role="pro", created_at=time.time())
     await store.aset(sid, state)
     return {"session_id": sid}
 
+async def _persist_turn_score(session_id: str, score: TurnScore):
+    # a field update: re-applied on conflict, so a late score never overwrites newer turns
+    def add(fresh: DebateState) -> bool:
+        add_turn_score(fresh, score)
+        return True
+
+    await store.aupdate(session_id, add)
+
+
+async def _persist_summary(session_id: str, summary: str, upto: int):
+    def refresh(fresh: DebateState) -> bool:
+        if upto <= fresh.summary_upto:
+            return False
+        fresh.summary, fresh.summary_upto = summary, upto
+        return True
+
+    await store.aupdate(session_id, refresh)
+
+
+async def _persist_judging(session_id: str):
+    def mark(fresh: DebateState) -> bool:
+        if fresh.verdict is not None:
+            return False
+        fresh.status = "judging"
+        return True
+
+    await store.aupdate(session_id, mark)
+
+
+async def _persist_verdict(session_id: str, state: DebateState, verdict: JudgeResult) -> JudgeResult:
+    """Store ``verdict`` unless another worker judged first; returns the one stored."""
+    def finish(fresh: DebateState) -> bool:
+        if fresh.verdict is not None:
+            return False
+        fresh.verdict, fresh.status = verdict, "finished"
+        # scores the judge waited for may not have been persisted yet
+        for score in state.turn_scores:
+            add_turn_score(fresh, score)
+        return True
+
+    if await store.aupdate(session_id, finish) is None:
+        latest = await store.aget(session_id)
+        if latest is not None and latest.verdict is not None:
+            return latest.verdict
+    return verdict
+
+
+def _event(payload: dict) -> bytes:
+    return orjson.dumps(payload) + b"\n"
+
+
+async def _lines(events: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async for event in events:
+        yield _event(event)
+
+
+async def _stream_turn(state: DebateState, seq: int, role: str, budget: StreamBudget, buf: list) -> AsyncIterator[dict]:
+    deltas = coalesce_deltas(
+        astream_turn_text(state, role, budget),
+        settings.stream_coalesce_ms / 1000,
+        settings.stream_coalesce_chars,
+    )
+    async for delta in deltas:
+        buf.append(delta)
+        yield {"type": "delta", "role": role, "seq": seq, "data": delta}
+
+
+async def _turn_events(session_id: str, seq: int, count: int = 1) -> AsyncIterator[dict]:
+    """Events of turns ``seq`` to ``seq + count - 1``. Stored turns are replayed;
+    the rest are generated together, their deltas interleaved and tagged by seq."""
+    async with session_locks.hold(session_id):
+        # re-read under the lock: a concurrent request may have just finished a turn
+        state = await store.aget(session_id)
+        if state is None:
+            yield {"type": "error", "seq": seq, "detail": "session not found"}
+            return
+
+        max_turns = state.config.rounds * 2
+        done = len(state.history)
+
+        for s in range(seq, min(seq + count, done)):
+            # duplicate or retried request: replay the stored turn, no LLM call
+            t = state.history[s]
+            yield {"type": "delta", "role": t.role, "seq": s, "data": t.text}
+            yield {
+                "type": "final",
+                "role": t.role,
+                "seq": s,
+                "text": t.text,
+                "stored": True,
+                "next_role": state.next_role,
+                "turns_done": done,
+                "finished": done >= max_turns,
+                "replayed": True,
+            }
+        if seq + count <= done:
+            return
+        seq, count = max(seq, done), seq + count - max(seq, done)
+
+        if seq > done or done >= max_turns:
+            yield {"type": "error", "seq": seq, "detail": f"turn {seq} is not next ({done} of {max_turns} turns done)"}
+            return
+
+        # both sides of a parallel pair are prompted from the same history
+        other = "con" if state.next_role == "pro" else "pro"
+        turns = [
+            (seq + i, role, StreamBudget(state.config.turn_max_tokens, state.config.turn_timeout), [])
+            for i, role in enumerate((state.next_role, other)[:count])
+        ]
+        async for event in merge_streams(*(_stream_turn(state, *t) for t in turns)):
+            yield event
+
+        texts, stored, next_role = [], [], state.next_role
+        for _, role, _, buf in turns:
+            text = "".join(buf).strip()
+            # an empty turn is not stored; if it was the first of a pair, the
+            # second is dropped too and regenerated once the first is in
+            stored.append(bool(text) and role == next_role)
+            if stored[-1]:
+                next_role = "con" if role == "pro" else "pro"
+            texts.append(text)
+
+        def commit(fresh: DebateState) -> bool:
+            # another worker sharing the store may have committed this turn meanwhile
+            if len(fresh.history) != done:
+                return False
+            for (_, role, budget, _), text, kept in zip(turns, texts, stored):
+                if kept:
+                    fresh.history.append(turn_record(role, text, budget))
+                    record_turn_timing(fresh, budget)
+                    fresh.next_role = "con" if role == "pro" else "pro"
+                    record_prefix_window(fresh, budget)
+            return True
+
+        committed = await store.aupdate(session_id, commit)
+        if committed is None:
+            gone = await store.aget(session_id) is None
+            for s, *_ in turns:
+                detail = "session not found" if gone else f"turn {s} was committed by another request"
+                yield {"type": "error", "seq": s, "detail": detail}
+            return
+        state = committed
+
+        if state.config.judge_mode == "incremental":
+            for i in range(done, len(state.history)):
+                schedule_turn_score(
+                    state,
+                    i,
+                    on_scored=lambda score: _persist_turn_score(session_id, score),
+                )
+        if len(state.history) > done:
+            # older turns are folded into the summary while the next turn streams
+            schedule_summary_refresh(
+                state,
+                on_summarized=lambda summary, upto: _persist_summary(session_id, summary, upto),
+            )
+
+        for (s, role, budget, _), text, kept in zip(turns, texts, stored):
+            if budget.truncated:
+                yield {"type": "truncated", "role": role, "seq": s, "reason": budget.truncated}
+            yield {
+                "type": "final",
+                "role": role,
+                "seq": s,
+                "text": text,
+                # false for a turn that was generated but dropped; clients must not show it as said
+                "stored": kept,
+                "next_role": state.next_role,
+                "turns_done": len(state.history),
+                "finished": len(state.history) >= max_turns,
+                "truncated": budget.truncated,
+                "model": budget.model,
+                "prompt_tokens": budget.prompt_tokens,
+                "cached_tokens": budget.cached_tokens,
+                "ttft": round(budget.ttft, 3) if budget.ttft is not None else None,
+                "seconds": round(budget.elapsed, 3),
+            }
+
+
+async def _follow_turn(session_id: str, seq: int, count: int = 1) -> AsyncIterator[dict]:
+    # the turn runs as a background task, so a dropped client neither loses
+    # the turn nor cancels it; a second caller for the same turn just follows
+    log = event_logs.get(session_id)
+    after = log.start(seq, lambda: _turn_events(session_id, seq, count))
+    pending = set(range(seq, seq + count))
+    async for event in log.tail(after):
+        if event["type"] != "gap" and event.get("seq") not in pending:
+            continue
+        yield event
+        if event["type"] in ("final", "error"):
+            pending.discard(event["seq"])
+            if not pending:
+                return
+
+
+async def _judge_once(session_id: str) -> JudgeResult:
+    async with session_locks.hold(session_id):
+        state = await store.aget(session_id)
+        if state is None:
+            raise HTTPException(404, "session not found")
+        # a retried or concurrent judge request reuses the stored verdict
+        if state.verdict is not None:
+            return state.verdict
+
+        state.status = "judging"
+        await _persist_judging(session_id)
+        log = event_logs.get(session_id)
+        await log.publish({"type": "judging"})
+
+        res = await judge(state)
+
+        state.verdict = await _persist_verdict(session_id, state, res)
+        state.status = "finished"
+        await log.publish({"type": "verdict", "data": state.verdict.model_dump()})
+        return state.verdict
+
+
+async def _judge_stream(session_id: str) -> AsyncIterator[dict]:
+    """_judge_once, yielding the verdict's pieces as the judge produces them.
+    The last event is always the ``verdict``."""
+    async with session_locks.hold(session_id):
+        state = await store.aget(session_id)
+        if state is None:
+            raise HTTPException(404, "session not found")
+        if state.verdict is not None:
+            yield {"type": "verdict", "data": state.verdict.model_dump()}
+            return
+
+        state.status = "judging"
+        await _persist_judging(session_id)
+        log = event_logs.get(session_id)
+        await log.publish({"type": "judging"})
+
+        async for event in astream_judge(state):
+            if event["type"] == "verdict":
+                state.verdict = await _persist_verdict(
+                    session_id, state, JudgeResult.model_validate(event["data"])
+                )
+                state.status = "finished"
+                event = {"type": "verdict", "data": state.verdict.model_dump()}
+            await log.publish(event)
+            yield event
+
+
 @app.post("/debate/step_stream")
-async def debate_step_stream(session_id: str):
+async def debate_step_stream(session_id: str, seq: Optional[int] = None):
     state = await store.aget(session_id)
     if not state:
         raise HTTPException(404, "session not found")
 
     max_turns = state.config.rounds * 2
-    if len(state.history) >= max_turns:
-        return {"status": "done", "history": [t.model_dump() for t in state.history]}
+    done = len(state.history)
+    # a parallel pair is one step: asking for either turn streams both
+    count = parallel_turns(state.config, done)
+    if seq is None and done >= max_turns:
+        # orjson encodes the Turn dataclasses itself, skipping jsonable_encoder
+        return ORJSONResponse({"status": "done", "history": state.history})
+    if seq is not None and (seq < 0 or seq >= max_turns or seq >= done + count):
+        raise HTTPException(409, f"turn {seq} is not next ({done} of {max_turns} turns done)")
+    if seq is None:
+        seq = done
+
+    if seq < done:
+        events = _turn_events(session_id, seq)
+    else:
+        # refuse now, while a 503 can still be sent, rather than mid-stream
+        scheduler.check(state.config.open_router_api_key)
+        events = _follow_turn(session_id, done, count)
+    return StreamingResponse(_lines(events), media_type="application/x-ndjson")
+
+
+@app.get("/debate/{session_id}/events")
+async def debate_events(session_id: str, last_event_id: int = 0):
+    if not await store.aget(session_id):
+        raise HTTPException(404, "session not found")
+
+    log = event_logs.get(session_id)
+    return StreamingResponse(_lines(log.tail(last_event_id)), media_type="application/x-ndjson")
+
+
+@app.get("/debate/{session_id}/timings")
+async def debate_timings(session_id: str):
+    state = await store.aget(session_id)
+    if not state:
+        raise HTTPException(404, "session not found")
+    turns = [
+        {
+            "role": t.role,
+            "model": t.model,
+            "ttft": t.ttft,
+            "seconds": t.seconds,
+            "prompt_tokens": t.prompt_tokens,
+            "cached_tokens": t.cached_tokens,
+            "completion_tokens": t.completion_tokens,
+        }
+        for t in state.history
+    ]
+    return {"summary": state.timings, "turns": turns}
+
+
+@app.get("/debate/{session_id}/watch")
+async def debate_watch(session_id: str, request: Request, last_event_id: int = 0):
+    state = await store.aget(session_id)
+    if not state:
+        raise HTTPException(404, "session not found")
+    if request.headers.get("last-event-id", "").isdigit():
+        last_event_id = int(request.headers["last-event-id"])
+
+    log = event_logs.get(session_id)
 
     async def gen():
-        role = state.next_role
-        buf = []
+        # subscribe and snapshot with no await in between, so nothing is missed or doubled
+        sub = log.subscribe()
+        replay = log.since(last_event_id)
+        try:
+            if last_event_id + 1 < log.first_id:
+                yield sse_frame({"type": "gap", "first_id": log.first_id})
+            for event in replay:
+                yield sse_frame(event)
+                if event["type"] == "verdict":
+                    return
+            if state.verdict is not None and not log.running:
+                yield sse_frame({"type": "verdict", "data": state.verdict.model_dump()})
+                return
+
+            while True:
+                try:
+                    kind, frame = await asyncio.wait_for(sub.get(), settings.watch_heartbeat)
+                except asyncio.TimeoutError:
+                    # also how a disconnected viewer gets noticed between turns
+                    yield b": ping\n\n"
+                    continue
+                # one write for everything queued since the last wakeup
+                batch = [(kind, frame)] + sub.drain(64)
+                chunk = b"".join(f for _, f in batch)
+                if chunk:
+                    yield chunk
+                if any(k in ("verdict", "") for k, _ in batch):
+                    return
+        finally:
+            log.unsubscribe(sub)
+
+    return StreamingResponse(gen(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
-        state.next_role = "con" if role == "pro" else "pro"
 
-        async for delta in astream_turn_text(state, role):
-            buf.append(delta)
-            yield json.dumps({"type": "delta", "role": role, "data": delta}) + "\n"
+@app.post("/debate/run_stream")
+async def debate_run_stream(session_id: str):
+    state = await store.aget(session_id)
+    if not state:
+        raise HTTPException(404, "session not found")
+    if state.verdict is None:
+        scheduler.check(state.config.open_router_api_key)
 
-        text = "".join(buf).strip()
-        if text:
-            state.history.append({"role": role, "text": text})
+    async def gen():
+        max_turns = state.config.rounds * 2
+        done, last_round = len(state.history), 0
+        while done < max_turns:
+            if done // 2 + 1 != last_round:
+                last_round = done // 2 + 1
+                yield _event({"type": "round", "round": last_round, "rounds": state.config.rounds})
+            failed = False
+            async for event in _follow_turn(session_id, done, parallel_turns(state.config, done)):
+                failed = failed or event["type"] == "error"
+                yield _event(event)
+            latest = await store.aget(session_id)
+            if latest is None:
+                yield _event({"type": "error", "seq": done, "detail": "session not found"})
+                return
+            # a failed or empty turn ends the run, so an unfinished debate is never judged;
+            # the client can retry the turn or run the rest again
+            if failed:
+                return
+            if len(latest.history) <= done:
+                yield _event({"type": "error", "seq": done, "detail": f"turn {done} produced no text"})
+                return
+            done = len(latest.history)
 
-        await store.aset(session_id, state)
+        yield _event({"type": "judging"})
 
-        yield json.dumps({
-            "type": "final",
-            "role": role,
-            "next_role": state.next_role,
-            "turns_done": len(state.history),
-            "finished": len(state.history) >= max_turns
-        }) + "\n"
+        try:
+            async for event in _judge_stream(session_id):
+                yield _event(event)
+        except Exception as e:
+            yield _event({"type": "error", "detail": str(e)})
 
     return StreamingResponse(gen(), media_type="application/x-ndjson")
 
@@ -74,11 +539,104 @@ async def debate_judge(session_id: str):
     
     if not state: 
         raise HTTPException(404, "session not found")
+    if state.verdict is None:
+        scheduler.check(state.config.open_router_api_key)
     
-    res = await judge(state)
+    res = await _judge_once(session_id)
     
-    state.status = "finished"
-    
-    await store.aset(session_id, state)
-    
-    return res.model_dump()
\ No newline at end of file
+    return res.model_dump()
+
+
+@app.post("/debate/judge_stream")
+async def debate_judge_stream(session_id: str):
+    state = await store.aget(session_id)
+    if not state:
+        raise HTTPException(404, "session not found")
+    if state.verdict is None:
+        scheduler.check(state.config.open_router_api_key)
+
+    async def gen():
+        try:
+            async for event in _judge_stream(session_id):
+                yield _event(event)
+        except Exception as e:
+            yield _event({"type": "error", "detail": str(e)})
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
+
+
+def _epoch(dt: Optional[datetime]) -> Optional[float]:
+    # naive times are taken as UTC
+    if dt is None:
+        return None
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+@app.get("/debates/export")
+async def export_debates(
+    format: Literal["ndjson", "arrow", "parquet"] = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    model: List[str] = Query([]),
+    status: List[Literal["running", "judging", "finished"]] = Query([]),
+    cursor: str = "",
+    limit: Optional[int] = Query(None, ge=1),
+):
+    try:
+        check_format(format)
+    except FormatUnavailable as e:
+        raise HTTPException(400, str(e))
+    flt = ExportFilter(since=_epoch(since), until=_epoch(until), models=model, statuses=status)
+    media_type, ext = FORMATS[format]
+    return StreamingResponse(
+        export_stream(store, flt, format, cursor, limit),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="debates{ext}"'},
+    )
+
+
+@app.post("/tournaments")
+async def start_tournament(cfg: TournamentConfig):
+    if not cfg.open_router_api_key or cfg.open_router_api_key.strip() == "":
+        raise HTTPException(400, "OpenRouter API key is required.")
+    total = len(plan_matches(cfg))
+    if total == 0:
+        raise HTTPException(400, "the model matrix yields no debates")
+    if total > settings.tournament_max_matches:
+        raise HTTPException(400, f"{total} debates exceeds the limit of {settings.tournament_max_matches}")
+
+    t = tournaments.start(cfg)
+    return {"tournament_id": t.id, "total": total}
+
+
+@app.get("/tournaments/{tournament_id}")
+async def tournament_progress(tournament_id: str):
+    t = tournaments.get(tournament_id)
+    if t is None:
+        raise HTTPException(404, "tournament not found")
+    return t.progress()
+
+
+@app.get("/tournaments/{tournament_id}/results")
+async def tournament_results(tournament_id: str):
+    t = tournaments.get(tournament_id)
+    if t is None:
+        raise HTTPException(404, "tournament not found")
+
+    async def gen():
+        # results finished so far, in completion order
+        for r in list(t.results):
+            yield _event(r.model_dump())
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
+
+
+@app.delete("/tournaments/{tournament_id}")
+async def cancel_tournament(tournament_id: str):
+    t = tournaments.get(tournament_id)
+    if t is None:
+        raise HTTPException(404, "tournament not found")
+    if not t.done:
+        t.cancel()
+        return {"tournament_id": t.id, "status": "cancelled"}
+    return {"tournament_id": t.id, "status": t.status}
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import orjson
+
+from .config import settings
+from .http_pool import http_pool
+from .metrics import counters
+
+TIERS = ("all", "free", "paid")
+
+
+def _per_million(price) -> Optional[float]:
+    try:
+        return float(price) * 1_000_000
+    except (TypeError, ValueError):
+        return None
+
+
+def is_free(model: dict) -> bool:
+    pricing = model.get("pricing") or {}
+    return _per_million(pricing.get("prompt")) == 0 and _per_million(pricing.get("completion")) == 0
+
+
+def model_label(model: dict) -> str:
+    """Display name, with prompt/completion prices per 1M tokens for paid models."""
+    name = model.get("name") or model["id"]
+    pricing = model.get("pricing") or {}
+    if pricing.get("prompt") and pricing.get("completion"):
+        prompt, completion = _per_million(pricing["prompt"]), _per_million(pricing["completion"])
+        if prompt is not None and completion is not None and (prompt != 0 or completion != 0):
+            name += f" — 💰 (${prompt:.3f}/${completion:.3f} per 1M tokens)"
+    return name
+
+
+class ModelCatalog:
+    """One copy of OpenRouter's model list shared by every session and API key.
+
+    Each tier's response body is serialized once per upstream change and
+    served as-is with an ETag. Past the TTL requests still get the cached
+    body while a single background task revalidates it with If-None-Match /
+    If-Modified-Since. Until the first fetch succeeds, or with
+    MODELS_OFFLINE, the bundled fixture is served.
+    """
+
+    def __init__(self, ttl: float, fixture_path: str, offline: bool = False):
+        self.ttl = ttl
+        self.fixture_path = fixture_path
+        self.offline = offline
+        self.source = ""
+        self.last_error: Optional[str] = None
+        # tier -> (body, etag)
+        self._views: Dict[str, Tuple[bytes, str]] = {}
+        self._counts: Dict[str, int] = {}
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._checked_at = 0.0
+        self._next_check = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    def _build(self, models: List[dict], source: str):
+        labels: Dict[str, str] = {}
+        index: Dict[str, List[str]] = {"all": [], "free": [], "paid": []}
+        for m in models:
+            if not m.get("id"):
+                continue
+            labels[m["id"]] = model_label(m)
+            index["all"].append(m["id"])
+            index["free" if is_free(m) else "paid"].append(m["id"])
+        views = {}
+        for tier, ids in index.items():
+            body = orjson.dumps({"models": {i: labels[i] for i in ids}, "source": source})
+            views[tier] = (body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"')
+        self._views = views
+        self._counts = {tier: len(ids) for tier, ids in index.items()}
+        self.source = source
+
+    def load_fixture(self):
+        try:
+            with open(self.fixture_path, "rb") as f:
+                models = orjson.loads(f.read()).get("data", [])
+        except (OSError, ValueError) as e:
+            self.last_error = f"fixture: {type(e).__name__}: {e}"
+            models = []
+        self._build(models, "fixture")
+
+    async def _fetch(self):
+        headers = {}
+        # validators describe the upstream copy, never the fixture
+        if self.source == "openrouter":
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+        session = await http_pool.session()
+        timeout = aiohttp.ClientTimeout(total=settings.models_fetch_timeout)
+        async with session.get(f"{settings.openrouter_base_url}/models", headers=headers, timeout=timeout) as resp:
+            if resp.status == 304:
+                counters.inc("models_refresh_total", result="not_modified")
+            else:
+                resp.raise_for_status()
+                data = orjson.loads(await resp.read())
+                self._build(data.get("data", []), "openrouter")
+                self._etag = resp.headers.get("ETag")
+                self._last_modified = resp.headers.get("Last-Modified")
+                counters.inc("models_refresh_total", result="updated")
+
+    async def _run_refresh(self):
+        try:
+            await self._fetch()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            counters.inc("models_refresh_total", result="error")
+            self.last_error = f"{type(e).__name__}: {e}"
+            # keep serving what we have and try again later, not on every request
+            self._next_check = time.monotonic() + settings.models_retry_interval
+            return
+        self.last_error = None
+        self._checked_at = time.monotonic()
+        self._next_check = self._checked_at + self.ttl
+
+    def refresh_if_due(self):
+        if self.offline or time.monotonic() < self._next_check:
+            return
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._run_refresh())
+
+    def view(self, tier: str) -> Tuple[bytes, str]:
+        """The serialized body and ETag for ``tier``; never waits on upstream."""
+        if not self._views:
+            self.load_fixture()
+        self.refresh_if_due()
+        return self._views[tier]
+
+    def age(self) -> Optional[float]:
+        """Seconds since upstream last confirmed the catalog, None if it never has."""
+        return time.monotonic() - self._checked_at if self._checked_at else None
+
+    def start(self):
+        self.view("all")
+
+    async def aclose(self):
+        if self._refresh is not None and not self._refresh.done():
+            self._refresh.cancel()
+            try:
+                await self._refresh
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, object]:
+        age = self.age()
+        return {
+            "source": self.source,
+            "models": dict(self._counts),
+            "age": round(age, 1) if age is not None else None,
+            "stale": not self.offline and time.monotonic() >= self._next_check,
+            "refreshing": self._refresh is not None and not self._refresh.done(),
+            "last_error": self.last_error,
+        }
+
+
+catalog = ModelCatalog(settings.models_ttl, settings.models_fixture, settings.models_offline)
@@ -0,0 +1,139 @@
+import os
+from typing import Dict
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    return int(raw) if raw not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    return float(raw) if raw not in (None, "") else default
+
+
+def _env_budgets(name: str) -> Dict[str, int]:
+    out = {}
+    for item in os.getenv(name, "").split(","):
+        model, _, tokens = item.strip().rpartition("=")
+        if model and tokens.isdigit():
+            out[model] = int(tokens)
+    return out
+
+
+class Settings:
+    def __init__(self):
+        self.openrouter_base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+        # batch upstream deltas arriving within this window into one event, 0 = off
+        self.stream_coalesce_ms = _env_float("STREAM_COALESCE_MS", 0.0)
+        self.stream_coalesce_chars = _env_int("STREAM_COALESCE_CHARS", 512)
+
+        # shared upstream connection pool
+        self.http_pool_limit = _env_int("HTTP_POOL_LIMIT", 100)
+        self.http_pool_limit_per_host = _env_int("HTTP_POOL_LIMIT_PER_HOST", 50)
+        self.http_dns_cache_ttl = _env_int("HTTP_DNS_CACHE_TTL", 300)
+        self.http_keepalive_timeout = _env_float("HTTP_KEEPALIVE_TIMEOUT", 60.0)
+        self.http_connect_timeout = _env_float("HTTP_CONNECT_TIMEOUT", 10.0)
+        self.http_read_timeout = _env_float("HTTP_READ_TIMEOUT", 120.0)
+
+        # upstream throttling, requests/sec per API key and per model, 0 = unlimited
+        self.llm_rate_per_key = _env_float("LLM_RATE_PER_KEY", 0.0)
+        self.llm_burst_per_key = _env_int("LLM_BURST_PER_KEY", 5)
+        self.llm_rate_per_model = _env_float("LLM_RATE_PER_MODEL", 0.0)
+        self.llm_burst_per_model = _env_int("LLM_BURST_PER_MODEL", 5)
+        # retries on 408/429/5xx and dropped connections, never after a streamed delta
+        self.llm_max_retries = _env_int("LLM_MAX_RETRIES", 3)
+        self.llm_retry_base = _env_float("LLM_RETRY_BASE", 0.5)
+        self.llm_retry_max = _env_float("LLM_RETRY_MAX", 20.0)
+        # a Retry-After longer than this fails the call instead of waiting
+        self.llm_retry_after_max = _env_float("LLM_RETRY_AFTER_MAX", 60.0)
+        # consecutive failures before a model's circuit opens, 0 = off
+        self.llm_breaker_threshold = _env_int("LLM_BREAKER_THRESHOLD", 5)
+        self.llm_breaker_cooldown = _env_float("LLM_BREAKER_COOLDOWN", 30.0)
+
+        # admission control: upstream calls in flight at once (0 = unlimited) and
+        # how many may wait, in total and per API key, before callers get a 503
+        self.llm_max_concurrency = _env_int("LLM_MAX_CONCURRENCY", 64)
+        self.llm_queue_max = _env_int("LLM_QUEUE_MAX", 256)
+        self.llm_queue_per_key = _env_int("LLM_QUEUE_PER_KEY", 32)
+        self.llm_queue_timeout = _env_float("LLM_QUEUE_TIMEOUT", 30.0)
+        # fair-share weight per API key as "key=weight,..."; unlisted keys weigh 1
+        self.llm_key_weights = _env_budgets("LLM_KEY_WEIGHTS")
+
+        # seconds without a first delta before a turn also asks its next fallback model
+        self.hedge_ttft = _env_float("HEDGE_TTFT", 2.0)
+
+        # response cache: off | on | record | replay (offline, misses are errors)
+        self.llm_cache = os.getenv("LLM_CACHE", "off")
+        self.llm_cache_path = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+        self.llm_cache_max_entries = _env_int("LLM_CACHE_MAX_ENTRIES", 1000)
+        # "on" mode only caches calls at or below this temperature
+        self.llm_cache_max_temperature = _env_float("LLM_CACHE_MAX_TEMPERATURE", 0.3)
+        # 1 replays streams with their recorded timing, 2 twice as fast, 0 instantly
+        self.llm_cache_replay_speed = _env_float("LLM_CACHE_REPLAY_SPEED", 0.0)
+
+        # prompt tokens a debater's context may fill, per model as "model=tokens,..."
+        self.context_tokens = _env_int("CONTEXT_TOKENS", 2000)
+        self.context_budgets = _env_budgets("CONTEXT_BUDGETS")
+        # turns always sent verbatim; older ones are folded into the summary
+        self.context_keep_turns = _env_int("CONTEXT_KEEP_TURNS", 4)
+        self.context_summary_batch = _env_int("CONTEXT_SUMMARY_BATCH", 2)
+        # prefix_stable layout: after overflowing, move the window until the context is this full
+        self.context_checkpoint_ratio = _env_float("CONTEXT_CHECKPOINT_RATIO", 0.5)
+        # empty uses the debate's judge model
+        self.context_summary_model = os.getenv("CONTEXT_SUMMARY_MODEL", "")
+
+        # model id prefixes that take explicit cache_control breakpoints
+        self.prompt_cache_control_prefixes = tuple(
+            p.strip() for p in os.getenv("PROMPT_CACHE_CONTROL_PREFIXES", "anthropic/,google/gemini").split(",") if p.strip()
+        )
+
+        # shared OpenRouter model catalog behind GET /models; past the TTL it is
+        # served as-is while one background request revalidates it
+        self.models_ttl = _env_float("MODELS_TTL", 600.0)
+        self.models_retry_interval = _env_float("MODELS_RETRY_INTERVAL", 30.0)
+        self.models_fetch_timeout = _env_float("MODELS_FETCH_TIMEOUT", 10.0)
+        # 1 never calls upstream and serves the fixture only
+        self.models_offline = _env_int("MODELS_OFFLINE", 0) != 0
+        self.models_fixture = os.getenv(
+            "MODELS_FIXTURE", os.path.join(os.path.dirname(__file__), "models_fixture.json")
+        )
+
+        # seconds a judge panel waits before merging whichever verdicts are in
+        self.judge_deadline = _env_float("JUDGE_DEADLINE", 60.0)
+
+        # latency histograms for /metrics; counters are always kept
+        self.metrics_enabled = _env_int("METRICS_ENABLED", 1) != 0
+        # OpenTelemetry spans per turn and verdict, needs opentelemetry-api
+        self.otel_tracing = _env_int("OTEL_TRACING", 0) != 0
+
+        # session store: memory | sqlite | redis
+        self.store_backend = os.getenv("STORE_BACKEND", "memory")
+        self.store_sqlite_path = os.getenv("STORE_SQLITE_PATH", "debates.sqlite3")
+        self.store_redis_url = os.getenv("STORE_REDIS_URL", "redis://localhost:6379/0")
+
+        # in-memory store limits, TTLs apply to every backend
+        self.store_max_sessions = _env_int("STORE_MAX_SESSIONS", 1000)
+        self.store_max_bytes = _env_int("STORE_MAX_BYTES", 256 * 1024 * 1024)
+        self.store_session_ttl = _env_float("STORE_SESSION_TTL", 3600.0)
+        self.store_finished_ttl = _env_float("STORE_FINISHED_TTL", 600.0)
+        self.store_sweep_interval = _env_float("STORE_SWEEP_INTERVAL", 60.0)
+
+        # per-session turn event ring buffers
+        self.event_log_size = _env_int("EVENT_LOG_SIZE", 4096)
+        self.event_log_max_sessions = _env_int("EVENT_LOG_MAX_SESSIONS", 1000)
+        # seconds a turn keeps generating with no client attached, 0 cancels at once
+        self.turn_orphan_grace = _env_float("TURN_ORPHAN_GRACE", 2.0)
+        # assumed length of a turn that was cancelled before it finished
+        self.turn_tokens_estimate = _env_int("TURN_TOKENS_ESTIMATE", 300)
+        self.watch_queue_size = _env_int("WATCH_QUEUE_SIZE", 256)
+        self.watch_max_backlog = _env_int("WATCH_MAX_BACKLOG", 64)
+        self.watch_heartbeat = _env_float("WATCH_HEARTBEAT", 15.0)
+
+        # batch tournaments started through the API
+        self.tournament_max_matches = _env_int("TOURNAMENT_MAX_MATCHES", 1000)
+        self.tournament_max_jobs = _env_int("TOURNAMENT_MAX_JOBS", 50)
+
+
+settings = Settings()
@@ -1,32 +1,169 @@
-from .llm_client import OpenRouterClient
-from .schemas import DebateState, JudgeResult
-from typing import List, Literal, AsyncIterator
+import asyncio
+import time
+from collections import Counter
+from contextlib import nullcontext
+from pydantic import ValidationError
+from .config import settings
+from .llm_client import OpenRouterClient, StreamBudget
+from .metrics import Stopwatch, counters, histograms, span
+from .schemas import DebateConfig, DebateState, DebateSummary, JudgeResult, RoundJudgement, Turn, TurnJudgement, TurnScore
+from .streaming import JSONEventParser, estimate_tokens
+from typing import AsyncContextManager, Awaitable, Callable, Dict, List, Literal, AsyncIterator, Optional, Set, Tuple
 
 from .prompts import (
     PRO_TEMPLATE, CON_TEMPLATE, SYSTEM_JUDGE,
-    SYSTEM_PRO, SYSTEM_CON, JUDGE_TEMPLATE
+    SYSTEM_PRO, SYSTEM_CON, JUDGE_TEMPLATE,
+    SYSTEM_TURN_JUDGE, TURN_JUDGE_TEMPLATE,
+    SYSTEM_SUMMARIZER, SUMMARY_TEMPLATE,
+    STABLE_ROLE_TEMPLATE, STABLE_TURN_PROMPT,
+    SYSTEM_ROUND_JUDGE, ROUND_JUDGE_TEMPLATE
 )
 
-async def astream_turn_text(state: DebateState, role: Literal["pro","con"]) -> AsyncIterator[str]:
-    llm_client = OpenRouterClient(state.config.open_router_api_key)
+CRITERIA = ("clarity", "logic", "evidence", "rebuttal", "civility")
+
+# in-flight incremental scoring tasks per session
+_scoring_tasks: Dict[str, Set[asyncio.Task]] = {}
+# at most one running summary refresh per session
+_summary_tasks: Dict[str, asyncio.Task] = {}
+# fire-and-forget work judge() must not wait on, referenced so it is not collected
+_background_tasks: Set[asyncio.Task] = set()
+
+def parallel_turns(cfg: DebateConfig, done: int) -> int:
+    """How many turns starting at turn ``done`` are generated together: two
+    for the openings or closings when the format writes them in parallel."""
+    if done == 0 and cfg.debate_format == "parallel_openings":
+        return 2
+    if done == cfg.rounds * 2 - 2 and cfg.parallel_closings:
+        return 2
+    return 1
+
+
+async def astream_turn_text(
+    state: DebateState,
+    role: Literal["pro","con"],
+    budget: Optional[StreamBudget] = None,
+    priority: Literal["interactive", "background"] = "interactive",
+) -> AsyncIterator[str]:
+    cfg = state.config
+    llm_client = OpenRouterClient(cfg.open_router_api_key, priority=priority)
     messages = _messages_for_role_stream(state, role)
-    
-    async for chunk in llm_client.astream_messages(
-        model=state.config.pro_model if role == "pro" else state.config.con_model,
-        messages=messages,
-        temperature=state.config.pro_temperature if role == "pro" else state.config.con_temperature):
-            yield chunk
+    model = cfg.pro_model if role == "pro" else cfg.con_model
+    fallbacks = cfg.pro_fallback_models if role == "pro" else cfg.con_fallback_models
+    temperature = cfg.pro_temperature if role == "pro" else cfg.con_temperature
+
+    budget = budget if budget is not None else StreamBudget()
+    if cfg.prompt_layout == "prefix_stable":
+        budget.window = prefix_window(state, role)
+    if fallbacks:
+        # budget.model tells the caller which model ended up answering
+        chunks = llm_client.astream_hedged(
+            models=[model, *fallbacks],
+            messages=messages,
+            temperature=temperature,
+            budget=budget,
+            hedge_after=cfg.hedge_ttft if cfg.hedge_ttft is not None else settings.hedge_ttft,
+        )
+    else:
+        chunks = llm_client.astream_messages(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            budget=budget,
+        )
+    # the gaps between deltas are already timed per model upstream
+    watch = Stopwatch("turn", gaps=False, role=role)
+    with span("debate.turn", session_id=state.session_id, turn=len(state.history), role=role, model=model) as sp:
+        try:
+            async for chunk in chunks:
+                watch.tick()
+                yield chunk
+        finally:
+            budget.ttft, budget.elapsed = watch.ttft, watch.stop()
+            if sp is not None:
+                sp.set_attribute("answered_by", budget.model or model)
+                sp.set_attribute("tokens", budget.tokens)
+
+
+def turn_record(role: str, text: str, budget: StreamBudget) -> Turn:
+    """The history entry for a finished turn, with the usage and timings its budget collected."""
+    return Turn(
+        role=role,
+        text=text,
+        model=budget.model,
+        prompt_tokens=budget.prompt_tokens,
+        cached_tokens=budget.cached_tokens,
+        completion_tokens=budget.tokens,
+        ttft=round(budget.ttft, 3) if budget.ttft is not None else None,
+        seconds=round(budget.elapsed, 3),
+    )
+
+
+def record_prefix_window(state: DebateState, budget: StreamBudget):
+    """Move the prefix_stable window to where the finished turn's prompt put it."""
+    if budget.window is not None:
+        state.prefix_start, state.prefix_summary, state.prefix_summary_upto = budget.window
+
+
+def record_turn_timing(state: DebateState, budget: StreamBudget):
+    """Add a finished turn to the session's timing summary."""
+    t = state.timings
+    t["turns"] = t.get("turns", 0) + 1
+    t["turn_seconds"] = round(t.get("turn_seconds", 0.0) + budget.elapsed, 3)
+    t["max_turn_seconds"] = round(max(t.get("max_turn_seconds", 0.0), budget.elapsed), 3)
+    t["ttft_seconds"] = round(t.get("ttft_seconds", 0.0) + (budget.ttft or 0.0), 3)
+    t["prompt_tokens"] = t.get("prompt_tokens", 0) + budget.prompt_tokens
+    t["completion_tokens"] = t.get("completion_tokens", 0) + budget.tokens
+    t["cost_usd"] = round(t.get("cost_usd", 0.0) + budget.cost, 6)
+
 
 async def judge(state: DebateState) -> JudgeResult:
-    llm_client = OpenRouterClient(state.config.open_router_api_key)
-    
-    transcript = ''
-    for t in state.history:
-        t_role = t["role"] if isinstance(t, dict) else t.role
-        t_text = t["text"] if isinstance(t, dict) else t.text
-        transcript += f"{t_role}: {t_text}\n"
+    mode = state.config.judge_mode if not state.config.judge_panel else "panel"
+    started = time.perf_counter()
+    with span("debate.judge", session_id=state.session_id, mode=mode):
+        try:
+            return await _judge(state)
+        finally:
+            _record_judge_time(state, mode, time.perf_counter() - started)
 
-    messages = [
+
+def _record_judge_time(state: DebateState, mode: str, elapsed: float):
+    if settings.metrics_enabled:
+        histograms.observe("judge_seconds", elapsed, mode=mode)
+    state.timings["judge_seconds"] = round(elapsed, 3)
+
+
+async def _judge(state: DebateState) -> JudgeResult:
+    if state.config.judge_mode == "incremental":
+        pending = _scoring_tasks.pop(state.session_id, set())
+        if pending:
+            # the tasks may have been scheduled on another copy of this state
+            for res in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(res, TurnScore):
+                    add_turn_score(state, res)
+        scored = {s.turn for s in state.turn_scores}
+        if state.history and scored >= set(range(len(state.history))):
+            return aggregate_turn_scores(state)
+        # a turn failed to score, fall back to judging the whole transcript
+
+    models = [state.config.judge_model, *state.config.judge_panel]
+    if len(models) == 1:
+        return await _judge_with(state, models[0])
+    return await judge_panel(state, models)
+
+
+async def _judge_with(state: DebateState, model: str) -> JudgeResult:
+    if state.config.judge_mode == "map_reduce" and len(state.history) > 2:
+        return await judge_map_reduce(state, model)
+    return await judge_transcript(state, model)
+
+
+def _judge_messages(state: DebateState) -> List[dict]:
+    transcript = "\n".join(
+        f"{t.role}: {t.text}"
+        for t in state.history
+    )
+
+    return [
         {"role": "system", "content": SYSTEM_JUDGE},
         {"role": "user", "content": JUDGE_TEMPLATE.format(
             topic=state.config.topic,
@@ -34,47 +171,513 @@ async def judge(state: DebateState) -> JudgeResult:
         )},
     ]
 
+
+async def judge_transcript(state: DebateState, model: str) -> JudgeResult:
+    llm_client = OpenRouterClient(state.config.open_router_api_key, priority="background")
+
     return await llm_client.acomplete_messages(
+        model=model,
+        messages=_judge_messages(state),
+        output_model=JudgeResult,
+        temperature=state.config.judge_temperature
+    )
+
+
+def _verdict_events(res: JudgeResult) -> List[dict]:
+    events = [{"type": "verdict_winner", "data": res.winner}]
+    events += [{"type": "verdict_score", "criterion": c, "data": v} for c, v in res.scores.items()]
+    if res.reasoning:
+        events.append({"type": "verdict_reasoning", "data": res.reasoning})
+    events.append({"type": "verdict", "data": res.model_dump()})
+    return events
+
+
+async def astream_judge(state: DebateState) -> AsyncIterator[dict]:
+    """Judge the debate, yielding the verdict as it is generated.
+
+    ``verdict_winner`` and one ``verdict_score`` per criterion come out as soon
+    as each value is complete, ``verdict_reasoning`` carries text deltas, and
+    the validated ``verdict`` comes last and is the one that counts. Panels,
+    incremental and map-reduce judging have no single document to stream, so
+    their pieces all arrive together once the verdict is in.
+    """
+    cfg = state.config
+    streamable = not cfg.judge_panel and (
+        cfg.judge_mode == "final" or (cfg.judge_mode == "map_reduce" and len(state.history) <= 2)
+    )
+    if not streamable:
+        for event in _verdict_events(await judge(state)):
+            yield event
+        return
+
+    llm_client = OpenRouterClient(cfg.open_router_api_key, priority="background")
+    parser = JSONEventParser()
+    parts: List[str] = []
+    started = time.perf_counter()
+    async for delta in llm_client.astream_messages(
+        model=cfg.judge_model,
+        messages=_judge_messages(state),
+        temperature=cfg.judge_temperature,
+        output_model=JudgeResult,
+    ):
+        parts.append(delta)
+        for kind, path, value in parser.feed(delta):
+            if path == ("reasoning",):
+                if kind == "text":
+                    yield {"type": "verdict_reasoning", "data": value}
+            elif kind != "value":
+                continue
+            elif path == ("winner",):
+                yield {"type": "verdict_winner", "data": value}
+            elif len(path) == 2 and path[0] == "scores":
+                yield {"type": "verdict_score", "criterion": path[1], "data": value}
+
+    try:
+        res = JudgeResult.model_validate_json("".join(parts))
+    except ValidationError:
+        # the partial events were only a preview; ask again without streaming
+        counters.inc("judge_stream_invalid_total")
+        res = await judge_transcript(state, cfg.judge_model)
+    _record_judge_time(state, "streamed", time.perf_counter() - started)
+    yield {"type": "verdict", "data": res.model_dump()}
+
+
+async def score_round(state: DebateState, first: int, model: str) -> List[TurnScore]:
+    """Score the round made of ``history[first:first + 2]``, with the round before as context."""
+    llm_client = OpenRouterClient(state.config.open_router_api_key, priority="background")
+
+    def fmt(turns):
+        return "\n".join(
+            f"{t.role.upper()}: {t.text}"
+            for t in turns
+        )
+
+    messages = [
+        {"role": "system", "content": SYSTEM_ROUND_JUDGE},
+        {"role": "user", "content": ROUND_JUDGE_TEMPLATE.format(
+            topic=state.config.topic,
+            context=fmt(state.history[max(0, first - 2):first]) or "(none)",
+            round=first // 2 + 1,
+            turns=fmt(state.history[first:first + 2]),
+        )},
+    ]
+
+    res = await llm_client.acomplete_messages(
+        model=model,
+        messages=messages,
+        output_model=RoundJudgement,
+        temperature=state.config.judge_temperature
+    )
+    scores = []
+    for i in range(first, min(first + 2, len(state.history))):
+        role = state.history[i].role
+        scores.append(TurnScore(
+            turn=i,
+            role=role,
+            scores=res.pro_scores if role == "pro" else res.con_scores,
+            note=res.note if role == "pro" else "",
+        ))
+    return scores
+
+
+async def judge_map_reduce(state: DebateState, model: str) -> JudgeResult:
+    # map: every round is scored at once; reduce: the same weighted average incremental mode uses
+    rounds = await asyncio.gather(
+        *(score_round(state, i, model) for i in range(0, len(state.history), 2)),
+        return_exceptions=True,
+    )
+    scores = [s for r in rounds if not isinstance(r, BaseException) for s in r]
+    if not scores:
+        raise next(r for r in rounds if isinstance(r, BaseException))
+    return aggregate_turn_scores(state, scores=scores)
+
+
+async def judge_panel(state: DebateState, models: List[str]) -> JudgeResult:
+    """Run every judge in parallel and merge the verdicts that arrive before
+    the deadline; if none has, the first one to arrive at all."""
+    deadline = state.config.judge_deadline or settings.judge_deadline
+    tasks = {asyncio.create_task(_judge_with(state, m)): m for m in models}
+    verdicts: List[JudgeResult] = []
+    errors: List[BaseException] = []
+
+    def collect(done):
+        for t in done:
+            if t.exception() is None:
+                verdicts.append(t.result())
+            else:
+                errors.append(t.exception())
+
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        collect(done)
+        while pending and not verdicts:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            collect(done)
+    finally:
+        late = [t for t in tasks if not t.done()]
+        for t in late:
+            t.cancel()
+        await asyncio.gather(*late, return_exceptions=True)
+
+    counters.inc("judge_panel_late_total", len(late))
+    counters.inc("judge_panel_failed_total", len(errors))
+    if not verdicts:
+        raise errors[0]
+    return merge_verdicts(verdicts, state.config.panel_merge)
+
+
+def merge_verdicts(verdicts: List[JudgeResult], how: Literal["mean", "majority"] = "mean") -> JudgeResult:
+    if how == "majority":
+        votes = Counter(v.winner for v in verdicts).most_common()
+        # a tie between the top two is no majority
+        winner = votes[0][0] if len(votes) == 1 or votes[0][1] > votes[1][1] else "draw"
+    else:
+        lean = sum({"pro": 1, "con": -1, "draw": 0}[v.winner] for v in verdicts) / len(verdicts)
+        winner = "draw" if abs(lean) < 1 / 3 else ("pro" if lean > 0 else "con")
+
+    per_criterion: Dict[str, List[float]] = {}
+    for v in verdicts:
+        for c, x in v.scores.items():
+            per_criterion.setdefault(c, []).append(x)
+
+    return JudgeResult(
+        winner=winner,
+        scores={c: round(sum(x) / len(x), 2) for c, x in per_criterion.items()},
+        reasoning=" ".join(f"[judge {i + 1}: {v.winner}] {v.reasoning}" for i, v in enumerate(verdicts)),
+    )
+
+
+async def score_turn(state: DebateState, index: int, context_turns: int = 4) -> TurnScore:
+    llm_client = OpenRouterClient(state.config.open_router_api_key, priority="background")
+
+    turn = state.history[index]
+
+    context = "\n".join(
+        f"{t.role}: {t.text}"
+        for t in state.history[max(0, index - context_turns):index]
+    ) or "(none)"
+
+    messages = [
+        {"role": "system", "content": SYSTEM_TURN_JUDGE},
+        {"role": "user", "content": TURN_JUDGE_TEMPLATE.format(
+            topic=state.config.topic,
+            context=context,
+            role=turn.role,
+            text=turn.text,
+        )},
+    ]
+
+    res = await llm_client.acomplete_messages(
         model=state.config.judge_model,
         messages=messages,
-        output_model=JudgeResult,
+        output_model=TurnJudgement,
         temperature=state.config.judge_temperature
     )
+    return TurnScore(turn=index, role=turn.role, scores=res.scores, note=res.note)
+
+
+def add_turn_score(state: DebateState, score: TurnScore):
+    if all(s.turn != score.turn for s in state.turn_scores):
+        state.turn_scores.append(score)
+
+
+def schedule_turn_score(
+    state: DebateState,
+    index: int,
+    on_scored: Optional[Callable[[TurnScore], Awaitable[None]]] = None,
+) -> asyncio.Task:
+    async def run() -> Optional[TurnScore]:
+        try:
+            score = await score_turn(state, index)
+        except Exception:
+            # judge() notices the missing turn and falls back to a full call
+            return None
+        add_turn_score(state, score)
+        if on_scored is not None:
+            # judge() awaits this task; persisting the score is a store
+            # round trip it does not need to wait for
+            bg = asyncio.create_task(on_scored(score))
+            _background_tasks.add(bg)
+            bg.add_done_callback(_background_tasks.discard)
+        return score
+
+    task = asyncio.create_task(run())
+    sid = state.session_id
+    tasks = _scoring_tasks.setdefault(sid, set())
+    tasks.add(task)
+
+    def finished(t: asyncio.Task):
+        tasks.discard(t)
+        # sessions that are never judged must not leave an empty set behind
+        if not tasks and _scoring_tasks.get(sid) is tasks:
+            del _scoring_tasks[sid]
+
+    task.add_done_callback(finished)
+    return task
+
+
+def aggregate_turn_scores(
+    state: DebateState,
+    draw_margin: float = 0.25,
+    scores: Optional[List[TurnScore]] = None,
+) -> JudgeResult:
+    n = len(state.history)
+    scores = state.turn_scores if scores is None else scores
+    totals = {"pro": 0.0, "con": 0.0}
+    weights = {"pro": 0.0, "con": 0.0}
+    per_criterion: Dict[str, List[float]] = {c: [] for c in CRITERIA}
+
+    for s in sorted(scores, key=lambda s: s.turn):
+        values = [s.scores[c] for c in CRITERIA if c in s.scores]
+        if not values:
+            continue
+        # later turns count slightly more, like the full-transcript judge
+        w = 1.0 + s.turn / max(1, n)
+        totals[s.role] += w * sum(values) / len(values)
+        weights[s.role] += w
+        for c in CRITERIA:
+            if c in s.scores:
+                per_criterion[c].append(s.scores[c])
+
+    means = {r: totals[r] / weights[r] if weights[r] else 0.0 for r in totals}
+    diff = means["pro"] - means["con"]
+    winner = "draw" if abs(diff) < draw_margin else ("pro" if diff > 0 else "con")
+
+    notes = " ".join(
+        f"[{s.role} {s.turn + 1}] {s.note}"
+        for s in sorted(scores, key=lambda s: s.turn)
+        if s.note
+    )
+    return JudgeResult(
+        winner=winner,
+        scores={c: round(sum(v) / len(v), 2) for c, v in per_criterion.items() if v},
+        reasoning=f"Weighted turn average: pro {means['pro']:.2f}, con {means['con']:.2f}. {notes}".strip(),
+    )
+
+
+def context_budget(model: str) -> int:
+    return settings.context_budgets.get(model, settings.context_tokens)
 
 
 def _messages_for_role_stream(
     state: DebateState,
     role: Literal["pro", "con"],
-    max_turns: int = 6
+    budget_tokens: Optional[int] = None,
 ) -> List[dict]:
+    cfg = state.config
+    if budget_tokens is None:
+        budget_tokens = context_budget(cfg.pro_model if role == "pro" else cfg.con_model)
+    if cfg.prompt_layout == "prefix_stable":
+        return _stable_messages_for_role(state, role, budget_tokens)
+
     system = SYSTEM_PRO if role == "pro" else SYSTEM_CON
-    msgs: List[dict] = [{"role": "system", "content": system}]
+    template = PRO_TEMPLATE if role == "pro" else CON_TEMPLATE
+    persona = cfg.pro_persona if role == "pro" else cfg.con_persona
+    used = estimate_tokens(system) + estimate_tokens(template) + estimate_tokens(cfg.topic + persona)
+
+    turns = [(t.role, t.text) for t in state.history]
+    lines = [f"{t_role.upper()}: {t_text}" for t_role, t_text in turns]
+    cost = [estimate_tokens(line) + 4 for line in lines]
+
+    # the whole transcript when it fits, otherwise the summary plus the newest turns
+    summary_msg = None
+    start = 0
+    if used + sum(cost) > budget_tokens and state.summary:
+        summary_msg = {
+            "role": "user",
+            "content": f"Summary of turns 1-{state.summary_upto}:\n{state.summary}",
+        }
+        used += estimate_tokens(summary_msg["content"]) + 4
+        start = state.summary_upto
 
-    history = state.history[-max_turns:]
+    first = len(turns)
+    while first > start and (first == len(turns) or used + cost[first - 1] <= budget_tokens):
+        # the newest turn always goes in, even on its own it is over budget
+        used += cost[first - 1]
+        first -= 1
 
-    for t in history:
-        t_role = t["role"] if isinstance(t, dict) else t.role
-        t_text = t["text"] if isinstance(t, dict) else t.text
+    msgs: List[dict] = [{"role": "system", "content": system}]
+    if summary_msg is not None:
+        msgs.append(summary_msg)
+    for (t_role, _), line in zip(turns[first:], lines[first:]):
         speaker = "assistant" if t_role == role else "user"
-        msgs.append({"role": speaker, "content": f"{t_role.upper()}: {t_text}"})
+        msgs.append({"role": speaker, "content": line})
 
-    opponent_last = next(
-        (
-            (t["text"] if isinstance(t, dict) else t.text)
-            for t in reversed(state.history)
-            if (t["role"] if isinstance(t, dict) else t.role) != role
-        ),
-        None,
-    )
-    focus = opponent_last or "(first turn)"
-    template = PRO_TEMPLATE if role == "pro" else CON_TEMPLATE
+    opponent_at = next((i for i in range(len(turns) - 1, -1, -1) if turns[i][0] != role), None)
+    if opponent_at is None:
+        focus = "(first turn)"
+    elif opponent_at >= first:
+        # already in the messages above, do not pay for it twice
+        focus = f"(their {turns[opponent_at][0].upper()} message above)"
+    else:
+        focus = turns[opponent_at][1]
 
     msgs.append({
         "role": "user",
         "content": template.format(
-            topic=state.config.topic,
-            persona=state.config.pro_persona if role == "pro" else state.config.con_persona,
+            topic=cfg.topic,
+            persona=persona,
             opponent_last=focus,
         ),
     })
-    return msgs
\ No newline at end of file
+    return msgs
+
+
+def _cache_breakpoint(msg: dict) -> dict:
+    return {
+        "role": msg["role"],
+        "content": [{"type": "text", "text": msg["content"], "cache_control": {"type": "ephemeral"}}],
+    }
+
+
+def _stable_head(state: DebateState, role: Literal["pro", "con"]) -> Tuple[str, str]:
+    cfg = state.config
+    system = (SYSTEM_PRO if role == "pro" else SYSTEM_CON) + STABLE_ROLE_TEMPLATE.format(
+        topic=cfg.topic,
+        persona=cfg.pro_persona if role == "pro" else cfg.con_persona,
+    )
+    return system, STABLE_TURN_PROMPT.format(role=role.upper())
+
+
+def prefix_window(
+    state: DebateState,
+    role: Literal["pro", "con"],
+    budget_tokens: Optional[int] = None,
+) -> Tuple[int, str, int]:
+    """Where the prefix_stable prompt for ``role`` starts: ``(start, summary,
+    upto)``, with history before ``start`` replaced by a summary of the first
+    ``upto`` turns. Does not touch ``state``; the caller stores the window
+    with the turn."""
+    cfg = state.config
+    if budget_tokens is None:
+        budget_tokens = context_budget(cfg.pro_model if role == "pro" else cfg.con_model)
+    start, summary, upto = state.prefix_start, state.prefix_summary, state.prefix_summary_upto
+    if start > upto:
+        # a frozen summary that stops short of the window would leave turns out of the prompt
+        start, summary, upto = 0, "", 0
+
+    system, instruction = _stable_head(state, role)
+    cost = [estimate_tokens(f"{t.role.upper()}: {t.text}") + 4 for t in state.history]
+    fixed = estimate_tokens(system) + estimate_tokens(instruction)
+    if fixed + estimate_tokens(summary) + sum(cost[start:]) > budget_tokens:
+        # jump well past the limit: one cache miss now buys several turns of pure appends
+        if state.summary_upto >= upto:
+            upto = state.summary_upto
+            summary = f"Summary of turns 1-{upto}:\n{state.summary}" if upto else ""
+        used = fixed + estimate_tokens(summary) + sum(cost[start:])
+        # never past what the summary covers: until the refresh catches up the
+        # prompt runs over budget rather than losing turns
+        end = min(len(cost) - 1, upto)
+        while start < end and used > budget_tokens * settings.context_checkpoint_ratio:
+            used -= cost[start]
+            start += 1
+    return start, summary, upto
+
+
+def _stable_messages_for_role(
+    state: DebateState,
+    role: Literal["pro", "con"],
+    budget_tokens: int,
+) -> List[dict]:
+    """Same content as the budgeted layout, arranged so each turn's prompt
+    starts with the previous turn's prompt: a fixed system prefix, history
+    that only grows, and a window that moves in coarse jumps."""
+    model = state.config.pro_model if role == "pro" else state.config.con_model
+    system, instruction = _stable_head(state, role)
+    start, summary, _ = prefix_window(state, role, budget_tokens)
+
+    msgs: List[dict] = [{"role": "system", "content": system}]
+    if start and summary:
+        msgs.append({"role": "user", "content": summary})
+    for t in state.history[start:]:
+        msgs.append({"role": "assistant" if t.role == role else "user", "content": f"{t.role.upper()}: {t.text}"})
+
+    if model.startswith(settings.prompt_cache_control_prefixes):
+        # providers without automatic prefix caching need explicit breakpoints
+        msgs[0] = _cache_breakpoint(msgs[0])
+        if len(msgs) > 1:
+            msgs[-1] = _cache_breakpoint(msgs[-1])
+
+    msgs.append({"role": "user", "content": instruction})
+    return msgs
+
+
+def summary_model(cfg: DebateConfig) -> str:
+    return settings.context_summary_model or cfg.judge_model
+
+
+async def summarize_turns(state: DebateState, upto: int) -> DebateSummary:
+    """Fold ``history[state.summary_upto:upto]`` into the running summary."""
+    llm_client = OpenRouterClient(state.config.open_router_api_key, priority="background")
+    turns = "\n".join(
+        f"{t.role.upper()}: {t.text}"
+        for t in state.history[state.summary_upto:upto]
+    )
+    messages = [
+        {"role": "system", "content": SYSTEM_SUMMARIZER},
+        {"role": "user", "content": SUMMARY_TEMPLATE.format(
+            topic=state.config.topic,
+            summary=state.summary or "(empty)",
+            turns=turns,
+        )},
+    ]
+    return await llm_client.acomplete_messages(
+        model=summary_model(state.config),
+        messages=messages,
+        output_model=DebateSummary,
+        temperature=0.2,
+    )
+
+
+def _transcript_overflows(state: DebateState) -> bool:
+    """Whether the next turn's prompt, with the whole transcript, is over its model's context budget."""
+    cfg = state.config
+    role = state.next_role
+    if role == "pro":
+        fixed = SYSTEM_PRO + PRO_TEMPLATE + cfg.topic + cfg.pro_persona
+    else:
+        fixed = SYSTEM_CON + CON_TEMPLATE + cfg.topic + cfg.con_persona
+    used = estimate_tokens(fixed) + sum(estimate_tokens(f"{t.role.upper()}: {t.text}") + 4 for t in state.history)
+    return used > context_budget(cfg.pro_model if role == "pro" else cfg.con_model)
+
+
+def schedule_summary_refresh(
+    state: DebateState,
+    on_summarized: Optional[Callable[[str, int], Awaitable[None]]] = None,
+    limit: Optional[Callable[[str], AsyncContextManager]] = None,
+) -> Optional[asyncio.Task]:
+    """Summarize turns that fell out of the verbatim window, off the turn's
+    critical path; a no-op while a refresh for this session is running.
+
+    A summary is only paid for when a turn is still to come and its prompt
+    cannot hold the whole transcript, the only case the builders read it.
+    ``limit(model)`` wraps the call, as a tournament's per-model limit does.
+    """
+    if len(state.history) >= state.config.rounds * 2:
+        return None
+    upto = len(state.history) - settings.context_keep_turns
+    if upto - state.summary_upto < max(1, settings.context_summary_batch):
+        return None
+    running = _summary_tasks.get(state.session_id)
+    if running is not None and not running.done():
+        return None
+    if not _transcript_overflows(state):
+        return None
+
+    async def run():
+        try:
+            async with limit(summary_model(state.config)) if limit is not None else nullcontext():
+                res = await summarize_turns(state, upto)
+        except Exception:
+            # the builder keeps working from the older summary
+            return
+        if upto > state.summary_upto:
+            state.summary, state.summary_upto = res.summary, upto
+        if on_summarized is not None:
+            await on_summarized(res.summary, upto)
+
+    task = _summary_tasks[state.session_id] = asyncio.create_task(run())
+    task.add_done_callback(
+        lambda t: _summary_tasks.pop(state.session_id, None) if _summary_tasks.get(state.session_id) is t else None
+    )
+    return task
@@ -0,0 +1,252 @@
+import asyncio
+import orjson
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .config import settings
+from .metrics import counters
+
+
+def sse_frame(event: dict) -> bytes:
+    head = b"id: %d\n" % event["id"] if "id" in event else b""
+    return head + b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+# events whose data is appended text, so consecutive ones can be merged into one
+_MERGEABLE = ("delta", "verdict_reasoning")
+
+
+class Subscriber:
+    """A watcher's bounded queue of pre-encoded SSE frames.
+
+    The publisher never waits on a subscriber. Once the queue is full, new
+    events go to a backlog where consecutive deltas of one turn, or of the
+    verdict's reasoning, are merged into one, so a slow viewer gets fewer,
+    larger deltas instead of stalling the turn. A viewer whose backlog
+    still overflows is cut off.
+    """
+
+    def __init__(self, maxsize: int, max_backlog: int):
+        # (event type, encoded frame)
+        self.queue: "asyncio.Queue[Tuple[str, bytes]]" = asyncio.Queue(maxsize)
+        self.backlog: List[dict] = []
+        self.max_backlog = max_backlog
+        self.coalesced = 0
+        self.closed = False
+
+    def offer(self, event: dict, frame: bytes) -> bool:
+        """Returns False once the subscriber is too far behind to keep."""
+        if not self.backlog:
+            try:
+                self.queue.put_nowait((event["type"], frame))
+                return True
+            except asyncio.QueueFull:
+                pass
+
+        last = self.backlog[-1] if self.backlog else None
+        if (
+            last is not None
+            and event["type"] in _MERGEABLE
+            and event["type"] == last["type"]
+            and event.get("seq") == last.get("seq")
+        ):
+            self.backlog[-1] = {**last, "data": last["data"] + event["data"], "id": event["id"]}
+            self.coalesced += 1
+            counters.inc("watch_events_coalesced_total")
+            return True
+
+        self.backlog.append(event)
+        if len(self.backlog) > self.max_backlog:
+            counters.inc("watch_subscribers_dropped_total")
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        # what is queued still goes out; the viewer then reconnects with
+        # Last-Event-ID and catches up from the ring buffer
+        self.closed = True
+        self.backlog = []
+        try:
+            self.queue.put_nowait(("", b""))
+        except asyncio.QueueFull:
+            pass
+
+    def drain(self, limit: int) -> List[Tuple[str, bytes]]:
+        """Whatever else is already queued, without waiting."""
+        out = []
+        while len(out) < limit and not self.queue.empty():
+            out.append(self.queue.get_nowait())
+        return out
+
+    async def get(self) -> Tuple[str, bytes]:
+        """Next (type, frame), or ("", b"") once the subscriber has been closed."""
+        if self.queue.empty():
+            if self.backlog:
+                event = self.backlog.pop(0)
+                return event["type"], sse_frame(event)
+            if self.closed:
+                return "", b""
+        return await self.queue.get()
+
+
+class EventLog:
+    """Ring buffer of sequence-numbered events for one session.
+
+    Turns run as background tasks that publish here, so a client that drops
+    can reattach with the last id it saw and several viewers can follow the
+    same upstream generation.
+    """
+
+    def __init__(self, maxlen: int):
+        self._events: Deque[dict] = deque(maxlen=maxlen)
+        self._cond = asyncio.Condition()
+        self._runs: Dict[int, asyncio.Task] = {}
+        self._run_start: Dict[int, int] = {}
+        self._subscribers: Set[Subscriber] = set()
+        self._followers = 0
+        self._reaper: Optional[asyncio.TimerHandle] = None
+        self.last_id = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._runs)
+
+    @property
+    def first_id(self) -> int:
+        return self._events[0]["id"] if self._events else self.last_id + 1
+
+    async def publish(self, event: dict) -> int:
+        async with self._cond:
+            self.last_id += 1
+            event["id"] = self.last_id
+            self._events.append(event)
+            self._cond.notify_all()
+        if self._subscribers:
+            # encoded once, shared by every watcher
+            frame = sse_frame(event)
+            for sub in list(self._subscribers):
+                if not sub.offer(event, frame):
+                    self._subscribers.discard(sub)
+                    self._maybe_reap()
+        return self.last_id
+
+    def subscribe(self, maxsize: int | None = None) -> Subscriber:
+        sub = Subscriber(maxsize or settings.watch_queue_size, settings.watch_max_backlog)
+        self._subscribers.add(sub)
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        self._subscribers.discard(sub)
+        self._maybe_reap()
+
+    @property
+    def audience(self) -> int:
+        return self._followers + len(self._subscribers)
+
+    def _maybe_reap(self):
+        """Cancel running turns once nobody has been listening for the grace
+        period, which stops the upstream request and its billing."""
+        if self.audience or not self._runs or self._reaper is not None:
+            return
+
+        def reap():
+            self._reaper = None
+            if not self.audience:
+                for task in self._runs.values():
+                    task.cancel()
+
+        grace = settings.turn_orphan_grace
+        if grace <= 0:
+            reap()
+        else:
+            self._reaper = asyncio.get_running_loop().call_later(grace, reap)
+
+    @property
+    def watchers(self) -> int:
+        return len(self._subscribers)
+
+    def since(self, last_id: int) -> List[dict]:
+        if not self._events or last_id >= self.last_id:
+            return []
+        start = max(0, last_id + 1 - self._events[0]["id"])
+        # copy only the tail: callers yield between events while publish appends
+        return list(islice(self._events, start, None))
+
+    def start(self, seq: int, events: Callable[[], AsyncIterator[dict]]) -> int:
+        """Run turn ``seq`` in the background unless it already is; returns
+        the id the run's events start after."""
+        if seq in self._runs:
+            return self._run_start[seq]
+
+        async def run():
+            try:
+                async for event in events():
+                    await self.publish(event)
+            except asyncio.CancelledError:
+                # nobody was listening; the partial turn is dropped, not stored
+                await self.publish({"type": "cancelled", "seq": seq})
+            except Exception as e:
+                await self.publish({"type": "error", "seq": seq, "detail": str(e)})
+            finally:
+                self._runs.pop(seq, None)
+                self._run_start.pop(seq, None)
+                async with self._cond:
+                    self._cond.notify_all()
+
+        self._run_start[seq] = self.last_id
+        self._runs[seq] = asyncio.create_task(run())
+        return self.last_id
+
+    async def tail(self, last_id: int) -> AsyncIterator[dict]:
+        """Replay events after ``last_id``, then follow live ones until no
+        turn is running."""
+        self._followers += 1
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        try:
+            if last_id + 1 < self.first_id:
+                yield {"type": "gap", "first_id": self.first_id}
+            while True:
+                for event in self.since(last_id):
+                    last_id = event["id"]
+                    yield event
+                async with self._cond:
+                    if self.last_id <= last_id and not self.running:
+                        return
+                    await self._cond.wait_for(lambda: self.last_id > last_id or not self.running)
+        finally:
+            self._followers -= 1
+            self._maybe_reap()
+
+
+class EventLogs:
+    def __init__(self, maxlen: int, max_sessions: int):
+        self._logs: "OrderedDict[str, EventLog]" = OrderedDict()
+        self.maxlen = maxlen
+        self.max_sessions = max_sessions
+
+    def get(self, session_id: str, create: bool = True) -> Optional[EventLog]:
+        log = self._logs.get(session_id)
+        if log is None:
+            if not create:
+                return None
+            log = self._logs[session_id] = EventLog(self.maxlen)
+            self._evict()
+        self._logs.move_to_end(session_id)
+        return log
+
+    def _evict(self):
+        for sid in list(self._logs):
+            if len(self._logs) <= self.max_sessions:
+                break
+            if not self._logs[sid].running and not self._logs[sid].watchers:
+                del self._logs[sid]
+
+
+event_logs = EventLogs(settings.event_log_size, settings.event_log_max_sessions)
@@ -0,0 +1,383 @@
+"""Bulk export of debates for offline analysis: transcripts, configs without
+API keys, verdicts and timings, as NDJSON or as Arrow/Parquet when pyarrow
+is installed.
+
+    python -m backend.export --out debates.ndjson --since 2026-01-01 --status finished
+    python -m backend.export --out debates.ndjson --resume
+    python -m backend.export --url http://localhost:8000 --out debates.parquet
+
+The store is walked one page at a time, so neither side holds more than a
+page of sessions plus one output chunk. Every record carries the cursor to
+resume after it. Without --url the CLI opens the store named by
+STORE_BACKEND directly, which only finds sessions for sqlite and redis; the
+memory store lives in the backend process, so export it through --url.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+from typing import AsyncIterator, Collection, Dict, List, Optional, Tuple, get_args
+
+import orjson
+
+from .schemas import TURN_FIELDS, DebateState, Turn, turn_row
+from .store import BaseStore, make_store
+
+# format -> (media type, file extension)
+FORMATS = {
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+_EXTENSIONS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".arrow": "arrow", ".arrows": "arrow", ".parquet": "parquet"}
+
+# NDJSON is flushed in chunks of about this many bytes
+CHUNK_BYTES = 64 * 1024
+
+
+class FormatUnavailable(RuntimeError):
+    pass
+
+
+class ExportFilter:
+    """Which sessions to export. created_at is in [since, until); a session
+    matches ``models`` if any of them debated, judged or stood by in it."""
+
+    def __init__(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        models: Collection[str] = (),
+        statuses: Collection[str] = (),
+    ):
+        self.since = since
+        self.until = until
+        self.models = frozenset(models)
+        self.statuses = frozenset(statuses)
+
+    def matches(self, state: DebateState) -> bool:
+        if self.statuses and state.status not in self.statuses:
+            return False
+        if self.since is not None and state.created_at < self.since:
+            return False
+        if self.until is not None and state.created_at >= self.until:
+            return False
+        if self.models:
+            cfg = state.config
+            used = {cfg.pro_model, cfg.con_model, cfg.judge_model, *cfg.judge_panel,
+                    *cfg.pro_fallback_models, *cfg.con_fallback_models}
+            used.update(t.model for t in state.history)
+            if self.models.isdisjoint(used):
+                return False
+        return True
+
+
+async def iter_sessions(
+    store: BaseStore, flt: ExportFilter, cursor: str = "", batch: int = 200
+) -> AsyncIterator[Tuple[str, DebateState]]:
+    """Matching sessions with the cursor to resume after each one."""
+    while True:
+        items, cursor = await store.apage(cursor, batch, flt.statuses)
+        for item_cursor, state in items:
+            if flt.matches(state):
+                yield item_cursor, state
+        if cursor is None:
+            return
+
+
+def _turn_dict(t: Turn) -> dict:
+    return dict(zip(TURN_FIELDS, turn_row(t)))
+
+
+def export_record(state: DebateState, cursor: str) -> dict:
+    verdict = state.verdict
+    return {
+        "session_id": state.session_id,
+        "created_at": state.created_at,
+        "status": state.status,
+        "config": state.config.model_dump(exclude={"open_router_api_key"}),
+        "turns": [_turn_dict(t) for t in state.history],
+        "turn_scores": [s.model_dump() for s in state.turn_scores],
+        "verdict": verdict.model_dump() if verdict else None,
+        "timings": state.timings,
+        "cursor": cursor,
+    }
+
+
+async def _records(store: BaseStore, flt: ExportFilter, cursor: str, limit: Optional[int], batch: int):
+    n = 0
+    async for item_cursor, state in iter_sessions(store, flt, cursor, batch):
+        if limit is not None and n >= limit:
+            return
+        yield export_record(state, item_cursor)
+        n += 1
+
+
+# --------------------------------------------------------
+# Writers
+# --------------------------------------------------------
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise FormatUnavailable("Arrow and Parquet export need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def check_format(fmt: str):
+    """Raise ValueError for an unknown format and FormatUnavailable when it needs pyarrow."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format: {fmt}")
+    if fmt != "ndjson":
+        _pyarrow()
+
+
+def _arrow_type(pa, tp):
+    if tp is int:
+        return pa.int64()
+    if tp is float or float in get_args(tp):
+        return pa.float64()
+    return pa.string()
+
+
+def arrow_schema():
+    """One row per session; config is kept as a JSON string so new settings need no schema change."""
+    pa = _pyarrow()
+    scores = pa.map_(pa.string(), pa.float64())
+    turn = pa.struct([(name, _arrow_type(pa, Turn.__annotations__[name])) for name in TURN_FIELDS])
+    turn_score = pa.struct([
+        ("turn", pa.int64()), ("role", pa.string()), ("scores", scores), ("note", pa.string()),
+    ])
+    return pa.schema([
+        ("session_id", pa.string()),
+        ("created_at", pa.float64()),
+        ("status", pa.string()),
+        ("topic", pa.string()),
+        ("rounds", pa.int64()),
+        ("pro_model", pa.string()),
+        ("con_model", pa.string()),
+        ("judge_model", pa.string()),
+        ("judge_mode", pa.string()),
+        ("config", pa.string()),
+        ("winner", pa.string()),
+        ("scores", scores),
+        ("reasoning", pa.string()),
+        ("turns", pa.list_(turn)),
+        ("turn_scores", pa.list_(turn_score)),
+        ("timings", scores),
+        ("cursor", pa.string()),
+    ])
+
+
+def _arrow_row(rec: dict) -> dict:
+    cfg, verdict = rec["config"], rec["verdict"] or {}
+    return {
+        **{k: rec[k] for k in ("session_id", "created_at", "status", "turns", "timings", "cursor")},
+        **{k: cfg[k] for k in ("topic", "rounds", "pro_model", "con_model", "judge_model", "judge_mode")},
+        "config": orjson.dumps(cfg).decode(),
+        "winner": verdict.get("winner"),
+        "scores": verdict.get("scores"),
+        "reasoning": verdict.get("reasoning"),
+        "turn_scores": rec["turn_scores"],
+    }
+
+
+class _Sink:
+    """File-like target for a pyarrow writer; take() returns what was written since the last call."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+async def _ndjson(records: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    buf = bytearray()
+    async for rec in records:
+        buf += orjson.dumps(rec)
+        buf += b"\n"
+        if len(buf) >= CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+
+async def _columnar(records: AsyncIterator[dict], fmt: str, rows: int) -> AsyncIterator[bytes]:
+    # every ``rows`` sessions become one record batch, a row group in Parquet
+    pa = _pyarrow()
+    schema = arrow_schema()
+    sink = _Sink()
+    writer = pa.ipc.new_stream(sink, schema) if fmt == "arrow" else pa.parquet.ParquetWriter(sink, schema)
+
+    def write(batch: List[dict]) -> bytes:
+        writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+        return sink.take()
+
+    batch: List[dict] = []
+    try:
+        async for rec in records:
+            batch.append(_arrow_row(rec))
+            if len(batch) >= rows:
+                yield await asyncio.to_thread(write, batch)
+                batch = []
+        if batch:
+            yield await asyncio.to_thread(write, batch)
+    finally:
+        writer.close()
+    # the stream end marker or the Parquet footer
+    yield sink.take()
+
+
+def export_stream(
+    store: BaseStore,
+    flt: ExportFilter,
+    fmt: str = "ndjson",
+    cursor: str = "",
+    limit: Optional[int] = None,
+    batch: int = 200,
+) -> AsyncIterator[bytes]:
+    """The export as byte chunks; call check_format first to fail before streaming."""
+    records = _records(store, flt, cursor, limit, batch)
+    if fmt == "ndjson":
+        return _ndjson(records)
+    return _columnar(records, fmt, batch)
+
+
+# --------------------------------------------------------
+# CLI
+# --------------------------------------------------------
+
+def parse_time(value: str) -> float:
+    """Epoch seconds from epoch seconds or an ISO 8601 date or time, UTC unless it says otherwise."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _resume_point(path: str) -> Tuple[str, int]:
+    """Cursor of the last complete record in an NDJSON export and the offset just past it."""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        while pos > 0:
+            step = min(CHUNK_BYTES, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            end = tail.rfind(b"\n")
+            if end == -1:
+                continue
+            start = tail.rfind(b"\n", 0, end)
+            if start != -1 or pos == 0:
+                return orjson.loads(tail[start + 1:end])["cursor"], pos + end + 1
+    return "", 0
+
+
+async def _remote_chunks(args, fmt: str, cursor: str) -> AsyncIterator[bytes]:
+    import httpx
+
+    params: Dict[str, object] = {"format": fmt, "model": args.model, "status": args.status}
+    for key in ("since", "until", "limit"):
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+    if cursor:
+        params["cursor"] = cursor
+    async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+        async with client.stream("GET", "/debates/export", params=params) as resp:
+            if resp.status_code != 200:
+                sys.exit(f"export failed: {resp.status_code} {(await resp.aread()).decode()}")
+            async for chunk in resp.aiter_bytes():
+                yield chunk
+
+
+async def main_async(args):
+    fmt = args.format or _EXTENSIONS.get(os.path.splitext(args.out)[1], "ndjson")
+    try:
+        check_format(fmt)
+    except (ValueError, FormatUnavailable) as e:
+        sys.exit(str(e))
+
+    cursor, mode = args.cursor, "wb"
+    if args.resume:
+        if fmt != "ndjson":
+            sys.exit("--resume appends to an NDJSON export; for Arrow or Parquet pass --cursor and a new --out")
+        if os.path.exists(args.out):
+            cursor, offset = _resume_point(args.out)
+            # drop a record cut short by an interrupted run
+            os.truncate(args.out, offset)
+            mode = "ab"
+
+    store = None
+    if args.url:
+        chunks = _remote_chunks(args, fmt, cursor)
+    else:
+        store = make_store()
+        flt = ExportFilter(
+            since=parse_time(args.since) if args.since else None,
+            until=parse_time(args.until) if args.until else None,
+            models=args.model,
+            statuses=args.status,
+        )
+        chunks = export_stream(store, flt, fmt, cursor, args.limit, args.batch)
+
+    written = 0
+    try:
+        with open(args.out, mode) as f:
+            async for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+    finally:
+        if store is not None:
+            await store.aclose()
+    print(f"{written} bytes of {fmt} written to {args.out}" + (f", resumed after {cursor}" if cursor else ""),
+          file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export debates for offline analysis")
+    parser.add_argument("--out", required=True, help="the format follows the extension unless --format")
+    parser.add_argument("--format", choices=list(FORMATS))
+    parser.add_argument("--since", help="ISO 8601 or epoch seconds, inclusive")
+    parser.add_argument("--until", help="ISO 8601 or epoch seconds, exclusive")
+    parser.add_argument("--model", action="append", default=[], help="may be repeated")
+    parser.add_argument("--status", action="append", default=[], choices=["running", "judging", "finished"])
+    parser.add_argument("--cursor", default="", help="continue after the record with this cursor")
+    parser.add_argument("--resume", action="store_true", help="append to --out after its last record")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--batch", type=int, default=200, help="sessions per store page and per record batch")
+    parser.add_argument("--url", help="export from a running backend instead of opening the store")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
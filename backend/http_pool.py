@@ -0,0 +1,47 @@
+import asyncio
+import aiohttp
+from typing import Optional
+
+from .config import settings
+
+
+class HTTPPool:
+    """One app-lifetime aiohttp session shared by every debate and API key."""
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+
+    def _build(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=settings.http_pool_limit,
+            limit_per_host=settings.http_pool_limit_per_host,
+            ttl_dns_cache=settings.http_dns_cache_ttl,
+            keepalive_timeout=settings.http_keepalive_timeout,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=settings.http_connect_timeout,
+            sock_read=settings.http_read_timeout,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def start(self) -> aiohttp.ClientSession:
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                self._session = self._build()
+            return self._session
+
+    async def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            return await self.start()
+        return self._session
+
+    async def close(self):
+        async with self._lock:
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+            self._session = None
+
+
+http_pool = HTTPPool()
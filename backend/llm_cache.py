@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import orjson
+
+from .config import settings
+from .metrics import counters
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when a call was never recorded."""
+
+
+def cache_key(payload: Dict[str, Any]) -> str:
+    """Content address of a request: model, messages, temperature, response
+    format and every other field that can change what the model returns."""
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class LLMCache:
+    """Two-tier response cache: an in-memory LRU in front of an optional SQLite file.
+
+    Entries are plain dicts. A completion is ``{"content": ...}``. A stream is
+    ``{"deltas": [[seconds_since_start, text], ...], "truncated": ...}`` so it
+    can replay with its original timing.
+    """
+
+    def __init__(self, mode: str, path: str = "", max_entries: int = 1000):
+        # off | on (read-through) | record (write only) | replay (strict, offline)
+        self.mode = mode
+        self.max_entries = max_entries
+        self._mem: "OrderedDict[str, dict]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        if path and mode != "off":
+            self.open(path)
+
+    def open(self, path: str):
+        """Attach (or switch) the on-disk tier."""
+        self.close()
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn = conn
+
+    def reads(self, temperature: float) -> bool:
+        if self.mode == "replay":
+            return True
+        # sampling at a high temperature is meant to differ call to call
+        return self.mode == "on" and temperature <= settings.llm_cache_max_temperature
+
+    def writes(self, temperature: float) -> bool:
+        return self.mode == "record" or (self.mode == "on" and self.reads(temperature))
+
+    def _remember(self, key: str, entry: dict):
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _disk_set(self, key: str, raw: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, data, created_at) VALUES (?, ?, ?)",
+                (key, raw, time.time()),
+            )
+
+    async def aget(self, key: str) -> Optional[dict]:
+        entry = self._mem.get(key)
+        if entry is not None:
+            self._mem.move_to_end(key)
+            counters.inc("llm_cache_hits_total")
+            return entry
+        if self._conn is not None:
+            raw = await asyncio.to_thread(self._disk_get, key)
+            if raw is not None:
+                entry = orjson.loads(raw)
+                self._remember(key, entry)
+                counters.inc("llm_cache_hits_total")
+                counters.inc("llm_cache_disk_hits_total")
+                return entry
+        counters.inc("llm_cache_misses_total")
+        if self.mode == "replay":
+            raise CacheMissError(f"no recorded response for request {key[:12]} (LLM_CACHE=replay)")
+        return None
+
+    async def aset(self, key: str, entry: dict):
+        self._remember(key, entry)
+        counters.inc("llm_cache_writes_total")
+        if self._conn is not None:
+            await asyncio.to_thread(self._disk_set, key, orjson.dumps(entry))
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"mode": self.mode, "memory_entries": len(self._mem)}
+        if self._conn is not None:
+            with self._lock:
+                out["disk_entries"], out["disk_bytes"] = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM llm_cache"
+                ).fetchone()
+        return out
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
+
+
+llm_cache = LLMCache(settings.llm_cache, settings.llm_cache_path, settings.llm_cache_max_entries)
@@ -1,17 +1,139 @@
-import json
+import asyncio
+import time
 import aiohttp
+import orjson
 from pydantic import BaseModel
-from typing import Any, AsyncIterator, Dict, List, Type, TypeVar
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple, Type, TypeVar
+
+from .config import settings
+from .http_pool import http_pool
+from .llm_cache import cache_key, llm_cache
+from .metrics import Stopwatch, counters, histograms
+from .resilience import (
+    RETRYABLE_STATUS, CircuitOpenError, backoff_delay, breakers, parse_retry_after, rate_limiter, scheduler
+)
+from .streaming import Usage, estimate_tokens, iter_sse, parse_chunk, parse_usage, usage_from
 
 T = TypeVar("T", bound=BaseModel)
 
+
+def _content_text(content: Any) -> str:
+    # content is a string, or a list of parts when it carries cache_control hints
+    if isinstance(content, list):
+        return "".join(p.get("text", "") for p in content if isinstance(p, dict))
+    return str(content or "")
+
+
+def _response_format(output_model: Type[BaseModel]) -> Dict[str, Any]:
+    output_schema = output_model.model_json_schema()
+    output_schema["additionalProperties"] = False
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "output_schema",
+            "strict": True,
+            "schema": output_schema
+        }
+    }
+
+
+class StreamBudget:
+    """Per-call limits for astream_messages; records which model answered and
+    why a stream stopped early."""
+
+    def __init__(self, max_tokens: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.tokens = 0
+        self.truncated: Optional[Literal["tokens", "time"]] = None
+        self.model: Optional[str] = None
+        self.prompt_tokens = 0
+        # from the provider's usage report; 0 when it sent none
+        self.cached_tokens = 0
+        self.cost = 0.0
+        # seconds to the first delta and for the whole stream, set by the caller that times it
+        self.ttft: Optional[float] = None
+        self.elapsed = 0.0
+        # prefix_stable window the prompt was built with, (start, summary, summary_upto);
+        # the caller stores it with the turn
+        self.window: Optional[Tuple[int, str, int]] = None
+
+
+def _record_usage(model: str, usage: Usage):
+    counters.inc("llm_usage_prompt_tokens_total", usage.prompt_tokens)
+    counters.inc("llm_usage_cached_tokens_total", usage.cached_tokens)
+    counters.inc("llm_tokens_in_total", usage.prompt_tokens, model=model)
+    counters.inc("llm_tokens_out_total", usage.completion_tokens, model=model)
+    if usage.cost:
+        counters.inc("llm_cost_usd_total", usage.cost, model=model)
+
+
 class OpenRouterClient:
-    def __init__(self, api_key: str | None = None):
-        self.base_url = "https://openrouter.ai/api/v1"
+    def __init__(
+        self,
+        api_key: str | None = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        base_url: str | None = None,
+        priority: Literal["interactive", "background"] = "interactive",
+    ):
+        self.base_url = base_url or settings.openrouter_base_url
+        self.api_key = api_key or ""
+        # judging and summaries queue behind debaters' turns when upstream is busy
+        self.priority = priority
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        self._session = session
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is not None:
+            return self._session
+        return await http_pool.session()
+
+    async def _retry_wait(self, attempt: int, retry_after: Optional[float] = None):
+        delay = backoff_delay(attempt, retry_after)
+        counters.inc("llm_retries_total")
+        counters.inc("llm_retry_wait_seconds_total", delay)
+        await asyncio.sleep(delay)
+
+    async def _open(self, model: str, payload: Dict[str, Any], **kwargs) -> aiohttp.ClientResponse:
+        """POST to chat/completions through the rate limiter and circuit breaker,
+        retrying throttled, failed and dropped requests. Nothing has been read
+        from the returned response yet, so retrying here is always safe."""
+        url = f"{self.base_url}/chat/completions"
+        session = await self._get_session()
+        breaker = breakers.get(model)
+        for attempt in range(settings.llm_max_retries + 1):
+            await rate_limiter.acquire(self.api_key, model)
+            if not breaker.allow():
+                counters.inc("llm_circuit_rejected_total")
+                raise CircuitOpenError(model, breaker.retry_in())
+            try:
+                resp = await session.post(url, headers=self.headers, json=payload, **kwargs)
+            except aiohttp.ClientConnectionError as e:
+                breaker.failure()
+                # a timeout already spent the caller's budget, do not spend it again
+                if isinstance(e, asyncio.TimeoutError) or attempt >= settings.llm_max_retries:
+                    raise
+                await self._retry_wait(attempt)
+                continue
+
+            if resp.status not in RETRYABLE_STATUS:
+                if resp.status < 500:
+                    breaker.success()
+                return resp
+
+            breaker.failure()
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if resp.status == 429 and retry_after:
+                # hold back every caller of this model, not just this one
+                rate_limiter.pause(model, min(retry_after, settings.llm_retry_after_max))
+            if attempt >= settings.llm_max_retries or (retry_after or 0) > settings.llm_retry_after_max:
+                return resp
+            resp.release()
+            await self._retry_wait(attempt, retry_after)
+        raise AssertionError("unreachable")
     
     async def acomplete_messages(
         self,
@@ -20,72 +142,260 @@ class OpenRouterClient:
         output_model: Type[T],
         temperature: float = 1.0,
         ) -> T:
-            url = f"{self.base_url}/chat/completions"
-            
-            output_schema = output_model.model_json_schema()
-            output_schema["additionalProperties"] = False
-
             payload: Dict[str, Any] = {
                 "model": model,
                 "temperature": temperature,
                 "messages": messages,
-                "response_format":{
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "output_schema",
-                        "strict": True,
-                        "schema": output_schema
-                    }
-                }
+                "response_format": _response_format(output_model),
             }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=self.headers, json=payload) as resp:
-                    if resp.status in (401, 403):
-                        detail = await resp.text()
-                        raise RuntimeError(f"OpenRouter auth/model error ({resp.status}): {detail}")
-                    resp.raise_for_status()
-                    res = await resp.json()
-
-                    content = res["choices"][0]["message"]["content"]
-
-                    if isinstance(content, str):
-                        import json
-                        content = json.loads(content)
-
-                    return output_model.model_validate(content)
+
+            key = cache_key(payload)
+            if llm_cache.reads(temperature):
+                entry = await llm_cache.aget(key)
+                if entry is not None:
+                    return output_model.model_validate(entry["content"])
+
+            started = time.perf_counter()
+            async with scheduler.slot(self.api_key, self.priority), await self._open(model, payload) as resp:
+                if resp.status in (401, 403):
+                    detail = await resp.text()
+                    raise RuntimeError(f"OpenRouter auth/model error ({resp.status}): {detail}")
+                resp.raise_for_status()
+                res = await resp.json()
+                if settings.metrics_enabled:
+                    histograms.observe("llm_structured_seconds", time.perf_counter() - started, model=model)
+                usage = usage_from(res.get("usage"))
+                if usage is not None:
+                    _record_usage(model, usage)
+
+                content = res["choices"][0]["message"]["content"]
+
+                if isinstance(content, str):
+                    content = orjson.loads(content)
+
+                result = output_model.model_validate(content)
+                if llm_cache.writes(temperature):
+                    await llm_cache.aset(key, {"content": content})
+                return result
     
     async def astream_messages(
         self,
         model: str,
         messages: List[Dict[str, str]],
         temperature: float = 1.0,
+        budget: Optional[StreamBudget] = None,
+        output_model: Optional[Type[BaseModel]] = None,
     ) -> AsyncIterator[str]:
-        url = f"{self.base_url}/chat/completions"
+        """Stream the reply as text deltas. With ``output_model`` the model is
+        held to its JSON schema and the deltas are pieces of that document."""
+        budget = budget or StreamBudget()
+        budget.model = model
+        budget.prompt_tokens = sum(estimate_tokens(_content_text(m.get("content"))) for m in messages)
+        counters.inc("llm_prompt_tokens_total", budget.prompt_tokens)
         payload = {
             "model": model,
             "plugins": [{ "id": "web" }],
             "temperature": temperature,
             "messages": messages,
-            "stream": True
+            "stream": True,
+            # ask for token usage, including cached prompt tokens, in the last chunk
+            "usage": {"include": True},
         }
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=self.headers, json=payload) as resp:
-                if resp.status in (401, 403):
-                    detail = await resp.text()
-                    raise RuntimeError(f"OpenRouter auth/model error ({resp.status}): {detail}")
-                resp.raise_for_status()
-                async for raw in resp.content:
-                    line = raw.decode("utf-8").strip()
-                    if not line or not line.startswith("data:"):
-                        continue
-                    data = line[len("data:"):].strip()
-                    if data == "[DONE]":
-                        break
+        if output_model is not None:
+            # structured output and web search do not mix on every provider
+            del payload["plugins"]
+            payload["response_format"] = _response_format(output_model)
+        kwargs: Dict[str, Any] = {}
+        if budget.max_tokens:
+            payload["max_tokens"] = budget.max_tokens
+        if budget.timeout:
+            # aiohttp's total timeout also covers reading the streamed body
+            kwargs["timeout"] = aiohttp.ClientTimeout(
+                total=budget.timeout,
+                sock_connect=settings.http_connect_timeout,
+                sock_read=settings.http_read_timeout,
+            )
+
+        key = cache_key(payload)
+        if llm_cache.reads(temperature):
+            entry = await llm_cache.aget(key)
+            if entry is not None:
+                async for delta in self._replay(entry, budget):
+                    yield delta
+                return
+
+        record = llm_cache.writes(temperature)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        recorded: List[list] = []
+        upstream = self._astream_upstream(model, payload, budget, kwargs)
+        try:
+            async for delta in upstream:
+                if record:
+                    recorded.append([round(loop.time() - started, 4), delta])
+                yield delta
+        finally:
+            # close now, not at garbage collection, so an abandoned stream stops upstream
+            await upstream.aclose()
+        # a turn cut off by the clock would not come out the same way twice
+        if record and budget.truncated != "time":
+            await llm_cache.aset(key, {
+                "deltas": recorded,
+                "truncated": budget.truncated,
+                "usage": [budget.prompt_tokens, budget.cached_tokens],
+            })
+
+    async def _replay(self, entry: dict, budget: StreamBudget) -> AsyncIterator[str]:
+        speed = settings.llm_cache_replay_speed
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for at, delta in entry["deltas"]:
+            if speed > 0:
+                wait = at / speed - (loop.time() - started)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            budget.tokens += estimate_tokens(delta)
+            yield delta
+        budget.truncated = entry.get("truncated")
+        if entry.get("usage"):
+            budget.prompt_tokens, budget.cached_tokens = entry["usage"]
+
+    async def _astream_upstream(
+        self,
+        model: str,
+        payload: Dict[str, Any],
+        budget: StreamBudget,
+        kwargs: Dict[str, Any],
+    ) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        emitted = False
+        usage = None
+        watch = Stopwatch("llm", model=model)
+        try:
+            # the slot is held for the whole stream, retries included
+            async with scheduler.slot(self.api_key, self.priority):
+                for attempt in range(settings.llm_max_retries + 1):
+                    async with await self._open(model, payload, **kwargs) as resp:
+                        if resp.status in (401, 403):
+                            detail = await resp.text()
+                            raise RuntimeError(f"OpenRouter auth/model error ({resp.status}): {detail}")
+                        resp.raise_for_status()
+                        try:
+                            async for data in iter_sse(resp.content.iter_any()):
+                                if data == b"[DONE]":
+                                    break
+                                reported = parse_usage(data)
+                                if reported is not None:
+                                    usage = reported
+                                    budget.prompt_tokens, budget.cached_tokens = usage.prompt_tokens, usage.cached_tokens
+                                    budget.cost = usage.cost
+                                delta, finish_reason = parse_chunk(data)
+                                if delta:
+                                    watch.tick()
+                                    emitted = True
+                                    budget.tokens += estimate_tokens(delta)
+                                    yield delta
+                                    if budget.max_tokens and budget.tokens >= budget.max_tokens:
+                                        # leaving the block closes the connection, which stops generation
+                                        budget.truncated = "tokens"
+                                        break
+                                if finish_reason == "length":
+                                    budget.truncated = "tokens"
+                        except (aiohttp.ClientPayloadError, aiohttp.ServerDisconnectedError):
+                            breakers.get(model).failure()
+                            # the reader already saw part of the turn; a retry would repeat it
+                            if emitted or attempt >= settings.llm_max_retries:
+                                raise
+                        else:
+                            break
+                    await self._retry_wait(attempt)
+        except asyncio.TimeoutError:
+            if not budget.timeout or loop.time() - started < budget.timeout:
+                raise
+            budget.truncated = "time"
+        except (asyncio.CancelledError, GeneratorExit):
+            # the caller went away mid-stream; closing the response cancels upstream
+            expected = budget.max_tokens or settings.turn_tokens_estimate
+            counters.inc("llm_streams_cancelled_total")
+            counters.inc("llm_tokens_streamed_before_cancel_total", budget.tokens)
+            counters.inc("llm_tokens_saved_by_cancel_total", max(0, expected - budget.tokens))
+            raise
+        finally:
+            watch.stop()
+            if usage is not None or emitted:
+                # a stream cut short has no usage report; count what was seen
+                _record_usage(model, usage or Usage(budget.prompt_tokens, 0, budget.tokens, 0.0))
+        if budget.truncated:
+            counters.inc(f"llm_streams_truncated_{budget.truncated}_total")
+
+    async def astream_hedged(
+        self,
+        models: List[str],
+        messages: List[Dict[str, str]],
+        temperature: float = 1.0,
+        budget: Optional[StreamBudget] = None,
+        hedge_after: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """Stream from ``models[0]``, racing the next model whenever the ones in
+        flight have produced no delta for ``hedge_after`` seconds or have failed.
+        The first stream to yield a delta wins and the others are cancelled."""
+        budget = budget or StreamBudget()
+        candidates = list(models)
+        racing: Dict[asyncio.Future, tuple] = {}
+        error: Optional[BaseException] = None
+        winner = None
+
+        def launch():
+            if len(candidates) < len(models):
+                counters.inc("llm_hedges_started_total")
+            b = StreamBudget(budget.max_tokens, budget.timeout)
+            agen = self.astream_messages(candidates.pop(0), messages, temperature, b)
+            racing[asyncio.ensure_future(agen.__anext__())] = (agen, b)
+
+        try:
+            launch()
+            while winner is None:
+                if not racing:
+                    if not candidates:
+                        if error is not None:
+                            raise error
+                        return
+                    launch()
+                    continue
+                timeout = hedge_after if candidates else None
+                done, _ = await asyncio.wait(racing, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                for task in done:
+                    agen, b = racing.pop(task)
                     try:
-                        event = json.loads(data)
-                        delta = event["choices"][0]["delta"].get("content")
-                        if delta:
-                            yield delta
-                    except Exception:
-                        continue
\ No newline at end of file
+                        first = task.result()
+                    except StopAsyncIteration:
+                        continue
+                    except Exception as e:
+                        # fall through to the next model in the chain
+                        error = e
+                        continue
+                    if winner is None:
+                        winner = (agen, b, first)
+                    else:
+                        await agen.aclose()
+        finally:
+            for task in racing:
+                task.cancel()
+            await asyncio.gather(*racing, return_exceptions=True)
+
+        agen, b, first = winner
+        if b.model != models[0]:
+            counters.inc("llm_hedges_won_total")
+        try:
+            yield first
+            async for delta in agen:
+                yield delta
+        finally:
+            await agen.aclose()
+            budget.model, budget.tokens, budget.truncated = b.model, b.tokens, b.truncated
+            budget.prompt_tokens, budget.cached_tokens = b.prompt_tokens, b.cached_tokens
+            budget.cost = b.cost
@@ -0,0 +1,205 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .config import settings
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counters:
+    def __init__(self):
+        self._values: Dict[Tuple[str, Labels], float] = defaultdict(float)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        self._values[(name, _labels(labels) if labels else ())] += value
+
+    def snapshot(self) -> Dict[str, float]:
+        return {name + _fmt_labels(labels): v for (name, labels), v in self._values.items()}
+
+    def render(self) -> List[str]:
+        lines: List[str] = []
+        seen = set()
+        for (name, labels), value in sorted(self._values.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+        return lines
+
+
+class Gauges:
+    def __init__(self):
+        self._values: Dict[Tuple[str, Labels], float] = {}
+
+    def set(self, name: str, value: float, **labels):
+        self._values[(name, _labels(labels) if labels else ())] = value
+
+    def snapshot(self) -> Dict[str, float]:
+        return {name + _fmt_labels(labels): v for (name, labels), v in self._values.items()}
+
+    def render(self) -> List[str]:
+        lines: List[str] = []
+        seen = set()
+        for (name, labels), value in sorted(self._values.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+        return lines
+
+
+# seconds, from a cached first token to a long turn
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histograms:
+    """Prometheus-style cumulative histograms keyed by name and labels.
+
+    ``observe`` is a bisect and two additions, cheap enough to run once per
+    streamed delta.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._le = [f'le="{b:g}"' for b in buckets] + ['le="+Inf"']
+        # per series: [count per bucket (last is +Inf)..., sum]
+        self._series: Dict[Tuple[str, Labels], List[float]] = {}
+
+    def series(self, name: str, **labels) -> List[float]:
+        """The series for ``name`` and ``labels``; hot paths look it up once
+        and pass it to ``observe_into``."""
+        key = (name, _labels(labels) if labels else ())
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+        return series
+
+    def observe_into(self, series: List[float], value: float):
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def observe(self, name: str, value: float, **labels):
+        self.observe_into(self.series(name, **labels), value)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for (name, labels), series in self._series.items():
+            count = sum(series[:-1])
+            out[name + _fmt_labels(labels)] = {
+                "count": count,
+                "sum": round(series[-1], 6),
+                "mean": round(series[-1] / count, 6) if count else 0.0,
+            }
+        return out
+
+    def render(self) -> List[str]:
+        lines: List[str] = []
+        seen = set()
+        for (name, labels), series in sorted(self._series.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            total = 0.0
+            for le, n in zip(self._le, series[:-1]):
+                total += n
+                lines.append(f"{name}_bucket{_fmt_labels(labels, le)} {total:g}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {series[-1]:.6f}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {total:g}")
+        return lines
+
+
+counters = Counters()
+gauges = Gauges()
+histograms = Histograms()
+
+
+def render_prometheus() -> str:
+    """Every counter, gauge and histogram in the Prometheus text exposition format."""
+    return "\n".join(counters.render() + gauges.render() + histograms.render()) + "\n"
+
+
+_tracer = None
+
+
+def _get_tracer():
+    global _tracer
+    if _tracer is None and settings.otel_tracing:
+        # optional: spans go wherever the process's OpenTelemetry SDK sends them
+        from opentelemetry import trace
+
+        _tracer = trace.get_tracer("ai-debate-simulator")
+    return _tracer
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[object]]:
+    """An OpenTelemetry span when OTEL_TRACING is on, otherwise nothing.
+
+    The span is not made current, so it is safe to hold open across the
+    yields of an async generator.
+    """
+    tracer = _get_tracer()
+    if tracer is None:
+        yield None
+        return
+    s = tracer.start_span(name, attributes={k: v for k, v in attributes.items() if v is not None})
+    try:
+        yield s
+    except BaseException as e:
+        s.record_exception(e)
+        raise
+    finally:
+        s.end()
+
+
+class Stopwatch:
+    """Monotonic timer for the time to first item, the gaps between items and
+    the total, recorded into ``histograms`` as ``<prefix>_ttft_seconds``,
+    ``<prefix>_inter_token_seconds`` and ``<prefix>_seconds``."""
+
+    __slots__ = ("_ttft", "_gap", "_total", "start", "last", "ttft")
+
+    def __init__(self, prefix: str, gaps: bool = True, **labels):
+        if settings.metrics_enabled:
+            self._ttft = histograms.series(f"{prefix}_ttft_seconds", **labels)
+            self._gap = histograms.series(f"{prefix}_inter_token_seconds", **labels) if gaps else None
+            self._total = histograms.series(f"{prefix}_seconds", **labels)
+        else:
+            self._ttft = self._gap = self._total = None
+        self.start = self.last = time.perf_counter()
+        self.ttft: Optional[float] = None
+
+    def tick(self):
+        if self.ttft is None:
+            self.last = time.perf_counter()
+            self.ttft = self.last - self.start
+            if self._ttft is not None:
+                histograms.observe_into(self._ttft, self.ttft)
+        elif self._gap is not None:
+            now = time.perf_counter()
+            histograms.observe_into(self._gap, now - self.last)
+            self.last = now
+
+    def stop(self) -> float:
+        elapsed = time.perf_counter() - self.start
+        if self._total is not None:
+            histograms.observe_into(self._total, elapsed)
+        return elapsed
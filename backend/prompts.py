@@ -63,4 +63,95 @@ JUDGE_TEMPLATE = """
 
     Return ONLY valid JSON in this format:
     {{"winner":"pro|con|draw","scores":{{"clarity":x,"logic":x,"evidence":x,"rebuttal":x,"civility":x}},"reasoning":str}}
-"""
\ No newline at end of file
+"""
+
+
+SYSTEM_TURN_JUDGE = """
+    You are an impartial debate judge scoring one turn at a time.
+
+    Score ONLY the latest turn on five criteria: clarity, logic, evidence, rebuttal quality, and civility (0–10 each). 
+    Use the earlier turns as context, e.g. to judge how well the latest turn rebuts the opponent. 
+    Base your judgment on reasoning strength, factual accuracy, and respectfulness — not rhetorical flair.
+
+    Return ONLY valid JSON in the following format:
+    {{"scores":{{"clarity":float,"logic":float,"evidence":float,"rebuttal":float,"civility":float}},"note":str}}
+"""
+
+TURN_JUDGE_TEMPLATE = """
+    Topic: {topic}
+
+    Earlier turns:
+    {context}
+
+    Latest turn ({role}):
+    ---{text}---
+
+    Score the latest turn using the criteria: clarity, logic, evidence, rebuttal quality, and civility (0–10 each), 
+    and add a one sentence note.
+
+    Return ONLY valid JSON in this format:
+    {{"scores":{{"clarity":x,"logic":x,"evidence":x,"rebuttal":x,"civility":x}},"note":str}}
+"""
+
+
+SYSTEM_SUMMARIZER = """
+    You keep a running summary of a structured debate for the debaters to read instead of the full transcript.
+
+    Preserve each side's main claims, the evidence they cited, and which points were rebutted or conceded. 
+    Stay neutral and factual. Do not judge who is winning.
+"""
+
+SUMMARY_TEMPLATE = """
+    Topic: {topic}
+
+    Summary so far:
+    ---{summary}---
+
+    New turns to fold into the summary:
+    {turns}
+
+    Return the updated summary of the whole debate in at most 200 words.
+
+    Return ONLY valid JSON in this format:
+    {{"summary":str}}
+"""
+
+
+# prefix-stable layout: everything that never changes goes into the system message
+STABLE_ROLE_TEMPLATE = """
+    Topic: "{topic}"
+    Persona: {persona}
+
+    Each turn, respond to the opponent's latest message with a reasoned, evidence-based argument.
+    Keep your answer <= 200 words
+    no need to add greetings or introductory phrases.
+"""
+
+STABLE_TURN_PROMPT = "Your turn as {role}."
+
+
+SYSTEM_ROUND_JUDGE = """
+    You are an impartial debate judge scoring one round of a longer debate.
+
+    Score the PRO and the CON turn of this round separately on five criteria: clarity, logic, evidence, rebuttal quality, and civility (0–10 each). 
+    Use the previous round only as context, e.g. to judge how well each turn rebuts it. 
+    Base your judgment on reasoning strength, factual accuracy, and respectfulness — not rhetorical flair.
+
+    Return ONLY valid JSON in the following format:
+    {{"pro_scores":{{"clarity":float,"logic":float,"evidence":float,"rebuttal":float,"civility":float}},"con_scores":{{...}},"note":str}}
+"""
+
+ROUND_JUDGE_TEMPLATE = """
+    Topic: {topic}
+
+    Previous round:
+    {context}
+
+    Round {round}:
+    {turns}
+
+    Score the PRO and the CON turn of round {round} (0–10 per criterion) and add a one sentence note.
+
+    Return ONLY valid JSON in this format:
+    {{"pro_scores":{{"clarity":x,"logic":x,"evidence":x,"rebuttal":x,"civility":x}},"con_scores":{{"clarity":x,"logic":x,"evidence":x,"rebuttal":x,"civility":x}},"note":str}}
+"""
@@ -0,0 +1,346 @@
+import asyncio
+import heapq
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+from .metrics import counters, gauges, histograms
+
+# statuses worth another attempt; everything else is the caller's problem
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"model {model} is failing repeatedly, not calling it for another {retry_in:.0f}s")
+        self.model = model
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.replace(".", "", 1).isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    if retry_after is not None:
+        # the server knows best; a little jitter keeps waiters from stampeding
+        return retry_after + random.uniform(0, settings.llm_retry_base)
+    # full jitter: uniform over an exponentially growing window
+    return random.uniform(0, min(settings.llm_retry_max, settings.llm_retry_base * 2 ** attempt))
+
+
+class TokenBucket:
+    """``rate`` requests/sec with bursts up to ``burst``; rate 0 only honours pauses."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    @property
+    def idle(self) -> bool:
+        now = time.monotonic()
+        self._refill(now)
+        return self.paused_until <= now and (self.rate <= 0 or self.tokens >= self.burst)
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is free; returns seconds waited."""
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            if self.paused_until > now:
+                wait = self.paused_until - now
+            elif self.rate <= 0:
+                return waited
+            elif self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            else:
+                wait = (1 - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+class RateLimiter:
+    """One bucket per API key and one per model; a call needs a token from both."""
+
+    def __init__(self, max_buckets: int = 10000):
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.max_buckets = max_buckets
+
+    def _bucket(self, kind: str, name: str) -> TokenBucket:
+        b = self._buckets.get((kind, name))
+        if b is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._prune()
+            if kind == "key":
+                b = TokenBucket(settings.llm_rate_per_key, settings.llm_burst_per_key)
+            else:
+                b = TokenBucket(settings.llm_rate_per_model, settings.llm_burst_per_model)
+            self._buckets[kind, name] = b
+        return b
+
+    def _prune(self):
+        # a full, unpaused bucket carries no state worth keeping
+        for k in [k for k, b in self._buckets.items() if b.idle]:
+            del self._buckets[k]
+
+    async def acquire(self, api_key: str, model: str) -> float:
+        waited = await self._bucket("key", api_key).acquire()
+        waited += await self._bucket("model", model).acquire()
+        if waited:
+            counters.inc("llm_throttled_total")
+            counters.inc("llm_throttle_wait_seconds_total", waited)
+        return waited
+
+    def pause(self, model: str, seconds: float):
+        self._bucket("model", model).pause(seconds)
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures, lets one probe through
+    after ``cooldown`` seconds, and closes again once a call succeeds."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._probe_at = 0.0
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.threshold <= 0 or self.state == "closed":
+            return True
+        now = time.monotonic()
+        if self.state == "open" and now - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+            self._probe_at = now
+            return True
+        # a probe that never reported back (e.g. cancelled) must not wedge the circuit
+        if self.state == "half_open" and now - self._probe_at >= self.cooldown:
+            self._probe_at = now
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.state = "closed"
+
+    def failure(self):
+        self.failures += 1
+        if self.threshold > 0 and (self.state == "half_open" or self.failures >= self.threshold):
+            if self.state != "open":
+                counters.inc("llm_circuit_trips_total")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class CircuitBreakers:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, model: str) -> CircuitBreaker:
+        b = self._breakers.get(model)
+        if b is None:
+            b = self._breakers[model] = CircuitBreaker(settings.llm_breaker_threshold, settings.llm_breaker_cooldown)
+        return b
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            model: {"state": b.state, "failures": b.failures, "retry_in": round(b.retry_in(), 1)}
+            for model, b in self._breakers.items()
+            if b.state != "closed" or b.failures
+        }
+
+
+class OverloadedError(RuntimeError):
+    """The upstream call queue is full; the request should be retried later."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"server busy ({reason}), retry in {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+PRIORITIES = ("interactive", "background")
+
+
+class _Waiter:
+    __slots__ = ("key", "priority", "future", "enqueued")
+
+    def __init__(self, key: str, priority: str, future: asyncio.Future):
+        self.key = key
+        self.priority = priority
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+class Scheduler:
+    """Admission control for upstream calls.
+
+    At most ``capacity`` calls run at once. Waiting calls are served by
+    priority first (interactive turns before judging and summaries), then
+    by weighted fair queuing across API keys: each call is stamped with a
+    virtual finish time ``max(now, key's last) + 1 / weight``, and the
+    smallest stamp goes next, so a key with a deep queue cannot hold back
+    one with a single call. Queues are bounded; a call that cannot queue,
+    or waits too long, fails with OverloadedError.
+    """
+
+    def __init__(self, capacity: int, max_queue: int, max_queue_per_key: int, weights: Dict[str, int]):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.max_queue_per_key = max_queue_per_key
+        self.weights = weights
+        self.active = 0
+        self._heap: List[Tuple[int, float, int, _Waiter]] = []
+        self._seq = 0
+        self._vtime = 0.0
+        self._finish: Dict[str, float] = {}
+        self._queued: Dict[str, int] = {}
+        self._depth = dict.fromkeys(PRIORITIES, 0)
+        # moving average of how long a call holds its slot, for Retry-After
+        self._hold = 1.0
+
+    @property
+    def queued(self) -> int:
+        return sum(self._depth.values())
+
+    def retry_after(self) -> float:
+        cap = max(1, self.capacity)
+        return max(1.0, round((self.queued / cap + 1) * self._hold))
+
+    def check(self, key: str):
+        """Fail fast, before a response has started, when ``key`` could not queue a call now."""
+        if self.capacity <= 0 or (self.active < self.capacity and not self.queued):
+            return
+        if self.queued >= self.max_queue:
+            self._reject("queue_full")
+        if self._queued.get(key, 0) >= self.max_queue_per_key:
+            self._reject("key_queue_full")
+
+    def _reject(self, reason: str):
+        counters.inc("llm_admission_rejected_total", reason=reason)
+        raise OverloadedError(reason, self.retry_after())
+
+    def _publish(self):
+        gauges.set("llm_inflight", self.active)
+        for priority, depth in self._depth.items():
+            gauges.set("llm_queue_depth", depth, priority=priority)
+        gauges.set("llm_queue_keys", len(self._queued))
+
+    def _dequeued(self, w: _Waiter):
+        self._depth[w.priority] -= 1
+        left = self._queued[w.key] - 1
+        if left:
+            self._queued[w.key] = left
+        else:
+            del self._queued[w.key]
+            if self._finish.get(w.key, 0.0) <= self._vtime:
+                # an idle key starts again from the current virtual time
+                self._finish.pop(w.key, None)
+
+    def _dispatch(self):
+        while self.active < self.capacity and self._heap:
+            _, stamp, _, w = heapq.heappop(self._heap)
+            if w.future.done():
+                # cancelled or timed out while waiting, already accounted for
+                continue
+            self._dequeued(w)
+            self._vtime = max(self._vtime, stamp)
+            self.active += 1
+            w.future.set_result(None)
+        self._publish()
+
+    def _release(self, held: float):
+        self.active -= 1
+        self._hold += 0.1 * (held - self._hold)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, key: str, priority: str = "interactive"):
+        if self.capacity <= 0:
+            yield
+            return
+
+        if self.active < self.capacity and not self.queued:
+            self.active += 1
+            self._publish()
+            waited = 0.0
+        else:
+            self.check(key)
+            w = _Waiter(key, priority, asyncio.get_running_loop().create_future())
+            stamp = max(self._vtime, self._finish.get(key, 0.0)) + 1.0 / max(1, self.weights.get(key, 1))
+            self._finish[key] = stamp
+            self._queued[key] = self._queued.get(key, 0) + 1
+            self._depth[priority] += 1
+            self._seq += 1
+            heapq.heappush(self._heap, (PRIORITIES.index(priority), stamp, self._seq, w))
+            self._publish()
+            try:
+                await asyncio.wait_for(asyncio.shield(w.future), settings.llm_queue_timeout or None)
+            except BaseException as e:
+                if w.future.done() and not w.future.cancelled():
+                    # granted a slot just as we gave up on it
+                    self._release(0.0)
+                else:
+                    w.future.cancel()
+                    self._dequeued(w)
+                    self._publish()
+                if isinstance(e, asyncio.TimeoutError):
+                    self._reject("queue_timeout")
+                raise
+            waited = time.perf_counter() - w.enqueued
+            if settings.metrics_enabled:
+                histograms.observe("llm_queue_wait_seconds", waited, priority=priority)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def snapshot(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "queued": dict(self._depth),
+            "keys_waiting": len(self._queued),
+            "retry_after": self.retry_after(),
+        }
+
+
+rate_limiter = RateLimiter()
+breakers = CircuitBreakers()
+scheduler = Scheduler(
+    settings.llm_max_concurrency,
+    settings.llm_queue_max,
+    settings.llm_queue_per_key,
+    settings.llm_key_weights,
+)
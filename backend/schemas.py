@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import List, Literal, Dict
+from dataclasses import dataclass, fields
+from operator import attrgetter
+from pydantic import BaseModel, BeforeValidator, Field
+from typing import Annotated, List, Literal, Dict, Optional
 
 class DebateConfig(BaseModel):
     open_router_api_key: str
@@ -13,14 +15,23 @@ class DebateConfig(BaseModel):
     con_temperature: float = 0.7
     judge_model: str = "nvidia/nemotron-nano-9b-v2:free"
     judge_temperature: float = 0.5
-
-
-class DebateState(BaseModel):
-    session_id: str
-    config: DebateConfig
-    history : List = []
-    status: Literal["running","judging","finished"] = "running"
-    next_role: Literal["pro","con"] = "pro"
+    judge_mode: Literal["final", "incremental", "map_reduce"] = "final"
+    # extra judge models run in parallel with judge_model; their verdicts are merged
+    judge_panel: List[str] = []
+    panel_merge: Literal["mean", "majority"] = "mean"
+    judge_deadline: Optional[float] = None
+    turn_timeout: Optional[float] = None
+    turn_max_tokens: Optional[int] = None
+    # tried in order when the role's model is slow to start or fails
+    pro_fallback_models: List[str] = []
+    con_fallback_models: List[str] = []
+    hedge_ttft: Optional[float] = None
+    # prefix_stable keeps earlier prompt bytes unchanged so provider prompt caches hit
+    prompt_layout: Literal["budgeted", "prefix_stable"] = "budgeted"
+    # parallel_openings writes both opening statements at once, neither seeing the other
+    debate_format: Literal["alternating", "parallel_openings"] = "alternating"
+    # the last round's closing statements are also written at once
+    parallel_closings: bool = False
 
 
 class JudgeResult(BaseModel):
@@ -44,3 +55,133 @@ class JudgeResult(BaseModel):
             "referring to key strengths and weaknesses in both sides’ arguments."
         )
     )
+
+
+class TurnJudgement(BaseModel):
+    scores: Dict[str, float] = Field(
+        ...,
+        description=(
+            "Numeric scores (0–10) for this single turn on each criterion: "
+            "'clarity', 'logic', 'evidence', 'rebuttal', and 'civility'."
+        )
+    )
+    note: str = Field(
+        ...,
+        description="One sentence on the main strength or weakness of this turn."
+    )
+
+
+class RoundJudgement(BaseModel):
+    pro_scores: Dict[str, float] = Field(
+        ...,
+        description="Scores (0–10) for the PRO turn of this round on each criterion."
+    )
+    con_scores: Dict[str, float] = Field(
+        ...,
+        description="Scores (0–10) for the CON turn of this round on each criterion."
+    )
+    note: str = Field(
+        ...,
+        description="One sentence on what decided this round."
+    )
+
+
+class TurnScore(TurnJudgement):
+    turn: int
+    role: Literal["pro", "con"]
+
+
+class DebateSummary(BaseModel):
+    summary: str = Field(
+        ...,
+        description="Neutral running summary of both sides' claims, evidence and rebuttals."
+    )
+
+
+@dataclass(slots=True)
+class Turn:
+    """One committed turn. A slots dataclass rather than a model: sessions
+    hold every turn in memory, and orjson encodes dataclasses natively.
+
+    The store keeps turns as positional rows, so new fields go last and
+    need a default.
+    """
+    role: Literal["pro", "con"]
+    text: str
+    model: Optional[str] = None
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    # seconds to the first delta and for the whole turn
+    ttft: Optional[float] = None
+    seconds: Optional[float] = None
+
+
+TURN_FIELDS = tuple(f.name for f in fields(Turn))
+# Turn -> tuple of its fields in declaration order
+turn_row = attrgetter(*TURN_FIELDS)
+
+
+def _turns_from_rows(value):
+    # stored rows are trusted and built positionally; dicts are validated as usual
+    if isinstance(value, list):
+        return [Turn(*t) if isinstance(t, list) else t for t in value]
+    return value
+
+
+Turns = Annotated[List[Turn], BeforeValidator(_turns_from_rows)]
+
+
+class DebateState(BaseModel):
+    session_id: str
+    config: DebateConfig
+    # wall clock when the debate was started, 0 for sessions from before it was kept
+    created_at: float = 0.0
+    history: Turns = []
+    turn_scores: List[TurnScore] = []
+    verdict: Optional[JudgeResult] = None
+    # rolling summary of history[:summary_upto], refreshed in the background
+    summary: str = ""
+    summary_upto: int = 0
+    # prefix_stable layout: history before prefix_start is replaced by prefix_summary,
+    # a summary of history[:prefix_summary_upto] frozen when the window last moved
+    prefix_start: int = 0
+    prefix_summary: str = ""
+    prefix_summary_upto: int = 0
+    # session totals: turns, turn/TTFT/judge seconds, tokens and cost
+    timings: Dict[str, float] = {}
+    status: Literal["running","judging","finished"] = "running"
+    next_role: Literal["pro","con"] = "pro"
+    # bumped by every store write; BaseStore.acas only writes over the version it read
+    version: int = 0
+
+
+class TournamentConfig(BaseModel):
+    open_router_api_key: str
+    topics: List[str]
+    pro_models: List[str]
+    # empty means every pro model also plays con
+    con_models: List[str] = []
+    judge_models: List[str] = ["nvidia/nemotron-nano-9b-v2:free"]
+    rounds: int = 2
+    repeats: int = 1
+    allow_self_play: bool = False
+    turn_timeout: Optional[float] = None
+    turn_max_tokens: Optional[int] = None
+    concurrency: int = Field(8, ge=1, description="Debates played at the same time.")
+    per_model_concurrency: int = Field(4, ge=1, description="Upstream calls in flight per model.")
+    rating: Literal["elo", "bradley_terry"] = "elo"
+
+
+class MatchResult(BaseModel):
+    index: int
+    topic: str
+    pro_model: str
+    con_model: str
+    judge_model: str
+    winner: Optional[Literal["pro", "con", "draw"]] = None
+    scores: Dict[str, float] = {}
+    reasoning: str = ""
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    history: Turns = []
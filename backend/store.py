@@ -1,25 +1,429 @@
-from .schemas import DebateState
-from typing import Optional
+import asyncio
+import heapq
+import sqlite3
+import threading
+import time
+import orjson
+from collections import OrderedDict
+from pydantic import BaseModel
+from .config import settings
+from .metrics import counters
+from .schemas import DebateState, Turn, turn_row
+from typing import Callable, Collection, Dict, List, Optional, Tuple
 
 class MemoryStore:
-    def __init__(self):
-        self._db: dict[str, DebateState] = {}
+    """LRU + TTL bounded by session count and an approximate byte budget."""
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        max_bytes: int = 256 * 1024 * 1024,
+        session_ttl: float = 3600.0,
+        finished_ttl: float = 600.0,
+    ):
+        # key -> (state, size in bytes, last access)
+        self._db: "OrderedDict[str, Tuple[DebateState, int, float]]" = OrderedDict()
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.session_ttl = session_ttl
+        self.finished_ttl = finished_ttl
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, v: DebateState, last_access: float, now: float) -> bool:
+        ttl = self.finished_ttl if v.status == "finished" else self.session_ttl
+        return now - last_access > ttl
+
+    def _drop(self, k: str):
+        _, size, _ = self._db.pop(k)
+        self.bytes -= size
     
     def get(self, k: str) -> Optional[DebateState]:
-        return self._db.get(k)
+        entry = self._db.get(k)
+        now = time.monotonic()
+        if entry is None or self._expired(entry[0], entry[2], now):
+            if entry is not None:
+                self._drop(k)
+                self.expirations += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._db[k] = (entry[0], entry[1], now)
+        self._db.move_to_end(k)
+        return entry[0]
     
     def set(self, k: str, v: DebateState):
-        self._db[k] = v
+        if k in self._db:
+            self._drop(k)
+        size = len(dumps_state(v))
+        self._db[k] = (v, size, time.monotonic())
+        self.bytes += size
+
+        while len(self._db) > 1 and (len(self._db) > self.max_sessions or self.bytes > self.max_bytes):
+            self._drop(next(iter(self._db)))
+            self.evictions += 1
+
+    def page(self, after: str, limit: int) -> Tuple[List[Tuple[str, DebateState]], Optional[str]]:
+        """Live sessions with ids after ``after`` in id order; no LRU or hit accounting."""
+        keys = heapq.nsmallest(limit, (k for k in self._db if k > after))
+        now = time.monotonic()
+        items = []
+        for k in keys:
+            v, _, last = self._db[k]
+            if not self._expired(v, last, now):
+                items.append((k, v))
+        return items, keys[-1] if len(keys) == limit else None
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        expired = [k for k, (v, _, last) in self._db.items() if self._expired(v, last, now)]
+        for k in expired:
+            self._drop(k)
+        self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._db),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def _encode(obj):
+    # turns become positional rows, models hand orjson their fields, orjson does the rest
+    if isinstance(obj, Turn):
+        return turn_row(obj)
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    raise TypeError
 
 
-class Store:
+def dumps_state(v: DebateState) -> bytes:
+    return orjson.dumps(v, default=_encode, option=orjson.OPT_PASSTHROUGH_DATACLASS)
+
+
+def loads_state(raw: bytes) -> DebateState:
+    # orjson parses text-heavy states faster than model_validate_json
+    return DebateState.model_validate(orjson.loads(raw))
+
+
+class BaseStore:
+    """Async session store; subclasses pick where states live."""
+
     def __init__(self):
-        self.memory = MemoryStore()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def _ttl(self, v: DebateState) -> float:
+        return settings.store_finished_ttl if v.status == "finished" else settings.store_session_ttl
+
+    async def aget(self, k: str) -> Optional[DebateState]:
+        raise NotImplementedError
+
+    async def aset(self, k: str, v: DebateState):
+        """Write ``v`` whatever is stored; for new sessions and single-owner
+        writes. Changes to a live session go through ``aupdate``."""
+        raise NotImplementedError
+
+    async def acas(self, k: str, v: DebateState) -> bool:
+        """Write ``v`` only if the stored state is still at ``v.version``, and
+        bump the version. False if another writer got there first or the
+        session is gone."""
+        raise NotImplementedError
+
+    async def aupdate(self, k: str, fn: Callable[[DebateState], bool]) -> Optional[DebateState]:
+        """Read-modify-write ``k`` without losing a concurrent write.
+
+        ``fn`` edits the latest state in place and returns False to leave it
+        unwritten. After a version conflict it is applied again to a fresh
+        read, so it must only touch the fields it means to change. Returns
+        the state written, or None if the session is gone or ``fn`` declined.
+        """
+        while True:
+            v = await self.aget(k)
+            if v is None or not fn(v):
+                return None
+            if await self.acas(k, v):
+                return v
+            counters.inc("store_write_conflicts_total")
+
+    async def astats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    async def asweep(self) -> int:
+        return 0
+
+    async def apage(
+        self, cursor: str = "", limit: int = 100, statuses: Collection[str] = ()
+    ) -> Tuple[List[Tuple[str, DebateState]], Optional[str]]:
+        """One page of a walk over every live session, for bulk export.
+
+        Returns ``(cursor, state)`` pairs and the cursor of the next page,
+        None at the end. Resuming from an item's cursor continues after that
+        item. ``statuses`` is a hint; backends that cannot filter by it in
+        the query return every status.
+        """
+        raise NotImplementedError
+
+    async def aclose(self):
+        await self.stop_sweeper()
+
+    async def _sweep_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.asweep()
+
+    def start_sweeper(self, interval: float | None = None):
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(
+                self._sweep_forever(interval or settings.store_sweep_interval)
+            )
+
+    async def stop_sweeper(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+
+class Store(BaseStore):
+    def __init__(self):
+        super().__init__()
+        self.memory = MemoryStore(
+            max_sessions=settings.store_max_sessions,
+            max_bytes=settings.store_max_bytes,
+            session_ttl=settings.store_session_ttl,
+            finished_ttl=settings.store_finished_ttl,
+        )
 
     async def aget(self, k: str) -> Optional[DebateState]:
         return self.memory.get(k)
 
     async def aset(self, k: str, v: DebateState):
+        v.version += 1
+        self.memory.set(k, v)
+
+    async def acas(self, k: str, v: DebateState) -> bool:
+        # one process and no await between the check and the write: atomic as is
+        current = self.memory.get(k)
+        if current is None or current.version != v.version:
+            return False
+        v.version += 1
         self.memory.set(k, v)
+        return True
+
+    async def astats(self) -> Dict[str, int]:
+        return self.memory.stats()
+
+    async def asweep(self) -> int:
+        return self.memory.sweep()
+
+    async def apage(self, cursor: str = "", limit: int = 100, statuses: Collection[str] = ()):
+        return self.memory.page(cursor, limit)
+
+
+class SQLiteStore(BaseStore):
+    """SQLite in WAL mode, safe to share between uvicorn workers on one host."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, data BLOB NOT NULL, status TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "version INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")]
+            if "version" not in columns:
+                # databases from before compare-and-set
+                self._conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+
+    def get(self, k: str) -> Optional[DebateState]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, version FROM sessions WHERE id = ? AND expires_at > ?", (k, time.time())
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        v = loads_state(row[0])
+        # the column is authoritative, the copy inside data may predate it
+        v.version = row[1]
+        return v
+
+    def set(self, k: str, v: DebateState):
+        raw = dumps_state(v)
+        with self._lock:
+            v.version = self._conn.execute(
+                "INSERT INTO sessions (id, data, status, expires_at, version) VALUES (?, ?, ?, ?, 1) "
+                "ON CONFLICT (id) DO UPDATE SET data = excluded.data, status = excluded.status, "
+                "expires_at = excluded.expires_at, version = version + 1 RETURNING version",
+                (k, raw, v.status, time.time() + self._ttl(v)),
+            ).fetchone()[0]
+
+    def cas(self, k: str, v: DebateState) -> bool:
+        raw = dumps_state(v.model_copy(update={"version": v.version + 1}))
+        with self._lock:
+            n = self._conn.execute(
+                "UPDATE sessions SET data = ?, status = ?, expires_at = ?, version = version + 1 "
+                "WHERE id = ? AND version = ? AND expires_at > ?",
+                (raw, v.status, time.time() + self._ttl(v), k, v.version, time.time()),
+            ).rowcount
+        if n:
+            v.version += 1
+        return n == 1
+
+    def page(self, after: str, limit: int, statuses: Collection[str] = ()):
+        sql = "SELECT id, data FROM sessions WHERE id > ? AND expires_at > ?"
+        params: list = [after, time.time()]
+        if statuses:
+            sql += f" AND status IN ({','.join('?' * len(statuses))})"
+            params += list(statuses)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY id LIMIT ?", (*params, limit)).fetchall()
+        items = [(k, loads_state(raw)) for k, raw in rows]
+        return items, rows[-1][0] if len(rows) == limit else None
+
+    def sweep(self) -> int:
+        with self._lock:
+            n = self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+        self.expirations += n
+        return n
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            sessions, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM sessions"
+            ).fetchone()
+        return {
+            "sessions": sessions,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": 0,
+            "expirations": self.expirations,
+        }
+
+    async def aget(self, k: str) -> Optional[DebateState]:
+        return await asyncio.to_thread(self.get, k)
+
+    async def aset(self, k: str, v: DebateState):
+        await asyncio.to_thread(self.set, k, v)
+
+    async def acas(self, k: str, v: DebateState) -> bool:
+        return await asyncio.to_thread(self.cas, k, v)
+
+    async def astats(self) -> Dict[str, int]:
+        return await asyncio.to_thread(self.stats)
+
+    async def asweep(self) -> int:
+        return await asyncio.to_thread(self.sweep)
+
+    async def apage(self, cursor: str = "", limit: int = 100, statuses: Collection[str] = ()):
+        return await asyncio.to_thread(self.page, cursor, limit, statuses)
+
+    async def aclose(self):
+        await super().aclose()
+        with self._lock:
+            self._conn.close()
+
+
+class RedisStore(BaseStore):
+    """Any Redis-protocol server; expiry is left to the server via EX."""
+
+    def __init__(self, url: str, prefix: str = "debate:"):
+        super().__init__()
+        import redis.asyncio as redis
+
+        # RESP2 keeps this working against any Redis-protocol server
+        self._redis = redis.from_url(url, protocol=2)
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def aget(self, k: str) -> Optional[DebateState]:
+        raw = await self._redis.get(self.prefix + k)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return loads_state(raw)
+
+    async def aset(self, k: str, v: DebateState):
+        v.version += 1
+        await self._redis.set(self.prefix + k, dumps_state(v), ex=max(1, int(self._ttl(v))))
+
+    async def acas(self, k: str, v: DebateState) -> bool:
+        from redis.exceptions import WatchError
+
+        key = self.prefix + k
+        raw = dumps_state(v.model_copy(update={"version": v.version + 1}))
+        async with self._redis.pipeline() as pipe:
+            # WATCH makes EXEC fail if anyone writes the key after we read its version
+            await pipe.watch(key)
+            current = await pipe.get(key)
+            if current is None or orjson.loads(current).get("version", 0) != v.version:
+                return False
+            pipe.multi()
+            pipe.set(key, raw, ex=max(1, int(self._ttl(v))))
+            try:
+                await pipe.execute()
+            except WatchError:
+                return False
+        v.version += 1
+        return True
+
+    async def apage(self, cursor: str = "", limit: int = 100, statuses: Collection[str] = ()):
+        # SCAN cursors mark pages, not keys: resuming from inside a page repeats
+        # the part of it already seen, so export from Redis is at-least-once
+        start = cursor or "0"
+        nxt, keys = await self._redis.scan(int(start), match=self.prefix + "*", count=limit)
+        raws = await self._redis.mget(keys) if keys else []
+        states = await asyncio.to_thread(lambda: [loads_state(r) for r in raws if r is not None])
+        done = int(nxt) == 0
+        items = [(start, v) for v in states]
+        if items and not done:
+            items[-1] = (str(nxt), items[-1][1])
+        return items, None if done else str(nxt)
+
+    async def astats(self) -> Dict[str, int]:
+        return {
+            "sessions": await self._redis.dbsize(),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def aclose(self):
+        await super().aclose()
+        await self._redis.aclose()
+
+
+def make_store(backend: str | None = None) -> BaseStore:
+    backend = backend or settings.store_backend
+    if backend == "memory":
+        return Store()
+    if backend == "sqlite":
+        return SQLiteStore(settings.store_sqlite_path)
+    if backend == "redis":
+        return RedisStore(settings.store_redis_url)
+    raise ValueError(f"unknown STORE_BACKEND: {backend}")
 
-store = Store()
\ No newline at end of file
+store = make_store()
@@ -0,0 +1,307 @@
+import asyncio
+import orjson
+from typing import Any, AsyncIterator, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class SSEParser:
+    """Incremental server-sent-events parser.
+
+    Feed raw byte chunks as they arrive; complete events come out as their
+    ``data`` payloads, however the frames were split across chunks.
+    """
+
+    def __init__(self):
+        self._buf = b""
+        self._data: List[bytes] = []
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        lines = (self._buf + chunk).split(b"\n") if self._buf else chunk.split(b"\n")
+        # the last piece is an unterminated line, kept for the next chunk
+        self._buf = lines.pop()
+        for line in lines:
+            if line.endswith(b"\r"):
+                line = line[:-1]
+
+            if not line:
+                # blank line dispatches the event
+                if self._data:
+                    yield b"\n".join(self._data)
+                    self._data = []
+            elif line.startswith(b"data:"):
+                value = line[5:]
+                self._data.append(value[1:] if value.startswith(b" ") else value)
+            # comments (": OPENROUTER PROCESSING") and other fields are ignored
+
+    def flush(self) -> Iterator[bytes]:
+        if self._buf:
+            yield from self.feed(b"\n")
+        if self._data:
+            yield b"\n".join(self._data)
+            self._data = []
+
+
+async def iter_sse(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    parser = SSEParser()
+    async for chunk in chunks:
+        for data in parser.feed(chunk):
+            yield data
+    for data in parser.flush():
+        yield data
+
+
+_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JSONEventParser:
+    """Incremental parser for a JSON document streamed in arbitrary pieces.
+
+    ``feed`` yields ``("text", path, chunk)`` while a string value is still
+    arriving and ``("value", path, value)`` once any scalar is complete.
+    ``path`` is the tuple of keys (or array indexes) leading to the value,
+    e.g. ``("scores", "logic")``.
+    """
+
+    def __init__(self):
+        # one [kind, current key or index, expecting a key] per open container
+        self._stack: List[list] = []
+        self._str: Optional[List[str]] = None
+        self._str_is_key = False
+        self._esc: Optional[str] = None
+        # a \uD800-\uDBFF escape waiting for the low half of its surrogate pair
+        self._high: Optional[int] = None
+        self._sent = 0
+        self._scalar: Optional[List[str]] = None
+
+    def _path(self) -> tuple:
+        return tuple(frame[1] for frame in self._stack)
+
+    def feed(self, chunk: str) -> Iterator[tuple]:
+        for ch in chunk:
+            if self._str is not None:
+                if self._esc is not None:
+                    self._esc += ch
+                    if self._esc[0] == "u":
+                        if len(self._esc) < 5:
+                            continue
+                        self._code_unit(self._esc[1:])
+                    else:
+                        self._flush_high()
+                        self._str.append(_ESCAPES.get(ch, ch))
+                    self._esc = None
+                elif ch == "\\":
+                    self._esc = ""
+                elif ch == '"':
+                    yield from self._end_string()
+                else:
+                    if self._high is not None:
+                        self._flush_high()
+                    self._str.append(ch)
+                continue
+
+            if self._scalar is not None:
+                if ch not in ",}] \t\r\n":
+                    self._scalar.append(ch)
+                    continue
+                try:
+                    yield ("value", self._path(), orjson.loads("".join(self._scalar)))
+                except orjson.JSONDecodeError:
+                    # a malformed literal; the final validation will reject the document
+                    pass
+                self._scalar = None
+
+            if not self._stack and ch not in "{[":
+                # prose around the document, e.g. "Verdict: {...}", has no path to report
+                continue
+            if ch == "{":
+                self._stack.append(["o", None, True])
+            elif ch == "[":
+                self._stack.append(["a", 0, False])
+            elif ch in "}]":
+                self._stack.pop()
+            elif ch == '"':
+                self._str = []
+                self._sent = 0
+                self._str_is_key = self._stack[-1][2]
+            elif ch == ":":
+                self._stack[-1][2] = False
+            elif ch == ",":
+                if self._stack[-1][0] == "a":
+                    self._stack[-1][1] += 1
+                else:
+                    self._stack[-1][2] = True
+            elif ch not in " \t\r\n":
+                self._scalar = [ch]
+
+        # whatever part of a string value arrived in this chunk goes out now
+        if self._str is not None and not self._str_is_key and len(self._str) > self._sent:
+            yield ("text", self._path(), "".join(self._str[self._sent:]))
+            self._sent = len(self._str)
+
+    def _code_unit(self, hex_digits: str):
+        # characters outside the BMP arrive as two escapes, e.g. "\ud83d\ude00"
+        try:
+            code = int(hex_digits, 16)
+        except ValueError:
+            code = 0xFFFD
+        if 0xDC00 <= code <= 0xDFFF and self._high is not None:
+            self._str.append(chr(0x10000 + ((self._high - 0xD800) << 10) + (code - 0xDC00)))
+            self._high = None
+            return
+        self._flush_high()
+        if 0xD800 <= code <= 0xDBFF:
+            self._high = code
+        else:
+            # a lone low surrogate cannot be encoded as UTF-8
+            self._str.append("\ufffd" if 0xDC00 <= code <= 0xDFFF else chr(code))
+
+    def _flush_high(self):
+        if self._high is not None:
+            self._str.append("\ufffd")
+            self._high = None
+
+    def _end_string(self) -> Iterator[tuple]:
+        self._flush_high()
+        text = "".join(self._str)
+        if self._str_is_key:
+            self._stack[-1][1] = text
+        else:
+            if len(self._str) > self._sent:
+                yield ("text", self._path(), text[self._sent:])
+            yield ("value", self._path(), text)
+        self._str = None
+
+
+def parse_chunk(data: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """(delta content, finish_reason) of one streamed completion chunk."""
+    try:
+        choice = orjson.loads(data)["choices"][0]
+        return choice.get("delta", {}).get("content"), choice.get("finish_reason")
+    except (orjson.JSONDecodeError, KeyError, IndexError, TypeError, AttributeError):
+        return None, None
+
+
+class Usage(NamedTuple):
+    prompt_tokens: int
+    cached_tokens: int
+    completion_tokens: int
+    # USD, as reported by OpenRouter's usage accounting
+    cost: float
+
+
+def usage_from(usage: Optional[dict]) -> Optional[Usage]:
+    if not usage:
+        return None
+    details = usage.get("prompt_tokens_details") or {}
+    return Usage(
+        int(usage.get("prompt_tokens") or 0),
+        int(details.get("cached_tokens") or 0),
+        int(usage.get("completion_tokens") or 0),
+        float(usage.get("cost") or 0.0),
+    )
+
+
+def parse_usage(data: bytes) -> Optional[Usage]:
+    """Token counts and cost from a chunk carrying ``usage``, if any."""
+    # only the last chunk has usage; skip the second parse for every other one
+    if b'"usage"' not in data:
+        return None
+    try:
+        return usage_from(orjson.loads(data).get("usage"))
+    except (orjson.JSONDecodeError, AttributeError, TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text
+    return (len(text) + 3) // 4
+
+
+async def coalesce_deltas(
+    deltas: AsyncIterator[str],
+    window: float,
+    max_chars: int = 512,
+) -> AsyncIterator[str]:
+    """Batch deltas that arrive within ``window`` seconds of the first one
+    (or until ``max_chars``) into a single delta."""
+    if window <= 0:
+        async for delta in deltas:
+            yield delta
+        return
+
+    loop = asyncio.get_running_loop()
+    buf: List[str] = []
+    size = 0
+    done = False
+    error: BaseException | None = None
+    ready = asyncio.Event()
+    timer: asyncio.TimerHandle | None = None
+
+    # one reader task and one timer per batch, nothing per delta
+    async def pump():
+        nonlocal size, done, error, timer
+        try:
+            async for delta in deltas:
+                if not buf:
+                    timer = loop.call_later(window, ready.set)
+                buf.append(delta)
+                size += len(delta)
+                if size >= max_chars:
+                    ready.set()
+        except Exception as e:
+            error = e
+        finally:
+            done = True
+            ready.set()
+
+    reader = asyncio.create_task(pump())
+    try:
+        while True:
+            await ready.wait()
+            ready.clear()
+            if timer is not None:
+                timer.cancel()
+                timer = None
+            if buf:
+                out = "".join(buf)
+                buf.clear()
+                size = 0
+                yield out
+            if done and not buf:
+                break
+        if error is not None:
+            raise error
+    finally:
+        if timer is not None:
+            timer.cancel()
+        reader.cancel()
+
+
+async def merge_streams(*streams: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """Items from several async iterators in the order they are produced.
+    The first error from any of them is raised and the rest are cancelled."""
+    queue: "asyncio.Queue[Tuple[bool, Any]]" = asyncio.Queue()
+
+    async def pump(stream: AsyncIterator[Any]):
+        try:
+            async for item in stream:
+                queue.put_nowait((True, item))
+        except Exception as e:
+            queue.put_nowait((False, e))
+        else:
+            queue.put_nowait((False, None))
+
+    tasks = [asyncio.create_task(pump(s)) for s in streams]
+    try:
+        live = len(tasks)
+        while live:
+            ok, item = await queue.get()
+            if ok:
+                yield item
+            elif item is None:
+                live -= 1
+            else:
+                raise item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
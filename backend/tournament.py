@@ -0,0 +1,353 @@
+"""Batch engine: play many debates across a model matrix and rate the models.
+
+    python -m backend.tournament --topic "Should AI be regulated?" \\
+        --models model-a model-b model-c --judge-models judge-x --out results.jsonl
+"""
+import argparse
+import asyncio
+import itertools
+import math
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Literal, Optional, Tuple
+
+import orjson
+
+from .config import settings
+from .debate import (
+    astream_turn_text, judge, record_prefix_window, record_turn_timing, schedule_summary_refresh, turn_record,
+)
+from .http_pool import http_pool
+from .llm_client import StreamBudget
+from .schemas import DebateConfig, DebateState, JudgeResult, MatchResult, TournamentConfig
+
+
+def plan_matches(cfg: TournamentConfig) -> List[DebateConfig]:
+    con_models = cfg.con_models or cfg.pro_models
+    matches = []
+    for topic, pro, con, judge_model in itertools.product(
+        cfg.topics, cfg.pro_models, con_models, cfg.judge_models
+    ):
+        if pro == con and not cfg.allow_self_play:
+            continue
+        for _ in range(cfg.repeats):
+            matches.append(DebateConfig(
+                open_router_api_key=cfg.open_router_api_key,
+                topic=topic,
+                rounds=cfg.rounds,
+                pro_model=pro,
+                con_model=con,
+                judge_model=judge_model,
+                turn_timeout=cfg.turn_timeout,
+                turn_max_tokens=cfg.turn_max_tokens,
+            ))
+    return matches
+
+
+# --------------------------------------------------------
+# Ratings
+# --------------------------------------------------------
+
+def _outcomes(results: List[MatchResult]) -> List[Tuple[str, str, float]]:
+    """(pro model, con model, pro's score) for every judged match between two models."""
+    points = {"pro": 1.0, "draw": 0.5, "con": 0.0}
+    return [
+        (r.pro_model, r.con_model, points[r.winner])
+        for r in sorted(results, key=lambda r: r.index)
+        if r.winner is not None and r.pro_model != r.con_model
+    ]
+
+
+def elo_ratings(results: List[MatchResult], k: float = 16.0, base: float = 1500.0) -> Dict[str, float]:
+    ratings: Dict[str, float] = defaultdict(lambda: base)
+    # replay in match order so the same results always give the same table
+    for a, b, score in _outcomes(results):
+        expected = 1.0 / (1.0 + 10 ** ((ratings[b] - ratings[a]) / 400))
+        ratings[a] += k * (score - expected)
+        ratings[b] -= k * (score - expected)
+    return dict(ratings)
+
+
+def bradley_terry_ratings(results: List[MatchResult], iters: int = 200, base: float = 1500.0) -> Dict[str, float]:
+    wins: Dict[str, float] = defaultdict(float)
+    games: Dict[Tuple[str, str], float] = defaultdict(float)
+    for a, b, score in _outcomes(results):
+        wins[a] += score
+        wins[b] += 1.0 - score
+        games[a, b] += 1
+        games[b, a] += 1
+    # one virtual draw per pairing keeps a model that never won off zero
+    for a, b in list(games):
+        wins[a] += 0.5
+        games[a, b] += 1
+
+    models = sorted(wins)
+    strength = {m: 1.0 for m in models}
+    for _ in range(iters):
+        # minorization-maximization update (Hunter, 2004)
+        new = {}
+        for m in models:
+            denom = sum(n / (strength[m] + strength[o]) for (a, o), n in games.items() if a == m)
+            new[m] = wins[m] / denom if denom else strength[m]
+        norm = math.exp(sum(math.log(v) for v in new.values()) / len(new)) if new else 1.0
+        strength = {m: v / norm for m, v in new.items()}
+
+    # report on the Elo scale so both methods read the same way
+    return {m: base + 400 * math.log10(s) for m, s in strength.items()}
+
+
+def compute_ratings(results: List[MatchResult], method: Literal["elo", "bradley_terry"] = "elo") -> Dict[str, float]:
+    ratings = bradley_terry_ratings(results) if method == "bradley_terry" else elo_ratings(results)
+    return {m: round(r, 1) for m, r in sorted(ratings.items(), key=lambda kv: -kv[1])}
+
+
+# --------------------------------------------------------
+# Engine
+# --------------------------------------------------------
+
+@asynccontextmanager
+async def _no_limit(model: str):
+    yield
+
+
+async def play_debate(state: DebateState, limit=_no_limit) -> JudgeResult:
+    """Run every turn of a debate and judge it, without the session store or event log."""
+    cfg = state.config
+    while len(state.history) < cfg.rounds * 2:
+        role = state.next_role
+        model = cfg.pro_model if role == "pro" else cfg.con_model
+        budget = StreamBudget(cfg.turn_max_tokens, cfg.turn_timeout)
+        async with limit(model):
+            # batch debates yield to people watching a debate live
+            parts = [delta async for delta in astream_turn_text(state, role, budget, priority="background")]
+        # an empty turn is kept so a silent model cannot stall the batch
+        state.history.append(turn_record(role, "".join(parts).strip(), budget))
+        record_turn_timing(state, budget)
+        record_prefix_window(state, budget)
+        state.next_role = "con" if role == "pro" else "pro"
+        # the summary call counts against its model's limit like any other
+        schedule_summary_refresh(state, limit=limit)
+
+    async with limit(cfg.judge_model):
+        return await judge(state)
+
+
+class Tournament:
+    def __init__(self, cfg: TournamentConfig, out_path: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        self.cfg = cfg
+        self.matches = plan_matches(cfg)
+        self.results: List[MatchResult] = []
+        self.failed = 0
+        self.running = 0
+        self.status: Literal["pending", "running", "finished", "cancelled"] = "pending"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._out_path = out_path
+        self._slots = asyncio.Semaphore(cfg.concurrency)
+        self._model_slots: Dict[str, asyncio.Semaphore] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def _model_limit(self, model: str):
+        # one budget per model id, shared by its pro, con and judge calls
+        sem = self._model_slots.get(model)
+        if sem is None:
+            sem = self._model_slots[model] = asyncio.Semaphore(self.cfg.per_model_concurrency)
+        async with sem:
+            yield
+
+    async def _play(self, index: int, cfg: DebateConfig, out) -> MatchResult:
+        async with self._slots:
+            self.running += 1
+            started = time.perf_counter()
+            state = DebateState(session_id=f"{self.id}:{index}", config=cfg)
+            result = MatchResult(
+                index=index,
+                topic=cfg.topic,
+                pro_model=cfg.pro_model,
+                con_model=cfg.con_model,
+                judge_model=cfg.judge_model,
+            )
+            try:
+                verdict = await play_debate(state, self._model_limit)
+                result.winner = verdict.winner
+                result.scores = verdict.scores
+                result.reasoning = verdict.reasoning
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # one broken model or topic must not sink the whole batch
+                result.error = f"{type(e).__name__}: {e}"
+                self.failed += 1
+            finally:
+                self.running -= 1
+            result.elapsed = round(time.perf_counter() - started, 3)
+            result.history = state.history
+
+        self.results.append(result)
+        if out is not None:
+            out.write(orjson.dumps(result.model_dump()) + b"\n")
+            out.flush()
+        return result
+
+    async def run(self) -> List[MatchResult]:
+        self.status = "running"
+        self.started_at = time.time()
+        out = open(self._out_path, "ab") if self._out_path else None
+        try:
+            await asyncio.gather(*(self._play(i, m, out) for i, m in enumerate(self.matches)))
+            self.status = "finished"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+        finally:
+            self.finished_at = time.time()
+            if out is not None:
+                out.close()
+        return self.results
+
+    def start(self) -> asyncio.Task:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+            # a cancelled job has no one awaiting it; mark the exception as seen
+            self._task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return self._task
+
+    def cancel(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("finished", "cancelled")
+
+    def ratings(self) -> Dict[str, float]:
+        return compute_ratings(self.results, self.cfg.rating)
+
+    def progress(self) -> dict:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "tournament_id": self.id,
+            "status": self.status,
+            "total": len(self.matches),
+            "completed": len(self.results),
+            "failed": self.failed,
+            "running": self.running,
+            "elapsed": round(elapsed, 2),
+            "debates_per_min": round(len(self.results) / elapsed * 60, 2) if elapsed else 0.0,
+            "rating": self.cfg.rating,
+            "ratings": self.ratings(),
+        }
+
+
+class Tournaments:
+    """Job registry for the API; finished jobs beyond ``max_jobs`` are dropped oldest first."""
+
+    def __init__(self, max_jobs: int):
+        self._jobs: "OrderedDict[str, Tournament]" = OrderedDict()
+        self.max_jobs = max_jobs
+
+    def start(self, cfg: TournamentConfig) -> Tournament:
+        t = Tournament(cfg)
+        self._jobs[t.id] = t
+        t.start()
+        for tid in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[tid].done:
+                del self._jobs[tid]
+        return t
+
+    def get(self, tournament_id: str) -> Optional[Tournament]:
+        return self._jobs.get(tournament_id)
+
+    async def aclose(self):
+        running = [t for t in self._jobs.values() if not t.done]
+        for t in running:
+            t.cancel()
+        await asyncio.gather(*(t._task for t in running if t._task), return_exceptions=True)
+
+
+tournaments = Tournaments(settings.tournament_max_jobs)
+
+
+# --------------------------------------------------------
+# CLI
+# --------------------------------------------------------
+
+async def main_async(args):
+    topics = list(args.topic)
+    if args.topics_file:
+        with open(args.topics_file) as f:
+            topics += [line.strip() for line in f if line.strip()]
+    if not topics:
+        sys.exit("give at least one --topic or a --topics-file")
+
+    cfg = TournamentConfig(
+        open_router_api_key=args.api_key,
+        topics=topics,
+        pro_models=args.models,
+        con_models=args.con_models or [],
+        judge_models=args.judge_models,
+        rounds=args.rounds,
+        repeats=args.repeats,
+        allow_self_play=args.self_play,
+        turn_timeout=args.turn_timeout,
+        turn_max_tokens=args.turn_max_tokens,
+        concurrency=args.concurrency,
+        per_model_concurrency=args.per_model,
+        rating=args.rating,
+    )
+    t = Tournament(cfg, out_path=args.out)
+    print(f"{len(t.matches)} debates, writing results to {args.out}", file=sys.stderr)
+
+    async def report():
+        while True:
+            await asyncio.sleep(args.progress_every)
+            p = t.progress()
+            print(f"  {p['completed']}/{p['total']} done, {p['failed']} failed, "
+                  f"{p['running']} running, {p['debates_per_min']} debates/min", file=sys.stderr)
+
+    await http_pool.start()
+    reporter = asyncio.create_task(report())
+    try:
+        await t.run()
+    finally:
+        reporter.cancel()
+        await http_pool.close()
+
+    p = t.progress()
+    print(f"{p['completed']} debates in {p['elapsed']}s ({p['failed']} failed)")
+    for rank, (model, rating) in enumerate(p["ratings"].items(), 1):
+        print(f"{rank:>3}. {rating:>7.1f}  {model}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a debate tournament across a model matrix")
+    parser.add_argument("--topic", action="append", default=[], help="may be repeated")
+    parser.add_argument("--topics-file", help="one topic per line")
+    parser.add_argument("--models", nargs="+", required=True, help="pro models (and con models unless --con-models)")
+    parser.add_argument("--con-models", nargs="+")
+    parser.add_argument("--judge-models", nargs="+", default=["nvidia/nemotron-nano-9b-v2:free"])
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--self-play", action="store_true")
+    parser.add_argument("--turn-timeout", type=float)
+    parser.add_argument("--turn-max-tokens", type=int)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--per-model", type=int, default=4)
+    parser.add_argument("--rating", choices=["elo", "bradley_terry"], default="elo")
+    parser.add_argument("--out", default="tournament.jsonl")
+    parser.add_argument("--api-key", default=os.getenv("OPENROUTER_API_KEY", ""))
+    parser.add_argument("--progress-every", type=float, default=10.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
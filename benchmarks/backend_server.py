@@ -0,0 +1,131 @@
+import asyncio
+import os
+import socket
+import sys
+
+import uvicorn
+
+
+class BackendServer:
+    """Serves backend.app with uvicorn on an ephemeral port inside the current event loop."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        from backend.app import app
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        self.host = host
+        self.port = port
+        self._task: asyncio.Task | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def __aenter__(self) -> "BackendServer":
+        self._task = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            if self._task.done():
+                self._task.result()
+            await asyncio.sleep(0.01)
+        self.port = self.server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.should_exit = True
+        await self._task
+
+
+class BackendProcess:
+    """Serves backend.app from a separate uvicorn process, so load generated
+    by the benchmark does not share an event loop with the server."""
+
+    def __init__(
+        self, env: dict | None = None, host: str = "127.0.0.1", port: int = 8765, workers: int = 1,
+        sndbuf: int | None = None,
+    ):
+        self.env = env or {}
+        self.host = host
+        self.port = port
+        self.workers = workers
+        # send buffer of every accepted connection; on loopback the kernel
+        # otherwise grows it to megabytes, hiding a slow client from the server
+        self.sndbuf = sndbuf
+        self._proc: asyncio.subprocess.Process | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def pid(self) -> int:
+        return self._proc.pid
+
+    def pids(self) -> list[int]:
+        """The server process and, with several workers, every process under it."""
+        out, todo = [], [self.pid]
+        while todo:
+            pid = todo.pop()
+            out.append(pid)
+            try:
+                with open(f"/proc/{pid}/task/{pid}/children") as f:
+                    todo.extend(int(c) for c in f.read().split())
+            except OSError:
+                pass
+        return out
+
+    def cpu_seconds(self) -> float | None:
+        """User plus system CPU of the server's processes, None without /proc."""
+        total, found = 0.0, False
+        for pid in self.pids():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            total += (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+            found = True
+        return total if found else None
+
+    def rss_bytes(self) -> int | None:
+        """Resident memory of the server's processes, None without /proc."""
+        total, found = 0, False
+        for pid in self.pids():
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            total += int(line.split()[1]) * 1024
+                            found = True
+                            break
+            except OSError:
+                continue
+        return total if found else None
+
+    async def __aenter__(self) -> "BackendProcess":
+        bind, fds, listener = ["--host", self.host, "--port", str(self.port)], (), None
+        if self.sndbuf:
+            # accepted sockets inherit SO_SNDBUF from the listening one
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf)
+            listener.bind((self.host, self.port))
+            bind, fds = ["--fd", str(listener.fileno())], (listener.fileno(),)
+        self._proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "uvicorn", "backend.app:app", *bind,
+            "--workers", str(self.workers), "--log-level", "warning",
+            env={**os.environ, **self.env}, pass_fds=fds,
+        )
+        if listener is not None:
+            listener.close()
+        for _ in range(200):
+            try:
+                _, writer = await asyncio.open_connection(self.host, self.port)
+                writer.close()
+                return self
+            except OSError:
+                await asyncio.sleep(0.05)
+        raise RuntimeError("backend did not start")
+
+    async def __aexit__(self, *exc):
+        self._proc.terminate()
+        await self._proc.wait()
@@ -0,0 +1,93 @@
+"""Prompt tokens and TTFT per turn as debates get longer: fixed 6-turn slice vs token-budgeted context.
+
+    python -m benchmarks.bench_context --rounds 2 4 8 16 --turn-tokens 260
+
+The mock charges prefill time per prompt token, so TTFT follows prompt size
+the way a real provider's does.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Literal
+
+from backend import debate
+from backend.config import settings
+from backend.http_pool import http_pool
+from backend.llm_client import StreamBudget
+from backend.prompts import CON_TEMPLATE, PRO_TEMPLATE, SYSTEM_CON, SYSTEM_PRO
+from backend.schemas import DebateConfig, DebateState, Turn
+from .mock_openrouter import MockConfig, MockServer
+
+
+def _legacy_messages(state: DebateState, role: Literal["pro", "con"], max_turns: int = 6) -> List[dict]:
+    # the builder before token budgeting, kept here for comparison
+    msgs: List[dict] = [{"role": "system", "content": SYSTEM_PRO if role == "pro" else SYSTEM_CON}]
+    for t in state.history[-max_turns:]:
+        speaker = "assistant" if t.role == role else "user"
+        msgs.append({"role": speaker, "content": f"{t.role.upper()}: {t.text}"})
+    opponent_last = next((t.text for t in reversed(state.history) if t.role != role), None)
+    template = PRO_TEMPLATE if role == "pro" else CON_TEMPLATE
+    msgs.append({"role": "user", "content": template.format(
+        topic=state.config.topic,
+        persona=state.config.pro_persona if role == "pro" else state.config.con_persona,
+        opponent_last=opponent_last or "(first turn)",
+    )})
+    return msgs
+
+
+async def _debate(rounds: int, summarize: bool) -> tuple[list, list]:
+    state = DebateState(
+        session_id=f"bench-{rounds}-{summarize}",
+        config=DebateConfig(open_router_api_key="bench", topic="Should AI be regulated?", rounds=rounds),
+    )
+    prompt, ttft = [], []
+    for _ in range(rounds * 2):
+        role = state.next_role
+        budget = StreamBudget()
+        start = time.perf_counter()
+        first, parts = None, []
+        async for delta in debate.astream_turn_text(state, role, budget):
+            if first is None:
+                first = time.perf_counter() - start
+            parts.append(delta)
+        prompt.append(budget.prompt_tokens)
+        ttft.append(first)
+        state.history.append(Turn(role=role, text="".join(parts).strip()))
+        state.next_role = "con" if role == "pro" else "pro"
+        if summarize:
+            debate.schedule_summary_refresh(state)
+    return prompt, ttft
+
+
+async def main_async(args):
+    cfg = MockConfig(ttft=0.05, tokens_per_sec=0, tokens=args.turn_tokens, prefill_tokens_per_sec=args.prefill)
+    builder = debate._messages_for_role_stream
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        await http_pool.start()
+        try:
+            for rounds in args.rounds:
+                for label, summarize in (("6-turn slice", False), ("budgeted", True)):
+                    debate._messages_for_role_stream = builder if summarize else _legacy_messages
+                    prompt, ttft = await _debate(rounds, summarize)
+                    tail = slice(-2, None)
+                    print(f"rounds={rounds:>2} {label:>12}: prompt tokens mean={statistics.mean(prompt):.0f} "
+                          f"last={max(prompt[tail])}, TTFT mean={statistics.mean(ttft) * 1000:.0f}ms "
+                          f"last={max(ttft[tail]) * 1000:.0f}ms")
+        finally:
+            debate._messages_for_role_stream = builder
+            await http_pool.close()
+    print(f"summary calls: {server.stats['structured']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, nargs="+", default=[2, 4, 8, 16])
+    parser.add_argument("--turn-tokens", type=int, default=260)
+    parser.add_argument("--prefill", type=float, default=4000.0, help="mock prompt tokens/sec")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
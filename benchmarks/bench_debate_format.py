@@ -0,0 +1,73 @@
+"""Wall time of all turns of a debate per format: alternating, parallel openings, and parallel openings and closings.
+
+    python -m benchmarks.bench_debate_format --rounds 1 3 5
+
+Each turn costs the mock's TTFT plus generation time, so writing a pair of
+turns together should save about one turn per parallel pair.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from backend.config import settings
+from .backend_server import BackendServer
+from .mock_openrouter import MockConfig, MockServer
+
+FORMATS = {
+    "alternating": {},
+    "parallel openings": {"debate_format": "parallel_openings"},
+    "+ parallel closings": {"debate_format": "parallel_openings", "parallel_closings": True},
+}
+
+
+async def _turns_time(client: httpx.AsyncClient, rounds: int, cfg: dict) -> tuple[float, int]:
+    r = await client.post("/debate/start", json={
+        "open_router_api_key": "bench",
+        "topic": "Should AI be regulated?",
+        "rounds": rounds,
+        **cfg,
+    })
+    sid = r.json()["session_id"]
+    start = time.perf_counter()
+    elapsed, finals = 0.0, 0
+    async with client.stream("POST", "/debate/run_stream", params={"session_id": sid}) as resp:
+        async for line in resp.aiter_lines():
+            event = json.loads(line)
+            if event["type"] == "final" and event.get("stored", True):
+                finals += 1
+                elapsed = time.perf_counter() - start
+    return elapsed, finals
+
+
+async def main_async(args):
+    cfg = MockConfig(ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, tokens=args.tokens)
+    turn = args.ttft + args.tokens / args.tokens_per_sec
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        async with BackendServer() as backend:
+            async with httpx.AsyncClient(base_url=backend.base_url, timeout=None) as client:
+                print(f"one turn is about {turn:.2f}s")
+                for rounds in args.rounds:
+                    for label, fmt in FORMATS.items():
+                        samples = [await _turns_time(client, rounds, fmt) for _ in range(args.repeats)]
+                        mean = statistics.mean(s[0] for s in samples)
+                        print(f"rounds={rounds} {label:>19}: {samples[0][1]} turns in {mean:.2f}s "
+                              f"({mean / turn:.1f} turn-times)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--repeats", type=int, default=2)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Bulk export throughput and peak memory, streamed by page against loading every session first.
+
+    python -m benchmarks.bench_export --sessions 2000 --turns 12
+
+Fills a throwaway SQLite store, then exports it to a discarding sink.
+"load all" reads every session into a list and encodes it at once, which is
+what a one-session-at-a-time API leaves a client doing. Peak memory is the
+tracemalloc high-water mark during the export.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+import orjson
+
+from backend.export import ExportFilter, export_record, export_stream
+from backend.schemas import DebateConfig, DebateState, JudgeResult, Turn
+from backend.store import SQLiteStore
+
+
+def _state(i: int, turns: int) -> DebateState:
+    cfg = DebateConfig(open_router_api_key="bench", topic="Should AI be regulated?", pro_model=f"model-{i % 5}")
+    history = [
+        Turn("pro" if t % 2 == 0 else "con", f"Turn {t + 1}. " + "the evidence suggests careful regulation " * 25,
+             model=f"model-{i % 5}", prompt_tokens=900, completion_tokens=200, ttft=0.4, seconds=3.8)
+        for t in range(turns)
+    ]
+    verdict = JudgeResult(winner="pro", scores={"logic": 7.0, "evidence": 6.5}, reasoning="Better sourced.")
+    return DebateState(session_id=f"s{i:06d}", config=cfg, created_at=1.7e9 + i, history=history,
+                       verdict=verdict, status="finished", timings={"turns": float(turns)})
+
+
+async def _streamed(store, fmt: str, batch: int) -> int:
+    size = 0
+    async for chunk in export_stream(store, ExportFilter(), fmt, batch=batch):
+        size += len(chunk)
+    return size
+
+
+async def _load_all(store, batch: int) -> int:
+    states, cursor = [], ""
+    while cursor is not None:
+        items, cursor = await store.apage(cursor, batch)
+        states += items
+    return len(b"".join(orjson.dumps(export_record(v, k)) + b"\n" for k, v in states))
+
+
+async def _measure(fn) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = await fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(os.path.join(tmp, "export.db"))
+        for i in range(args.sessions):
+            store.set(f"s{i:06d}", _state(i, args.turns))
+
+        cases = {"load all (ndjson)": lambda: _load_all(store, args.batch)}
+        for fmt in args.formats:
+            cases[f"streamed {fmt}"] = lambda fmt=fmt: _streamed(store, fmt, args.batch)
+
+        print(f"{args.sessions} sessions of {args.turns} turns, pages of {args.batch}:")
+        for label, fn in cases.items():
+            size, elapsed, peak = await _measure(fn)
+            print(f"  {label:>18}: {args.sessions / elapsed:>7.0f} sessions/s  {size / elapsed / 2 ** 20:>6.1f} MB/s  "
+                  f"{size / 2 ** 20:>6.1f} MB out  peak {peak / 2 ** 20:>6.1f} MB")
+        await store.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--formats", nargs="+", default=["ndjson", "arrow", "parquet"])
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
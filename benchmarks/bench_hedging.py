@@ -0,0 +1,83 @@
+"""Turn time-to-first-token percentiles with and without hedging to a fallback model.
+
+    python -m benchmarks.bench_hedging --turns 300 --spike-rate 0.1 --spike 3 --hedge-after 0.5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from backend.config import settings
+from backend.http_pool import http_pool
+from backend.llm_client import OpenRouterClient, StreamBudget
+from .mock_openrouter import MockConfig, MockServer
+
+MESSAGES = [{"role": "user", "content": "Argue for the motion."}]
+
+
+def _pct(samples, q: float) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1] if len(samples) > 1 else samples[0]
+
+
+async def _ttft(client: OpenRouterClient, models, hedge_after) -> tuple[float, str]:
+    budget = StreamBudget()
+    start = time.perf_counter()
+    first = None
+    if len(models) > 1:
+        chunks = client.astream_hedged(models, MESSAGES, budget=budget, hedge_after=hedge_after)
+    else:
+        chunks = client.astream_messages(models[0], MESSAGES, budget=budget)
+    async for _ in chunks:
+        if first is None:
+            first = time.perf_counter() - start
+    return first, budget.model
+
+
+async def _run(label: str, server: MockServer, models, args):
+    client = OpenRouterClient("bench")
+    sem = asyncio.Semaphore(args.concurrency)
+    calls = server.stats["stream"]
+
+    async def one():
+        async with sem:
+            return await _ttft(client, models, args.hedge_after)
+
+    results = await asyncio.gather(*(one() for _ in range(args.turns)))
+    samples = [r[0] for r in results]
+    fallback = sum(1 for _, m in results if m != models[0])
+    extra = (server.stats["stream"] - calls) / args.turns - 1
+    print(f"{label:>10}: TTFT p50={_pct(samples, 50) * 1000:.0f}ms p95={_pct(samples, 95) * 1000:.0f}ms "
+          f"p99={_pct(samples, 99) * 1000:.0f}ms, answered by fallback={fallback}, extra requests={extra:.0%}")
+
+
+async def main_async(args):
+    cfg = MockConfig(
+        ttft=args.ttft,
+        tokens_per_sec=200.0,
+        tokens=20,
+        ttft_spike_rate=args.spike_rate,
+        ttft_spike=args.spike,
+    )
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        await http_pool.start()
+        try:
+            await _run("primary", server, ["mock/primary"], args)
+            await _run("hedged", server, ["mock/primary", "mock/fallback"], args)
+        finally:
+            await http_pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--spike-rate", type=float, default=0.1)
+    parser.add_argument("--spike", type=float, default=3.0)
+    parser.add_argument("--hedge-after", type=float, default=0.5)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
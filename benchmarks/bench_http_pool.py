@@ -0,0 +1,81 @@
+"""Compare a fresh aiohttp session per turn against the shared HTTP pool.
+
+    python -m benchmarks.bench_http_pool --turns 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+from backend.http_pool import http_pool
+from backend.llm_client import OpenRouterClient
+from .mock_openrouter import MockConfig, MockServer
+
+MESSAGES = [{"role": "user", "content": "Should AI be regulated?"}]
+
+
+async def _one_turn(base_url: str, pooled: bool) -> float:
+    start = time.perf_counter()
+    ttft = None
+    if pooled:
+        client = OpenRouterClient("bench", base_url=base_url)
+        async for _ in client.astream_messages("mock/model", MESSAGES):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+    else:
+        async with aiohttp.ClientSession() as session:
+            client = OpenRouterClient("bench", session=session, base_url=base_url)
+            async for _ in client.astream_messages("mock/model", MESSAGES):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+    return ttft or 0.0
+
+
+async def _run(base_url: str, pooled: bool, turns: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    ttfts: list[float] = []
+
+    async def worker():
+        async with sem:
+            ttfts.append(await _one_turn(base_url, pooled))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(turns)))
+    elapsed = time.perf_counter() - start
+    ttfts.sort()
+    return {
+        "mode": "pooled" if pooled else "fresh",
+        "ttft_p50_ms": statistics.median(ttfts) * 1000,
+        "ttft_p95_ms": ttfts[int(len(ttfts) * 0.95) - 1] * 1000,
+        "turns_per_sec": turns / elapsed,
+    }
+
+
+async def main_async(args):
+    cfg = MockConfig(ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, tokens=args.tokens)
+    async with MockServer(cfg) as server:
+        fresh = await _run(server.base_url, False, args.turns, args.concurrency)
+        await http_pool.start()
+        try:
+            pooled = await _run(server.base_url, True, args.turns, args.concurrency)
+        finally:
+            await http_pool.close()
+    for r in (fresh, pooled):
+        print(f"{r['mode']:>7}: ttft p50={r['ttft_p50_ms']:.2f}ms p95={r['ttft_p95_ms']:.2f}ms "
+              f"turns/sec={r['turns_per_sec']:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--ttft", type=float, default=0.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0)
+    parser.add_argument("--tokens", type=int, default=40)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
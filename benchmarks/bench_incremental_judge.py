@@ -0,0 +1,69 @@
+"""End-of-debate-to-verdict latency: full-transcript judge vs incremental judging.
+
+    python -m benchmarks.bench_incremental_judge --rounds 3 --debates 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from backend.config import settings
+from .backend_server import BackendServer
+from .mock_openrouter import MockConfig, MockServer
+
+
+async def _verdict_latency(client: httpx.AsyncClient, rounds: int, judge_mode: str) -> float:
+    r = await client.post("/debate/start", json={
+        "open_router_api_key": "bench",
+        "topic": "Should AI be regulated?",
+        "rounds": rounds,
+        "judge_mode": judge_mode,
+    })
+    sid = r.json()["session_id"]
+
+    last_turn_end = None
+    async with client.stream("POST", "/debate/run_stream", params={"session_id": sid}) as resp:
+        async for line in resp.aiter_lines():
+            event = json.loads(line)
+            if event["type"] == "final":
+                last_turn_end = time.perf_counter()
+            elif event["type"] == "verdict":
+                return time.perf_counter() - last_turn_end
+            elif event["type"] == "error":
+                raise RuntimeError(event["detail"])
+    raise RuntimeError("stream ended without a verdict")
+
+
+async def main_async(args):
+    cfg = MockConfig(
+        ttft=args.ttft,
+        tokens_per_sec=args.tokens_per_sec,
+        tokens=args.tokens,
+        prefill_tokens_per_sec=args.prefill_tokens_per_sec,
+    )
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        async with BackendServer() as backend:
+            async with httpx.AsyncClient(base_url=backend.base_url, timeout=None) as client:
+                for mode in ("final", "incremental"):
+                    samples = [await _verdict_latency(client, args.rounds, mode) for _ in range(args.debates)]
+                    print(f"{mode:>11}: verdict latency mean={statistics.mean(samples) * 1000:.1f}ms "
+                          f"max={max(samples) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--debates", type=int, default=5)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=2000.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Time until each piece of the verdict is visible when the judge streams.
+
+    python -m benchmarks.bench_judge_stream --reasoning-tokens 150
+
+The mock streams a structured reply as the JSON document, a few characters
+per chunk, in schema order: winner, scores, then reasoning. A blocking
+structured call returns nothing until the whole document is generated,
+which is when the validated verdict event arrives.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import orjson
+
+from backend.config import settings
+from backend.debate import astream_judge
+from backend.http_pool import http_pool
+from backend.streaming import JSONEventParser
+from backend.schemas import DebateConfig, DebateState, JudgeResult
+from .mock_openrouter import MockConfig, MockServer
+
+
+# documents the parser must reassemble however they are split
+PARSER_CASES = [
+    r'{"winner": "pro", "scores": {"logic": 7.5, "civility": 9}, "reasoning": "Cited \"two\" studies.\nCon did not."}',
+    # models often escape emoji as a surrogate pair
+    r'{"winner": "draw", "scores": {}, "reasoning": "Both were strong \ud83d\ude00 and \u00e9l\u00e8ve \ud83c\udf89!"}',
+    '{"winner": "con", "scores": {"logic": 6}, "reasoning": "Unescaped \U0001f600 too."}',
+    # prose around the document is skipped, not parsed
+    'Answer : {"winner": "pro", "scores": {"logic": 8}, "reasoning": "Clearer."} Hope "this" helps: 1',
+]
+
+
+def check_parser():
+    """Every split of each case yields the same values as parsing it whole, and every event encodes."""
+    for doc in PARSER_CASES:
+        expected = orjson.loads(doc[doc.index("{"):doc.rindex("}") + 1])
+        for size in (1, 2, 3, 5, 7, len(doc)):
+            parser = JSONEventParser()
+            values, texts = {}, {}
+            for i in range(0, len(doc), size):
+                for kind, path, value in parser.feed(doc[i:i + size]):
+                    # would raise on a lone surrogate, as the NDJSON and SSE writers do
+                    orjson.dumps(value)
+                    if kind == "text":
+                        texts[path] = texts.get(path, "") + value
+                    else:
+                        values[path] = value
+            assert values[("reasoning",)] == texts[("reasoning",)] == expected["reasoning"], (size, values)
+            assert values[("winner",)] == expected["winner"]
+            for k, v in expected["scores"].items():
+                assert values[("scores", k)] == v
+
+
+def _state(rounds: int) -> DebateState:
+    history = [
+        {"role": "pro" if i % 2 == 0 else "con", "text": f"Turn {i + 1}. " + "evidence suggests " * 100}
+        for i in range(rounds * 2)
+    ]
+    config = DebateConfig(open_router_api_key="bench", topic="Should AI be regulated?", rounds=rounds)
+    return DebateState(session_id=f"bench-{rounds}", config=config, history=history)
+
+
+async def _streamed(state: DebateState) -> tuple[dict, JudgeResult]:
+    marks: dict = {}
+    start = time.perf_counter()
+    async for event in astream_judge(state):
+        marks.setdefault(event["type"], time.perf_counter() - start)
+        if event["type"] == "verdict":
+            res = JudgeResult.model_validate(event["data"])
+    return marks, res
+
+
+async def main_async(args):
+    check_parser()
+    cfg = MockConfig(ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, tokens=args.reasoning_tokens)
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        await http_pool.start()
+        try:
+            state = _state(args.rounds)
+            marks = []
+            for _ in range(args.repeats):
+                m, res = await _streamed(state)
+                marks.append(m)
+
+            def ms(key):
+                return statistics.mean(m[key] for m in marks) * 1000
+
+            print(f"winner at {ms('verdict_winner'):.0f}ms, first score at {ms('verdict_score'):.0f}ms, "
+                  f"first reasoning at {ms('verdict_reasoning'):.0f}ms, "
+                  f"validated verdict (when a blocking call would return) at {ms('verdict'):.0f}ms")
+            print(f"verdict: {res.winner}, {len(res.scores)} scores, {len(res.reasoning.split())} reasoning words")
+        finally:
+            await http_pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-sec", type=float, default=60.0)
+    parser.add_argument("--reasoning-tokens", type=int, default=150)
+    parser.add_argument("--repeats", type=int, default=3)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Verdict latency per judging mode as transcripts grow, and a judge panel with one late judge.
+
+    python -m benchmarks.bench_judging --rounds 4 8 16
+
+The mock charges prefill per prompt token, so one call over the whole
+transcript gets slower as the debate grows. Round chunks stay small and
+run in parallel.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from backend.config import settings
+from backend.debate import judge
+from backend.http_pool import http_pool
+from backend.schemas import DebateConfig, DebateState
+from .mock_openrouter import MockConfig, MockServer
+
+
+def _state(rounds: int, turn_words: int, **cfg) -> DebateState:
+    history = [
+        {"role": "pro" if i % 2 == 0 else "con", "text": f"Turn {i + 1}. " + "evidence suggests " * (turn_words // 2)}
+        for i in range(rounds * 2)
+    ]
+    config = DebateConfig(open_router_api_key="bench", topic="Should AI be regulated?", rounds=rounds, **cfg)
+    return DebateState(session_id=f"bench-{rounds}", config=config, history=history)
+
+
+async def _latency(state: DebateState, repeats: int) -> tuple[float, str]:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        res = await judge(state)
+        samples.append(time.perf_counter() - start)
+    return statistics.mean(samples), res.winner
+
+
+async def main_async(args):
+    cfg = MockConfig(
+        ttft=0.1,
+        tokens_per_sec=400.0,
+        prefill_tokens_per_sec=args.prefill,
+        prompt_cache=False,
+        model_delays={"mock/late-judge": args.late},
+    )
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        await http_pool.start()
+        try:
+            for rounds in args.rounds:
+                for mode in ("final", "map_reduce"):
+                    mean, _ = await _latency(_state(rounds, args.turn_words, judge_mode=mode), args.repeats)
+                    print(f"rounds={rounds:>2} {mode:>10}: verdict in {mean * 1000:.0f}ms")
+
+            panel = ["mock/judge-b", "mock/late-judge"]
+            for deadline in (args.deadline, args.late * 2):
+                state = _state(args.rounds[0], args.turn_words, judge_panel=panel, judge_deadline=deadline)
+                mean, winner = await _latency(state, 1)
+                print(f"panel of 3, one {args.late:g}s late, deadline {deadline:g}s: "
+                      f"verdict in {mean * 1000:.0f}ms ({winner})")
+        finally:
+            await http_pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--turn-words", type=int, default=200)
+    parser.add_argument("--prefill", type=float, default=3000.0, help="mock prompt tokens/sec")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--late", type=float, default=5.0, help="extra seconds for the late judge")
+    parser.add_argument("--deadline", type=float, default=1.5)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Record a debate against the mock upstream, then replay it offline.
+
+    python -m benchmarks.bench_llm_cache --rounds 2
+
+The replay runs after the mock is shut down. It runs once instantly and
+once with the recorded timing. Both must reproduce the transcript and
+verdict exactly. An unrecorded topic must fail in strict replay mode.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from backend.config import settings
+from backend.llm_cache import llm_cache
+from .backend_server import BackendServer
+from .mock_openrouter import MockConfig, MockServer
+
+
+async def _debate(client: httpx.AsyncClient, topic: str, rounds: int) -> tuple[list, dict, float]:
+    r = await client.post("/debate/start", json={
+        "open_router_api_key": "bench",
+        "topic": topic,
+        "rounds": rounds,
+    })
+    sid = r.json()["session_id"]
+    turns, verdict = [], None
+    start = time.perf_counter()
+    async with client.stream("POST", "/debate/run_stream", params={"session_id": sid}) as resp:
+        async for line in resp.aiter_lines():
+            event = json.loads(line)
+            if event["type"] == "final":
+                turns.append(event["text"])
+            elif event["type"] == "verdict":
+                verdict = event["data"]
+            elif event["type"] == "error":
+                verdict = {"error": event["detail"]}
+    return turns, verdict, time.perf_counter() - start
+
+
+async def _run(label: str, topic: str, rounds: int):
+    llm_cache.open(settings.llm_cache_path)
+    async with BackendServer() as backend:
+        async with httpx.AsyncClient(base_url=backend.base_url, timeout=None) as client:
+            turns, verdict, elapsed = await _debate(client, topic, rounds)
+            print(f"{label:>16}: {len(turns)} turns in {elapsed:.2f}s, cache={llm_cache.stats()}")
+    return turns, verdict
+
+
+async def main_async(args):
+    topic = "Should AI be regulated?"
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.llm_cache_path = os.path.join(tmp, "llm_cache.sqlite3")
+
+        cfg = MockConfig(ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, tokens=args.tokens)
+        async with MockServer(cfg) as server:
+            settings.openrouter_base_url = server.base_url
+            llm_cache.mode = "record"
+            recorded = await _run("record", topic, args.rounds)
+            print(f"{'':>16}  upstream calls: {server.stats['stream']} streamed, {server.stats['structured']} structured")
+
+        # the mock is gone: every call below must come from the cache
+        llm_cache.mode = "replay"
+        for speed, label in ((0.0, "replay instant"), (1.0, "replay timed")):
+            settings.llm_cache_replay_speed = speed
+            # start from a cold memory tier so the disk tier is exercised
+            llm_cache._mem.clear()
+            replayed = await _run(label, topic, args.rounds)
+            print(f"{'':>16}  identical to recording: {replayed == recorded}")
+
+        turns, verdict = await _run("replay miss", "An unrecorded topic", args.rounds)
+        print(f"{'':>16}  {verdict}")
+        llm_cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-sec", type=float, default=100.0)
+    parser.add_argument("--tokens", type=int, default=60)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
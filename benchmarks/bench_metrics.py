@@ -0,0 +1,93 @@
+"""Cost of the latency instrumentation on the streaming hot path.
+
+    python -m benchmarks.bench_metrics --tokens 2000 --turns 20
+
+1. Per delta: the Stopwatch ticks a streamed delta pays (upstream gaps,
+   and the turn level check after its first delta), against parsing that
+   delta's SSE frame.
+2. End to end: CPU per streamed delta for whole turns against the mock at
+   full speed, with METRICS_ENABLED on and off. The mock runs in this
+   process, so its CPU is in both numbers.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import orjson
+
+from backend import debate
+from backend.config import settings
+from backend.http_pool import http_pool
+from backend.llm_client import StreamBudget
+from backend.metrics import Stopwatch, render_prometheus
+from backend.schemas import DebateConfig, DebateState
+from backend.streaming import parse_chunk
+from .mock_openrouter import MockConfig, MockServer
+
+
+def _per_delta(n: int) -> tuple[float, float]:
+    frame = orjson.dumps({"id": "gen", "choices": [{"index": 0, "delta": {"content": "token "}}]})
+    start = time.perf_counter()
+    for _ in range(n):
+        parse_chunk(frame)
+    parse = (time.perf_counter() - start) / n
+
+    llm, turn = Stopwatch("bench_llm", model="mock/model"), Stopwatch("bench_turn", gaps=False, role="pro")
+    start = time.perf_counter()
+    for _ in range(n):
+        llm.tick()
+        turn.tick()
+    ticks = (time.perf_counter() - start) / n
+    return parse, ticks
+
+
+async def _cpu_per_delta(turns: int) -> float:
+    state = DebateState(
+        session_id="bench",
+        config=DebateConfig(open_router_api_key="bench", topic="Should AI be regulated?", rounds=turns),
+    )
+    deltas = 0
+    cpu = time.process_time()
+    for i in range(turns):
+        async for _ in debate.astream_turn_text(state, "pro", StreamBudget()):
+            deltas += 1
+    return (time.process_time() - cpu) / deltas
+
+
+async def main_async(args):
+    parse, ticks = _per_delta(args.iterations)
+    print(f"per delta: parse_chunk {parse * 1e9:.0f}ns, stopwatch ticks {ticks * 1e9:.0f}ns")
+
+    cfg = MockConfig(ttft=0.0, tokens_per_sec=0, tokens=args.tokens, prompt_cache=False)
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        await http_pool.start()
+        try:
+            # warm up the pool and imports before measuring
+            await _cpu_per_delta(1)
+            results = {}
+            for i in range(args.repeats):
+                # alternate the order so drift does not favour either side
+                for enabled in (False, True) if i % 2 == 0 else (True, False):
+                    settings.metrics_enabled = enabled
+                    results.setdefault(enabled, []).append(await _cpu_per_delta(args.turns))
+        finally:
+            await http_pool.close()
+    off, on = statistics.median(results[False]), statistics.median(results[True])
+    print(f"CPU per streamed delta: metrics off {off * 1e6:.2f}us, on {on * 1e6:.2f}us "
+          f"({(on - off) / off:+.1%})")
+    print(f"/metrics body: {len(render_prometheus())} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=6)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Model list latency for the frontend: OpenRouter directly against the backend's shared catalog.
+
+    python -m benchmarks.bench_models --models 300 --upstream-latency 0.3
+
+1. Direct: what the frontend used to do per process and per API key, a
+   full GET of the upstream catalog, then filtering and price formatting.
+2. Backend: GET /models with the catalog warm, a full body and a rerun's
+   If-None-Match revalidation.
+3. Stale: requests past the TTL still answer from the cache while one
+   conditional request revalidates it upstream.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from backend.catalog import catalog
+from backend.config import settings
+from .backend_server import BackendServer
+from .mock_openrouter import MockConfig, MockServer
+
+
+def _old_choices(models: list, free_only: bool) -> dict:
+    # the frontend's previous fetch_models, after its requests.get
+    if free_only:
+        models = [m for m in models
+                  if m.get("pricing", {}).get("prompt") == "0" and m.get("pricing", {}).get("completion") == "0"]
+    choices = {}
+    for m in models:
+        name = m.get("name", m["id"])
+        pricing = m.get("pricing", {})
+        if pricing.get("prompt") and pricing.get("completion"):
+            p_prompt = float(pricing["prompt"]) * 1_000_000
+            p_completion = float(pricing["completion"]) * 1_000_000
+            if p_prompt != 0 or p_completion != 0:
+                name += f" — 💰 (${p_prompt:.3f}/${p_completion:.3f} per 1M tokens)"
+        choices[m["id"]] = name
+    return choices
+
+
+async def _timed(fn, n: int) -> float:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def main_async(args):
+    cfg = MockConfig(models=args.models, models_latency=args.upstream_latency)
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        async with httpx.AsyncClient(timeout=None) as upstream:
+            async def direct():
+                r = await upstream.get(f"{server.base_url}/models")
+                return _old_choices(r.json()["data"], free_only=True)
+
+            size = len(server.app["models_body"])
+            t = await _timed(direct, args.repeats)
+            print(f"direct: {t * 1000:.1f}ms per fetch ({size / 1024:.0f} KiB upstream body), "
+                  f"{len(await direct())} free models")
+
+        async with BackendServer() as backend:
+            while catalog.source != "openrouter":
+                await asyncio.sleep(0.01)
+            async with httpx.AsyncClient(base_url=backend.base_url, timeout=None) as client:
+                r = await client.get("/models", params={"tier": "free"})
+                etag = r.headers["ETag"]
+
+                async def full():
+                    await client.get("/models", params={"tier": "free"})
+
+                async def revalidate():
+                    assert (await client.get("/models", params={"tier": "free"},
+                                             headers={"If-None-Match": etag})).status_code == 304
+
+                print(f"backend: {await _timed(full, args.repeats * 10) * 1000:.2f}ms full "
+                      f"({len(r.content) / 1024:.0f} KiB, {len(r.json()['models'])} free models), "
+                      f"{await _timed(revalidate, args.repeats * 10) * 1000:.2f}ms revalidated")
+
+                catalog.ttl = 0.0
+                catalog._next_check = 0.0
+                before = dict(server.stats)
+                stale = await _timed(full, args.repeats)
+                while catalog.stats()["refreshing"]:
+                    await asyncio.sleep(0.01)
+                print(f"stale: {stale * 1000:.2f}ms per request past the TTL; upstream saw "
+                      f"{server.stats['models_304'] - before['models_304']} conditional 304s and "
+                      f"{server.stats['models'] - before['models']} full fetches")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=300)
+    parser.add_argument("--upstream-latency", type=float, default=0.3)
+    parser.add_argument("--repeats", type=int, default=5)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Provider prompt-cache hit rate and TTFT per prompt layout.
+
+    python -m benchmarks.bench_prompt_cache --rounds 8
+
+The mock remembers message prefixes per model and skips prefill for the
+longest one it has seen. It reports the skipped tokens as
+usage.prompt_tokens_details.cached_tokens, like OpenAI-style providers do.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from backend.config import settings
+from .backend_server import BackendServer
+from .mock_openrouter import MockConfig, MockServer
+
+
+async def _debate(client: httpx.AsyncClient, layout: str, rounds: int, topic: str) -> list:
+    r = await client.post("/debate/start", json={
+        "open_router_api_key": "bench",
+        "topic": topic,
+        "rounds": rounds,
+        "prompt_layout": layout,
+    })
+    sid = r.json()["session_id"]
+    turns = []
+    turn_start, first = time.perf_counter(), None
+    async with client.stream("POST", "/debate/run_stream", params={"session_id": sid}) as resp:
+        async for line in resp.aiter_lines():
+            event = json.loads(line)
+            if event["type"] == "delta" and first is None:
+                first = time.perf_counter() - turn_start
+            elif event["type"] == "final":
+                turns.append((event["prompt_tokens"], event["cached_tokens"], first))
+                turn_start, first = time.perf_counter(), None
+    return turns
+
+
+async def main_async(args):
+    cfg = MockConfig(ttft=0.05, tokens_per_sec=0, tokens=args.turn_tokens, prefill_tokens_per_sec=args.prefill)
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        settings.context_tokens = args.context_tokens
+        async with BackendServer() as backend:
+            async with httpx.AsyncClient(base_url=backend.base_url, timeout=None) as client:
+                for layout in ("budgeted", "prefix_stable"):
+                    # a fresh topic so neither layout reuses the other's prefixes
+                    turns = await _debate(client, layout, args.rounds, f"Should AI be regulated? ({layout})")
+                    prompt = sum(t[0] for t in turns)
+                    cached = sum(t[1] for t in turns)
+                    ttft = [t[2] for t in turns]
+                    print(f"{layout:>13}: {prompt} prompt tokens, {cached} cached ({cached / prompt:.0%}), "
+                          f"TTFT mean={statistics.mean(ttft) * 1000:.0f}ms max={max(ttft) * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=8)
+    parser.add_argument("--turn-tokens", type=int, default=260)
+    parser.add_argument("--context-tokens", type=int, default=3000)
+    parser.add_argument("--prefill", type=float, default=4000.0, help="mock prompt tokens/sec")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
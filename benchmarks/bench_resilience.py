@@ -0,0 +1,101 @@
+"""Turn success rate against a flaky upstream, with and without retries.
+
+    python -m benchmarks.bench_resilience --turns 200 --error-rate 0.15 --rate-limit-rate 0.1
+
+Also shows the circuit breaker shedding calls to a model that always fails,
+and the per-model token bucket holding a burst to the configured rate.
+"""
+import argparse
+import asyncio
+import time
+
+from backend.config import settings
+from backend.http_pool import http_pool
+from backend.llm_client import OpenRouterClient
+from backend.metrics import counters
+from backend.resilience import breakers
+from .mock_openrouter import MockConfig, MockServer
+
+MESSAGES = [{"role": "user", "content": "Argue for the motion."}]
+
+
+async def _turn(client: OpenRouterClient, model: str) -> bool:
+    try:
+        async for _ in client.astream_messages(model, MESSAGES):
+            pass
+        return True
+    except Exception:
+        return False
+
+
+async def _run(label: str, turns: int, model: str, concurrency: int = 16):
+    client = OpenRouterClient("bench")
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            return await _turn(client, model)
+
+    before = counters.snapshot()
+    start = time.perf_counter()
+    ok = sum(await asyncio.gather(*(one() for _ in range(turns))))
+    elapsed = time.perf_counter() - start
+    after = counters.snapshot()
+
+    def delta(name):
+        return after.get(name, 0) - before.get(name, 0)
+
+    print(f"{label:>22}: {ok}/{turns} turns ok in {elapsed:.2f}s, retries={delta('llm_retries_total'):.0f} "
+          f"retry_wait={delta('llm_retry_wait_seconds_total'):.1f}s "
+          f"throttle_wait={delta('llm_throttle_wait_seconds_total'):.1f}s "
+          f"circuit_rejected={delta('llm_circuit_rejected_total'):.0f}")
+
+
+async def main_async(args):
+    settings.llm_retry_base = 0.05
+    cfg = MockConfig(
+        ttft=0.02,
+        tokens_per_sec=0,
+        tokens=20,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+    )
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        await http_pool.start()
+        try:
+            settings.llm_breaker_threshold = 0
+            settings.llm_max_retries = 0
+            await _run("no retries", args.turns, "mock/flaky-a")
+            settings.llm_max_retries = args.retries
+            await _run(f"{args.retries} retries", args.turns, "mock/flaky-b")
+
+            settings.llm_breaker_threshold = 5
+            cfg.error_rate, cfg.rate_limit_rate = 1.0, 0.0
+            calls = server.stats["503"]
+            await _run("dead model + breaker", args.turns, "mock/dead")
+            print(f"{'':>22}  upstream calls to the dead model: {server.stats['503'] - calls}, "
+                  f"circuits: {breakers.snapshot()}")
+
+            cfg.error_rate = 0.0
+            settings.llm_rate_per_model, settings.llm_burst_per_model = args.rate, 1
+            await _run(f"bucket {args.rate:.0f} req/s", int(args.rate * 2), "mock/limited")
+        finally:
+            await http_pool.close()
+    print("upstream:", server.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--error-rate", type=float, default=0.15)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.1)
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    parser.add_argument("--rate", type=float, default=20.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
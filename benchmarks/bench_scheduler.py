@@ -0,0 +1,106 @@
+"""Admission control under a burst: one heavy API key against a light one.
+
+    python -m benchmarks.bench_scheduler --capacity 4 --heavy 48 --light 4
+
+The heavy key queues a burst of turns, then a light key asks for a few
+turns and a judge call. With one shared FIFO the light key waits behind
+the whole burst. With per-key fair queuing it waits about one slot. A
+final burst past the queue bound shows how fast overload is refused.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from backend.config import settings
+from backend.http_pool import http_pool
+from backend.llm_client import OpenRouterClient
+from backend.resilience import OverloadedError, Scheduler
+from backend import llm_client as llm_client_module
+from .mock_openrouter import MockConfig, MockServer
+
+MESSAGES = [{"role": "user", "content": "Make your case."}]
+
+
+async def _call(key: str, priority: str = "interactive") -> float:
+    client = OpenRouterClient(key, priority=priority)
+    start = time.perf_counter()
+    first = None
+    # the whole turn is read: a call holds its slot until the stream ends
+    async for _ in client.astream_messages("mock/model", MESSAGES):
+        if first is None:
+            # time to first delta: queueing plus the mock's TTFT
+            first = time.perf_counter() - start
+    return first
+
+
+async def _round(args, fair: bool) -> dict:
+    sched = Scheduler(args.capacity, max_queue=1000, max_queue_per_key=1000, weights={})
+    llm_client_module.scheduler = sched
+    if not fair:
+        # one shared queue: every call looks like the same key
+        slot = sched.slot
+        sched.slot = lambda key, priority="interactive": slot("shared", "interactive")
+
+    heavy = [asyncio.create_task(_call("heavy")) for _ in range(args.heavy)]
+    await asyncio.sleep(0.01)
+    light = [asyncio.create_task(_call("light")) for _ in range(args.light)]
+    judge = asyncio.create_task(_call("light", "background"))
+    light_t = await asyncio.gather(*light)
+    judge_t = await judge
+    heavy_t = await asyncio.gather(*heavy)
+    return {"light": light_t, "heavy": heavy_t, "judge": judge_t}
+
+
+async def _overload(args) -> tuple[int, float, float]:
+    sched = Scheduler(args.capacity, max_queue=args.queue, max_queue_per_key=args.queue, weights={})
+    llm_client_module.scheduler = sched
+
+    async def attempt():
+        start = time.perf_counter()
+        try:
+            await _call("burst")
+            return None
+        except OverloadedError as e:
+            return time.perf_counter() - start, e.retry_after
+
+    results = await asyncio.gather(*(attempt() for _ in range(args.capacity + args.queue + args.overflow)))
+    rejected = [r for r in results if r is not None]
+    return len(rejected), max((r[0] for r in rejected), default=0.0), max((r[1] for r in rejected), default=0.0)
+
+
+async def main_async(args):
+    cfg = MockConfig(ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, tokens=args.tokens, prompt_cache=False)
+    original = llm_client_module.scheduler
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        await http_pool.start()
+        try:
+            for fair, label in ((False, "shared FIFO"), (True, "fair queuing")):
+                r = await _round(args, fair)
+                print(f"{label:>12}: light key TTFT mean={statistics.mean(r['light']) * 1000:.0f}ms "
+                      f"max={max(r['light']) * 1000:.0f}ms, its judge call {r['judge'] * 1000:.0f}ms, "
+                      f"heavy key max={max(r['heavy']) * 1000:.0f}ms")
+            n, slowest, retry_after = await _overload(args)
+            print(f"overload: {n} of {args.capacity + args.queue + args.overflow} calls refused, "
+                  f"slowest refusal {slowest * 1000:.1f}ms, Retry-After {retry_after:.0f}s")
+        finally:
+            llm_client_module.scheduler = original
+            await http_pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--capacity", type=int, default=4)
+    parser.add_argument("--heavy", type=int, default=48)
+    parser.add_argument("--light", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=16)
+    parser.add_argument("--overflow", type=int, default=32)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--tokens-per-sec", type=float, default=100.0)
+    parser.add_argument("--tokens", type=int, default=20)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
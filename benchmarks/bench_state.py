@@ -0,0 +1,103 @@
+"""Session state encode/decode throughput and memory per session, typed turns against ad-hoc dicts.
+
+    python -m benchmarks.bench_state --turns 10 100 1000
+
+"dicts" is the previous layout: an untyped history of plain dicts, encoded
+with ``orjson.dumps(state.model_dump())`` and decoded with
+``model_validate(orjson.loads(raw))``. "Turn" is the current one, through
+``dumps_state`` / ``loads_state``, which store turns as positional rows.
+"done" is the finished step_stream response: FastAPI's jsonable_encoder
+before orjson against orjson alone.
+Memory is what one decoded session keeps allocated, as a SQLite or Redis
+read leaves it, and as the memory store holds it.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from backend.schemas import DebateConfig, DebateState, Turn
+from backend.store import dumps_state, loads_state
+
+
+class DictState(DebateState):
+    history: List = []
+
+
+def _history(turns: int) -> List[dict]:
+    return [
+        {
+            "role": "pro" if i % 2 == 0 else "con",
+            "text": f"Turn {i + 1}. " + "the evidence suggests careful regulation " * 25,
+            "model": "meta-llama/llama-3.3-70b-instruct",
+            "prompt_tokens": 900 + i,
+            "cached_tokens": 0,
+            "completion_tokens": 200,
+            "ttft": 0.412,
+            "seconds": 3.871,
+        }
+        for i in range(turns)
+    ]
+
+
+def _rate(fn, budget: float) -> float:
+    """Calls per second of ``fn`` over about ``budget`` seconds."""
+    n, start = 0, time.perf_counter()
+    while True:
+        fn()
+        n += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget:
+            return n / elapsed
+
+
+def _retained(fn) -> int:
+    gc.collect()
+    tracemalloc.start()
+    kept = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    cfg = DebateConfig(open_router_api_key="bench", topic="Should AI be regulated?", rounds=500)
+    for turns in args.turns:
+        history = _history(turns)
+        old = DictState(session_id="bench", config=cfg, history=history)
+        new = DebateState(session_id="bench", config=cfg, history=history)
+        old_raw, new_raw = orjson.dumps(old.model_dump()), dumps_state(new)
+        assert loads_state(new_raw) == new and isinstance(new.history[0], Turn)
+
+        rows = {
+            "encode": (lambda: orjson.dumps(old.model_dump()), lambda: dumps_state(new)),
+            "decode": (lambda: DictState.model_validate(orjson.loads(old_raw)), lambda: loads_state(new_raw)),
+            "done": (
+                lambda: orjson.dumps(jsonable_encoder({"status": "done", "history": old.history})),
+                lambda: orjson.dumps({"status": "done", "history": new.history}),
+            ),
+        }
+        print(f"{turns} turns, {len(new_raw) / 1024:.0f} KiB encoded:")
+        for label, (before, after) in rows.items():
+            b, a = _rate(before, args.seconds), _rate(after, args.seconds)
+            print(f"  {label:>6}: dicts {b:>9.0f}/s  Turn {a:>9.0f}/s  ({a / b:.2f}x)")
+
+        text = sum(len(t["text"]) for t in history)
+        b = _retained(lambda: DictState.model_validate(orjson.loads(old_raw)))
+        a = _retained(lambda: loads_state(new_raw))
+        print(f"  memory: dicts {b / 1024:.0f} KiB  Turn {a / 1024:.0f} KiB per session; "
+              f"beyond the turn texts {(b - text) / turns:.0f} vs {(a - text) / turns:.0f} bytes per turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Session store reads and compare-and-set writes per second across worker processes.
+
+    python -m benchmarks.bench_store --backends sqlite redis --workers 1 4 8
+
+Each worker count runs three phases, one after the other:
+
+- reads: plain ``aget`` of the worker's own sessions
+- writes: ``aupdate`` (a read and a compare-and-set) of the worker's own
+  sessions, so no write ever conflicts
+- shared: every worker ``aupdate``s the same few sessions, as the
+  processes behind one debate do; conflicts are retried, and afterwards
+  the stored counts must add up to every write that returned
+
+The redis backend runs against benchmarks.mock_redis unless --redis-url is given.
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from backend.schemas import DebateConfig, DebateState
+
+OWN_KEYS = 32
+
+
+def _state(sid: str, turns: int) -> DebateState:
+    cfg = DebateConfig(open_router_api_key="bench", topic="Should AI be regulated?")
+    history = [{"role": "pro" if i % 2 == 0 else "con", "text": "word " * 150} for i in range(turns)]
+    return DebateState(session_id=sid, config=cfg, history=history)
+
+
+def _bump(state: DebateState) -> bool:
+    # a field update like the ones the step endpoint commits with each turn
+    state.timings["bench_writes"] = state.timings.get("bench_writes", 0) + 1
+    return True
+
+
+async def _phase_async(backend: str, phase: str, ops: int, turns: int, shared: int, worker: int) -> tuple:
+    from backend.metrics import counters
+    from backend.store import make_store
+
+    store = make_store(backend)
+    if phase == "seed":
+        for i in range(shared):
+            await store.aset(f"shared-{i}", _state(f"shared-{i}", turns))
+        await store.aclose()
+        return 0, 0.0, 0
+    keys = [f"shared-{i}" for i in range(shared)] if phase == "shared" else [f"w{worker}-{i}" for i in range(OWN_KEYS)]
+    if phase == "reads":
+        for k in keys:
+            await store.aset(k, _state(k, turns))
+
+    conflicts = counters.snapshot().get("store_write_conflicts_total", 0)
+    done = 0
+    start = time.perf_counter()
+    for i in range(ops):
+        k = keys[(i + worker) % len(keys)]
+        if phase == "reads":
+            done += await store.aget(k) is not None
+        else:
+            done += await store.aupdate(k, _bump) is not None
+    elapsed = time.perf_counter() - start
+    conflicts = counters.snapshot().get("store_write_conflicts_total", 0) - conflicts
+    await store.aclose()
+    return done, elapsed, int(conflicts)
+
+
+async def _shared_total(backend: str, shared: int) -> int:
+    from backend.store import make_store
+
+    store = make_store(backend)
+    total = 0
+    for i in range(shared):
+        state = await store.aget(f"shared-{i}")
+        total += int(state.timings.get("bench_writes", 0))
+    await store.aclose()
+    return total
+
+
+def _phase(args) -> tuple:
+    backend, env, phase, ops, turns, shared, worker = args
+    os.environ.update(env)
+    if phase == "total":
+        return asyncio.run(_shared_total(backend, shared))
+    return asyncio.run(_phase_async(backend, phase, ops, turns, shared, worker))
+
+
+def _run(backend: str, env: dict, workers: int, ops: int, turns: int, shared: int) -> None:
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(workers) as pool:
+        pool.apply(_phase, ((backend, env, "seed", 0, turns, shared, 0),))
+        rates = {}
+        for phase in ("reads", "writes", "shared"):
+            results = pool.map(_phase, [(backend, env, phase, ops, turns, shared, w) for w in range(workers)])
+            done = sum(r[0] for r in results)
+            wall = max(r[1] for r in results)
+            rates[phase] = (done, done / wall, sum(r[2] for r in results))
+        total = pool.apply(_phase, ((backend, env, "total", 0, turns, shared, 0),))
+
+    shared_done, shared_rate, conflicts = rates["shared"]
+    print(
+        f"{backend:>6} workers={workers}: reads/sec={rates['reads'][1]:,.0f} "
+        f"writes/sec={rates['writes'][1]:,.0f} "
+        f"shared writes/sec={shared_rate:,.0f} ({conflicts / shared_done:.2f} retries/write)"
+    )
+    # a retried conflict must not lose the write it raced with
+    assert total == shared_done, (total, shared_done)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "redis"])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--shared-keys", type=int, default=2, help="sessions every worker writes in the shared phase")
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            env = {"STORE_BACKEND": backend}
+            proc = None
+            if backend == "sqlite":
+                env["STORE_SQLITE_PATH"] = os.path.join(tmp, "bench.sqlite3")
+            elif backend == "redis":
+                url = args.redis_url
+                if url is None:
+                    proc = subprocess.Popen(
+                        [sys.executable, "-m", "benchmarks.mock_redis", "--port", "6391"],
+                        stdout=subprocess.DEVNULL,
+                    )
+                    time.sleep(1.0)
+                    url = "redis://127.0.0.1:6391/0"
+                env["STORE_REDIS_URL"] = url
+            try:
+                for workers in args.workers:
+                    _run(backend, env, workers, args.ops, args.turns, args.shared_keys)
+            finally:
+                if proc is not None:
+                    proc.terminate()
+                    proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Streaming hot path micro-benchmark.
+
+    python -m benchmarks.bench_streaming
+
+1. SSE parsing: the old line-by-line stdlib-json parser against SSEParser
+   with orjson, on one upstream body split at random chunk boundaries.
+2. CPU per turn for one paced turn, with and without a coalescing window:
+   the NDJSON encode and client decode of its delta events, timed alone as
+   the least of --repeat runs, and the event loop's CPU for the paced turn
+   itself, as the median of --runs turns. Also the characters a client
+   re-renders, redrawing the whole turn or only the open paragraph.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import orjson
+
+from backend.streaming import SSEParser, coalesce_deltas, parse_chunk
+
+
+def _body(tokens: int) -> bytes:
+    frames = [
+        b"data: " + json.dumps({"id": "gen", "choices": [{"index": 0, "delta": {"content": f"tok{i} "}}]}).encode() + b"\n\n"
+        for i in range(tokens)
+    ]
+    return b": OPENROUTER PROCESSING\n\n" + b"".join(frames) + b"data: [DONE]\n\n"
+
+
+def _chunks(body: bytes, seed: int = 0) -> list[bytes]:
+    rng = random.Random(seed)
+    out, i = [], 0
+    while i < len(body):
+        n = rng.randint(1, 400)
+        out.append(body[i:i + n])
+        i += n
+    return out
+
+
+def _lines(chunks: list[bytes]):
+    # aiohttp's StreamReader line iteration
+    buf = b""
+    for chunk in chunks:
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        yield from lines
+
+
+def _legacy_parse(chunks: list[bytes]) -> int:
+    # what astream_messages did before: decode, strip and stdlib json per line
+    n = 0
+    for raw in _lines(chunks):
+        line = raw.decode("utf-8").strip()
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        try:
+            event = json.loads(data)
+            if event["choices"][0]["delta"].get("content"):
+                n += 1
+        except Exception:
+            continue
+    return n
+
+
+def _new_parse(chunks: list[bytes]) -> int:
+    n = 0
+    parser = SSEParser()
+    for chunk in chunks:
+        for data in parser.feed(chunk):
+            if data == b"[DONE]":
+                return n
+            if parse_chunk(data)[0]:
+                n += 1
+    return n
+
+
+def bench_parse(tokens: int, repeat: int):
+    chunks = _chunks(_body(tokens))
+    for name, fn in (("legacy json", _legacy_parse), ("SSEParser+orjson", _new_parse)):
+        assert fn(chunks) == tokens
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(chunks)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>17}: {tokens * repeat / elapsed:,.0f} events/sec")
+
+
+async def _paced(tokens: int, tokens_per_sec: float, paragraph: int = 40):
+    for i in range(tokens):
+        yield f"tok{i}" + ("\n\n" if (i + 1) % paragraph == 0 else " ")
+        await asyncio.sleep(1 / tokens_per_sec)
+
+
+async def _received(tokens: int, tokens_per_sec: float, window: float) -> tuple[list[str], float]:
+    """The deltas a client receives for one paced turn, and the CPU the event loop spent producing them."""
+    cpu = time.process_time()
+    deltas = [d async for d in coalesce_deltas(_paced(tokens, tokens_per_sec), window)]
+    return deltas, time.process_time() - cpu
+
+
+def _events_cpu(deltas: list[str], encode, decode, repeat: int) -> float:
+    """Fewest CPU seconds, over ``repeat`` runs, to encode every delta event and decode it on the client."""
+    best = float("inf")
+    for _ in range(repeat):
+        cpu = time.process_time()
+        for delta in deltas:
+            decode(encode({"type": "delta", "role": "pro", "seq": 0, "data": delta}))
+        best = min(best, time.process_time() - cpu)
+    return best
+
+
+def _redrawn(deltas: list[str]) -> tuple[int, int]:
+    """Characters re-rendered per turn by a client that redraws the whole turn on every event,
+    and by one that draws finished paragraphs once and redraws only the open one."""
+    full = incremental = 0
+    text, open_para = "", ""
+    for delta in deltas:
+        text += delta
+        open_para += delta
+        *done, open_para = open_para.split("\n\n")
+        full += len(text)
+        incremental += sum(len(p) for p in done) + len(open_para)
+    return full, incremental
+
+
+async def bench_turn(tokens: int, tokens_per_sec: float, runs: int, repeat: int):
+    legacy = (lambda e: json.dumps(e) + "\n", json.loads)
+    fast = (lambda e: orjson.dumps(e) + b"\n", orjson.loads)
+    for name, window, (encode, decode) in (
+        ("json, no window", 0.0, legacy),
+        ("orjson, no window", 0.0, fast),
+        ("orjson, 40ms window", 0.04, fast),
+    ):
+        loop_cpu = []
+        for _ in range(runs):
+            deltas, cpu = await _received(tokens, tokens_per_sec, window)
+            loop_cpu.append(cpu)
+        events_cpu = _events_cpu(deltas, encode, decode, repeat)
+        full, incremental = _redrawn(deltas)
+        print(f"{name:>20}: {len(deltas)} events/turn, encode+decode {events_cpu * 1000:.2f}ms CPU/turn, "
+              f"event loop {statistics.median(loop_cpu) * 1000:.1f}ms CPU/turn (median of {runs}), "
+              f"chars re-rendered {full:,} full redraw / {incremental:,} by paragraph")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--tokens-per-sec", type=float, default=300.0)
+    parser.add_argument("--runs", type=int, default=5, help="paced turns per configuration")
+    args = parser.parse_args()
+    bench_parse(args.tokens, args.repeat)
+    asyncio.run(bench_turn(args.tokens, args.tokens_per_sec, args.runs, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Tournament throughput (debates/min) at different concurrency limits.
+
+    python -m benchmarks.bench_tournament --models 4 --topics 2 --concurrency 1 8 32
+
+Runs the batch engine in-process against the mock upstream. A final round goes
+through the HTTP job endpoint with progress polling.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from backend.config import settings
+from backend.http_pool import http_pool
+from backend.schemas import TournamentConfig
+from backend.tournament import Tournament
+from .backend_server import BackendServer
+from .mock_openrouter import MockConfig, MockServer
+
+
+def _config(args, concurrency: int) -> TournamentConfig:
+    return TournamentConfig(
+        open_router_api_key="bench",
+        topics=[f"Topic {i}: should AI be regulated?" for i in range(args.topics)],
+        pro_models=[f"mock/model-{i}" for i in range(args.models)],
+        judge_models=["mock/judge"],
+        rounds=args.rounds,
+        concurrency=concurrency,
+        per_model_concurrency=args.per_model,
+    )
+
+
+async def _engine(args, concurrency: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "results.jsonl")
+        t = Tournament(_config(args, concurrency), out_path=out)
+        start = time.perf_counter()
+        await t.run()
+        elapsed = time.perf_counter() - start
+        with open(out, "rb") as f:
+            lines = sum(1 for _ in f)
+    p = t.progress()
+    print(f"concurrency={concurrency:>3}: {len(t.results)} debates in {elapsed:.2f}s "
+          f"= {len(t.results) / elapsed * 60:.0f} debates/min, {p['failed']} failed, {lines} JSONL lines")
+    return p
+
+
+async def _job(args, concurrency: int):
+    async with BackendServer() as backend:
+        async with httpx.AsyncClient(base_url=backend.base_url, timeout=None) as client:
+            r = await client.post("/tournaments", json=_config(args, concurrency).model_dump())
+            tid = r.json()["tournament_id"]
+            polls = 0
+            while True:
+                await asyncio.sleep(0.2)
+                p = (await client.get(f"/tournaments/{tid}")).json()
+                polls += 1
+                if p["status"] != "running":
+                    break
+            r = await client.get(f"/tournaments/{tid}/results")
+            rows = len(r.text.splitlines())
+    print(f"job endpoint: {p['completed']}/{p['total']} in {p['elapsed']}s after {polls} polls, "
+          f"{rows} result rows, status={p['status']}")
+    print("ratings:", p["ratings"])
+
+
+async def main_async(args):
+    cfg = MockConfig(ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, tokens=args.tokens)
+    async with MockServer(cfg) as server:
+        settings.openrouter_base_url = server.base_url
+        await http_pool.start()
+        try:
+            for c in args.concurrency:
+                await _engine(args, c)
+        finally:
+            await http_pool.close()
+        await _job(args, max(args.concurrency))
+        print(f"upstream calls: {server.stats['stream']} streamed, {server.stats['structured']} structured")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=4)
+    parser.add_argument("--topics", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--per-model", type=int, default=8)
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--tokens", type=int, default=40)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
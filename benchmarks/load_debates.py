@@ -0,0 +1,302 @@
+"""End-to-end load: N concurrent debates through the backend against the mock OpenRouter.
+
+    python -m benchmarks.load_debates --debates 50 --concurrency 10 --out results.json
+    python -m benchmarks.load_debates --debates 50 --concurrency 10 --compare results.json
+
+Each debate is driven the way the frontend drives one: POST /debate/start,
+one POST /debate/step_stream per turn, then POST /debate/judge. The backend
+runs as its own uvicorn process, so its CPU and RSS are measured apart from
+the mock and the load generator. The mock's injected failures are seeded, so
+a run with the same arguments is repeatable.
+
+Reports p50/p95/p99 of time to first delta, turn latency, judge latency and
+whole debates, throughput, failures by kind, and backend CPU per debate and
+peak RSS. --out saves them as JSON; --compare prints the change against a
+saved run and exits non-zero when a metric got worse by more than
+--tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+from .backend_server import BackendProcess
+from .mock_openrouter import MockConfig, MockServer
+
+
+def _summary(samples: list[float]) -> dict:
+    """Milliseconds at p50/p95/p99, mean and max."""
+    if not samples:
+        return {}
+    if len(samples) > 1:
+        q = statistics.quantiles(samples, n=100, method="inclusive")
+        p50, p95, p99 = q[49], q[94], q[98]
+    else:
+        p50 = p95 = p99 = samples[0]
+    return {
+        "n": len(samples),
+        "p50": round(p50 * 1000, 1),
+        "p95": round(p95 * 1000, 1),
+        "p99": round(p99 * 1000, 1),
+        "mean": round(statistics.mean(samples) * 1000, 1),
+        "max": round(max(samples) * 1000, 1),
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.ttft: list[float] = []
+        self.turn: list[float] = []
+        self.judge: list[float] = []
+        self.debate: list[float] = []
+        self.deltas = 0
+        self.failures: Counter = Counter()
+
+
+async def _step(client: httpx.AsyncClient, sid: str, seq: int, rec: Recorder) -> bool:
+    start = time.perf_counter()
+    first = None
+    async with client.stream("POST", "/debate/step_stream", params={"session_id": sid, "seq": seq}) as resp:
+        if resp.status_code != 200:
+            await resp.aread()
+            rec.failures[f"step_http_{resp.status_code}"] += 1
+            return False
+        async for line in resp.aiter_lines():
+            event = json.loads(line)
+            kind = event.get("type")
+            if kind == "delta":
+                rec.deltas += 1
+                if first is None:
+                    first = time.perf_counter() - start
+            elif kind == "error":
+                rec.failures["step_error"] += 1
+                return False
+            elif kind == "final":
+                if not event.get("text") or not event.get("stored", True):
+                    # nothing was generated, or the turn was dropped: it is not stored and must be retried
+                    rec.failures["step_empty"] += 1
+                    return False
+                rec.turn.append(time.perf_counter() - start)
+                if first is not None:
+                    rec.ttft.append(first)
+                return True
+    rec.failures["step_no_final"] += 1
+    return False
+
+
+async def _debate(client: httpx.AsyncClient, args, rec: Recorder) -> bool:
+    start = time.perf_counter()
+    r = await client.post("/debate/start", json={
+        "open_router_api_key": "load",
+        "topic": "Should AI be regulated?",
+        "rounds": args.rounds,
+        "judge_mode": args.judge_mode,
+    })
+    if r.status_code != 200:
+        rec.failures[f"start_http_{r.status_code}"] += 1
+        return False
+    sid = r.json()["session_id"]
+
+    for seq in range(args.rounds * 2):
+        if not await _step(client, sid, seq, rec):
+            return False
+
+    judge_start = time.perf_counter()
+    r = await client.post("/debate/judge", params={"session_id": sid})
+    if r.status_code != 200:
+        rec.failures[f"judge_http_{r.status_code}"] += 1
+        return False
+    rec.judge.append(time.perf_counter() - judge_start)
+    rec.debate.append(time.perf_counter() - start)
+    return True
+
+
+async def _sample_rss(backend: BackendProcess, peak: list[int], interval: float):
+    while True:
+        rss = backend.rss_bytes()
+        if rss is not None:
+            peak[0] = max(peak[0], rss)
+        await asyncio.sleep(interval)
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def run(args) -> dict:
+    random.seed(args.seed)
+    cfg = MockConfig(
+        ttft=args.ttft,
+        tokens_per_sec=args.tokens_per_sec,
+        tokens=args.tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        ttft_spike_rate=args.ttft_spike_rate,
+        ttft_spike=args.ttft_spike,
+    )
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency * 2 + 10, max_keepalive_connections=args.concurrency * 2 + 10)
+    async with MockServer(cfg) as upstream:
+        env = {"OPENROUTER_BASE_URL": upstream.base_url, **dict(kv.split("=", 1) for kv in args.env)}
+        async with BackendProcess(env, port=args.port, workers=args.workers) as backend:
+            async with httpx.AsyncClient(base_url=backend.base_url, timeout=None, limits=limits) as client:
+                # one warm-up debate so imports and the connection pool are not measured
+                warm = argparse.Namespace(**{**vars(args), "rounds": 1})
+                await _debate(client, warm, Recorder())
+
+                cpu0, rss0 = backend.cpu_seconds(), backend.rss_bytes() or 0
+                peak = [rss0]
+                sampler = asyncio.create_task(_sample_rss(backend, peak, 0.1))
+                gate = asyncio.Semaphore(args.concurrency)
+
+                async def one():
+                    async with gate:
+                        return await _debate(client, args, rec)
+
+                start = time.perf_counter()
+                done = await asyncio.gather(*(one() for _ in range(args.debates)))
+                wall = time.perf_counter() - start
+                sampler.cancel()
+                cpu1 = backend.cpu_seconds()
+                llm_stats = (await client.get("/llm/stats")).json()
+        mock = dict(upstream.stats)
+
+    completed = sum(done)
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "tolerance")},
+        "git": _git_rev(),
+        "wall_seconds": round(wall, 3),
+        "debates_completed": completed,
+        "debates_failed": args.debates - completed,
+        "failures": dict(rec.failures),
+        "throughput": {
+            "debates_per_min": round(completed / wall * 60, 2),
+            "turns_per_sec": round(len(rec.turn) / wall, 2),
+            "deltas_per_sec": round(rec.deltas / wall, 1),
+        },
+        "ttft_ms": _summary(rec.ttft),
+        "turn_ms": _summary(rec.turn),
+        "judge_ms": _summary(rec.judge),
+        "debate_ms": _summary(rec.debate),
+        "backend": {
+            "cpu_seconds": round(cpu1 - cpu0, 3) if cpu0 is not None else None,
+            "cpu_ms_per_debate": round((cpu1 - cpu0) / max(1, completed) * 1000, 2) if cpu0 is not None else None,
+            "rss_start_mb": round(rss0 / 2 ** 20, 1),
+            "rss_peak_mb": round(peak[0] / 2 ** 20, 1),
+        },
+        "upstream": mock,
+        "llm": {k: v for k, v in llm_stats.items() if isinstance(v, (int, float))},
+    }
+
+
+# (path, higher is better)
+COMPARED = [
+    (("throughput", "debates_per_min"), True),
+    (("throughput", "turns_per_sec"), True),
+    (("ttft_ms", "p50"), False), (("ttft_ms", "p95"), False), (("ttft_ms", "p99"), False),
+    (("turn_ms", "p50"), False), (("turn_ms", "p95"), False), (("turn_ms", "p99"), False),
+    (("judge_ms", "p50"), False), (("judge_ms", "p95"), False), (("judge_ms", "p99"), False),
+    (("backend", "cpu_ms_per_debate"), False),
+    (("backend", "rss_peak_mb"), False),
+    (("debates_failed",), False),
+]
+
+
+def _get(result: dict, path: tuple):
+    for key in path:
+        if not isinstance(result, dict) or key not in result:
+            return None
+        result = result[key]
+    return result
+
+
+def compare(base: dict, new: dict, tolerance: float) -> list[str]:
+    """Print each compared metric against the baseline; return the ones that regressed."""
+    if base.get("config") != new.get("config"):
+        print("note: the baseline was run with different arguments")
+    regressed = []
+    for path, higher_better in COMPARED:
+        b, n = _get(base, path), _get(new, path)
+        if b is None or n is None:
+            continue
+        name = ".".join(path)
+        change = (n - b) / b if b else (0.0 if n == b else float("inf"))
+        worse = -change if higher_better else change
+        flag = ""
+        if worse > tolerance:
+            flag = "  REGRESSED"
+            regressed.append(name)
+        print(f"  {name:<28} {b:>10} -> {n:>10}  {change:+.1%}{flag}")
+    return regressed
+
+
+def report(result: dict):
+    print(f"{result['debates_completed']} debates in {result['wall_seconds']}s, "
+          f"{result['debates_failed']} failed {result['failures'] or ''}")
+    t = result["throughput"]
+    print(f"throughput: {t['debates_per_min']} debates/min, {t['turns_per_sec']} turns/s, {t['deltas_per_sec']} deltas/s")
+    for key in ("ttft_ms", "turn_ms", "judge_ms", "debate_ms"):
+        s = result[key]
+        if s:
+            print(f"{key[:-3]:>6}: p50={s['p50']}ms p95={s['p95']}ms p99={s['p99']}ms max={s['max']}ms (n={s['n']})")
+    b = result["backend"]
+    print(f"backend: {b['cpu_seconds']}s CPU ({b['cpu_ms_per_debate']}ms per debate), "
+          f"RSS {b['rss_start_mb']} -> peak {b['rss_peak_mb']} MB")
+    u = result["upstream"]
+    print(f"upstream: {u['stream']} streamed, {u['structured']} structured, {u['429']} x 429, {u['503']} x 503 injected")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--debates", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10, help="debates in flight at once")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--judge-mode", default="final", choices=["final", "incremental", "map_reduce"])
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--tokens-per-sec", type=float, default=100.0)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--ttft-spike-rate", type=float, default=0.0)
+    parser.add_argument("--ttft-spike", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="backend setting for this run, e.g. --env LLM_MAX_CONCURRENCY=8")
+    parser.add_argument("--out", help="save the results as JSON")
+    parser.add_argument("--compare", help="a saved results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    report(result)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        print(f"against {args.compare} (git {base.get('git')}):")
+        if compare(base, result, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Hundreds of spectators on one debate through GET /debate/{id}/watch.
+
+    python -m benchmarks.load_watch --watchers 300 --slow 0.2
+
+The backend and the mock upstream each run in their own process, so the
+watchers' client load shares a CPU with neither. Slow watchers read through
+a small socket receive buffer and the backend's send buffer is pinned, as
+over a real network, so falling behind fills their queue on the server
+instead of loopback kernel buffers, and their deltas must be coalesced.
+
+Checks, exiting non-zero on failure, that every watcher sees the verdict
+and rebuilds every turn exactly, that every slow watcher received fewer,
+merged deltas, and that the debate took at most --max-slowdown times as
+long as without watchers.
+"""
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+
+import httpx
+
+from .backend_server import BackendProcess
+from .mock_openrouter import MockConfig, MockProcess
+
+
+async def _client_lines(client: httpx.AsyncClient, path: str, last_id: int, ready: asyncio.Event):
+    headers = {"Last-Event-ID": str(last_id)} if last_id else {}
+    async with client.stream("GET", path, headers=headers) as resp:
+        ready.set()
+        async for line in resp.aiter_lines():
+            yield line
+
+
+async def _socket_lines(base_url: str, path: str, last_id: int, ready: asyncio.Event, rcvbuf: int):
+    """The same stream over a socket whose receive buffer is set before it
+    connects. httpx applies socket options only after connecting, when the
+    window is agreed and autotuning lets it grow to megabytes."""
+    url = httpx.URL(base_url)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, (url.host, url.port))
+    reader, writer = await asyncio.open_connection(sock=sock, limit=rcvbuf)
+    # HTTP/1.0: no chunked framing, the body runs until the server closes
+    head = f"GET {path} HTTP/1.0\r\nHost: {url.host}\r\n"
+    if last_id:
+        head += f"Last-Event-ID: {last_id}\r\n"
+    writer.write(head.encode() + b"\r\n")
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+        ready.set()
+        buf = b""
+        while chunk := await reader.read(rcvbuf):
+            *lines, buf = (buf + chunk).split(b"\n")
+            for line in lines:
+                yield line.decode()
+    finally:
+        writer.close()
+
+
+async def _watch(lines, delay: float, ready: asyncio.Event) -> dict:
+    """``lines(last_id, ready)`` opens the watch stream and yields its lines."""
+    deltas, texts, finals, verdict = 0, {}, {}, False
+    last_id, reconnects = 0, -1
+    # a viewer cut off for falling too far behind reconnects from the last
+    # event it saw, as an EventSource does
+    while not verdict:
+        reconnects += 1
+        async for line in lines(last_id, ready):
+            if line.startswith("id: "):
+                last_id = int(line[len("id: "):])
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: "):])
+            if event["type"] == "delta":
+                deltas += 1
+                texts[event["seq"]] = texts.get(event["seq"], "") + event["data"]
+            elif event["type"] == "final":
+                finals[event["seq"]] = event["text"]
+            elif event["type"] == "verdict":
+                verdict = True
+            if delay:
+                await asyncio.sleep(delay)
+    exact = all(texts.get(seq, "").strip() == text for seq, text in finals.items())
+    return {"deltas": deltas, "verdict": verdict, "exact": exact, "turns": len(finals), "reconnects": reconnects}
+
+
+async def _debate(client: httpx.AsyncClient, rounds: int, watchers: int, slow: float, delay: float, rcvbuf: int) -> dict:
+    r = await client.post("/debate/start", json={"open_router_api_key": "load", "topic": "t", "rounds": rounds})
+    sid = r.json()["session_id"]
+    path = f"/debate/{sid}/watch"
+    base_url = str(client.base_url)
+
+    def fast_lines(last_id, ready):
+        return _client_lines(client, path, last_id, ready)
+
+    def slow_lines(last_id, ready):
+        return _socket_lines(base_url, path, last_id, ready, rcvbuf)
+
+    readies = [asyncio.Event() for _ in range(watchers)]
+    n_slow = int(watchers * slow)
+    tasks = [
+        asyncio.create_task(_watch(slow_lines, delay, readies[i]) if i < n_slow
+                            else _watch(fast_lines, 0.0, readies[i]))
+        for i in range(watchers)
+    ]
+    await asyncio.gather(*(e.wait() for e in readies))
+
+    start = time.perf_counter()
+    async with client.stream("POST", "/debate/run_stream", params={"session_id": sid}) as resp:
+        async for _ in resp.aiter_lines():
+            pass
+    elapsed = time.perf_counter() - start
+
+    results = await asyncio.gather(*tasks)
+    # every delta the debate published, as the event log replays them
+    r = await client.get(f"/debate/{sid}/events")
+    published = sum(json.loads(line)["type"] == "delta" for line in r.text.splitlines())
+    return {"elapsed": elapsed, "published": published, "results": results,
+            "slow": results[:n_slow], "fast": results[n_slow:]}
+
+
+async def _coalesced(client: httpx.AsyncClient) -> float:
+    return (await client.get("/llm/stats")).json().get("watch_events_coalesced_total", 0.0)
+
+
+async def main_async(args) -> int:
+    cfg = MockConfig(ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, tokens=args.tokens)
+    limits = httpx.Limits(max_connections=args.watchers + 10, max_keepalive_connections=args.watchers + 10)
+    async with MockProcess(cfg) as upstream:
+        env = {"OPENROUTER_BASE_URL": upstream.base_url, "WATCH_QUEUE_SIZE": str(args.queue_size)}
+        async with BackendProcess(env, sndbuf=args.sndbuf) as backend:
+            async with httpx.AsyncClient(base_url=backend.base_url, timeout=None, limits=limits) as client:
+                cpu0 = backend.cpu_seconds()
+                baseline = await _debate(client, args.rounds, 0, 0.0, 0.0, args.slow_rcvbuf)
+                cpu1 = backend.cpu_seconds()
+                merged0 = await _coalesced(client)
+                loaded = await _debate(client, args.rounds, args.watchers, args.slow, args.slow_delay,
+                                       args.slow_rcvbuf)
+                merged = await _coalesced(client) - merged0
+                cpu2 = backend.cpu_seconds()
+
+    fast, slow, published = loaded["fast"], loaded["slow"], loaded["published"]
+    slowdown = loaded["elapsed"] / baseline["elapsed"]
+    print(f"debate wall time: {baseline['elapsed']:.2f}s without watchers, "
+          f"{loaded['elapsed']:.2f}s with {args.watchers} ({slowdown:.2f}x)")
+    if cpu0 is not None:
+        print(f"backend CPU: {cpu1 - cpu0:.2f}s without watchers, {cpu2 - cpu1:.2f}s with {args.watchers}")
+    print(f"verdict received: {sum(r['verdict'] for r in loaded['results'])}/{args.watchers}, "
+          f"{published} deltas published")
+    if fast:
+        print(f"fast watchers: {len(fast)}, exact transcripts {sum(r['exact'] for r in fast)}, "
+              f"deltas/watcher {sum(r['deltas'] for r in fast) / len(fast):.0f}")
+    if slow:
+        print(f"slow watchers: {len(slow)}, exact transcripts {sum(r['exact'] for r in slow)}, "
+              f"deltas/watcher {sum(r['deltas'] for r in slow) / len(slow):.0f}")
+    print(f"events merged on the server: {merged:.0f}, "
+          f"reconnects after being cut off: {sum(r['reconnects'] for r in loaded['results'])}")
+
+    errors = []
+    if not all(r["verdict"] and r["exact"] for r in loaded["results"]):
+        errors.append("a watcher missed the verdict or rebuilt a turn wrongly")
+    if slow:
+        if not merged:
+            errors.append("no events were coalesced on the server")
+        # every queue fills during a burst of deltas, so fast watchers get some
+        # merged too; a slow one must have had clearly more merged than that
+        fewest_fast = min((r["deltas"] for r in fast), default=published)
+        coalesced = sum(r["deltas"] < fewest_fast for r in slow)
+        if coalesced < len(slow):
+            errors.append(f"only {coalesced}/{len(slow)} slow watchers had more deltas coalesced than any fast one")
+    if slowdown > args.max_slowdown:
+        errors.append(f"watchers slowed the debate {slowdown:.2f}x, more than {args.max_slowdown}x")
+    for e in errors:
+        print("FAIL", e)
+    return 1 if errors else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--watchers", type=int, default=300)
+    parser.add_argument("--slow", type=float, default=0.2, help="fraction of watchers that read slowly")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="seconds a slow watcher spends per event")
+    parser.add_argument("--slow-rcvbuf", type=int, default=4096, help="socket receive buffer of slow watchers, bytes")
+    parser.add_argument("--sndbuf", type=int, default=16384, help="socket send buffer of the backend, bytes")
+    parser.add_argument("--queue-size", type=int, default=32, help="per-watcher queue bound on the server")
+    parser.add_argument("--max-slowdown", type=float, default=2.0,
+                        help="fail when watchers make the debate take longer than this many times its time alone")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    # enough text per turn that a slow watcher falls behind by more than the server's write buffers
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0)
+    parser.add_argument("--tokens", type=int, default=600)
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
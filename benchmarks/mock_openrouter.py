@@ -0,0 +1,353 @@
+"""Local stand-in for the OpenRouter chat completions and models APIs.
+
+Run standalone with ``python -m benchmarks.mock_openrouter --port 9100`` and
+point the backend at it with ``OPENROUTER_BASE_URL=http://127.0.0.1:9100/api/v1``.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import sys
+from aiohttp import ClientConnectionResetError, web
+
+WORDS = "the evidence suggests that careful regulation balances innovation and public safety".split()
+
+
+class MockConfig:
+    def __init__(
+        self,
+        ttft: float = 0.05,
+        tokens_per_sec: float = 200.0,
+        tokens: int = 60,
+        prefill_tokens_per_sec: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        ttft_spike_rate: float = 0.0,
+        ttft_spike: float = 3.0,
+        prompt_cache: bool = True,
+        model_delays: dict | None = None,
+        usd_per_token: float = 1e-6,
+        models: int = 300,
+        models_latency: float = 0.0,
+    ):
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.tokens = tokens
+        # 0 disables prompt-size dependent latency
+        self.prefill_tokens_per_sec = prefill_tokens_per_sec
+        # fraction of requests answered with a 503 / a 429 carrying Retry-After
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        # fraction of requests whose first token takes ttft_spike seconds instead
+        self.ttft_spike_rate = ttft_spike_rate
+        self.ttft_spike = ttft_spike
+        # reuse prefill for message prefixes seen before, per model
+        self.prompt_cache = prompt_cache
+        # extra seconds before the first token, per model id
+        self.model_delays = model_delays or {}
+        # reported as usage.cost, like OpenRouter's usage accounting
+        self.usd_per_token = usd_per_token
+        # size of the /models catalog (every fourth model is free) and its response time
+        self.models = models
+        self.models_latency = models_latency
+
+
+SCORES = {"clarity": 7.0, "logic": 7.5, "evidence": 6.5, "rebuttal": 7.0, "civility": 9.0}
+
+
+def _fake_from_schema(schema: dict, text: str = "The argument grounded its claims in evidence and answered each rebuttal.") -> dict:
+    out = {}
+    for name, prop in schema.get("properties", {}).items():
+        if "enum" in prop:
+            out[name] = prop["enum"][0]
+        elif prop.get("type") == "object":
+            out[name] = dict(SCORES)
+        elif prop.get("type") in ("number", "integer"):
+            out[name] = 7.0
+        else:
+            out[name] = text
+    return out
+
+
+def _text(content) -> str:
+    if isinstance(content, list):
+        return "".join(p.get("text", "") for p in content if isinstance(p, dict))
+    return str(content or "")
+
+
+def _prompt_tokens(payload: dict) -> int:
+    return sum(len(_text(m.get("content"))) for m in payload.get("messages", [])) // 4
+
+
+def _cached_tokens(app: web.Application, payload: dict) -> int:
+    """Longest previously seen message prefix for this model, like a provider's prompt cache."""
+    seen = app["prefix_cache"]
+    model = payload.get("model", "")
+    cached = total = 0
+    h = hash(model)
+    hashes = []
+    for m in payload.get("messages", []):
+        h = hash((h, m.get("role"), _text(m.get("content"))))
+        total += len(_text(m.get("content"))) // 4
+        hashes.append(h)
+        if h in seen:
+            cached = total
+    if len(seen) > 100_000:
+        seen.clear()
+    seen.update(hashes)
+    return cached
+
+
+async def chat_completions(request: web.Request) -> web.StreamResponse:
+    cfg: MockConfig = request.app["cfg"]
+    payload = await request.json()
+    stats = request.app["stats"]
+    stats["stream" if payload.get("stream") else "structured"] += 1
+    # structured calls by the title of their schema, e.g. JudgeResult or DebateSummary
+    title = (payload.get("response_format") or {}).get("json_schema", {}).get("schema", {}).get("title")
+    if title:
+        stats["schemas"][title] = stats["schemas"].get(title, 0) + 1
+
+    roll = random.random()
+    if roll < cfg.rate_limit_rate:
+        stats["429"] += 1
+        return web.json_response(
+            {"error": {"code": 429, "message": "Rate limit exceeded"}},
+            status=429,
+            headers={"Retry-After": str(cfg.retry_after)},
+        )
+    if roll < cfg.rate_limit_rate + cfg.error_rate:
+        stats["503"] += 1
+        return web.json_response({"error": {"code": 503, "message": "Provider unavailable"}}, status=503)
+
+    prompt_tokens = _prompt_tokens(payload)
+    cached_tokens = _cached_tokens(request.app, payload) if cfg.prompt_cache else 0
+    stats["cached_tokens"] += cached_tokens
+    delay = cfg.ttft_spike if random.random() < cfg.ttft_spike_rate else cfg.ttft
+    delay += cfg.model_delays.get(payload.get("model"), 0.0)
+    if cfg.prefill_tokens_per_sec > 0:
+        # cached prefix tokens skip prefill
+        delay += (prompt_tokens - cached_tokens) / cfg.prefill_tokens_per_sec
+    await asyncio.sleep(delay)
+
+    if not payload.get("stream"):
+        schema = payload.get("response_format", {}).get("json_schema", {}).get("schema", {})
+        content = json.dumps(_fake_from_schema(schema))
+        if cfg.tokens_per_sec > 0:
+            # structured output is generated too, it just is not streamed
+            await asyncio.sleep(len(content) / 4 / cfg.tokens_per_sec)
+        completion = len(content) // 4
+        return web.json_response({
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                "cost": (prompt_tokens + completion) * cfg.usd_per_token,
+            },
+        })
+
+    resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    gap = 1.0 / cfg.tokens_per_sec if cfg.tokens_per_sec > 0 else 0.0
+    limit = min(cfg.tokens, payload.get("max_tokens") or cfg.tokens)
+    truncated = limit < cfg.tokens
+    pieces = [WORDS[i % len(WORDS)] + " " for i in range(limit)]
+    if "response_format" in payload:
+        # a structured stream: the JSON document, about one token (4 chars) per chunk
+        schema = payload["response_format"].get("json_schema", {}).get("schema", {})
+        doc = json.dumps(_fake_from_schema(schema, "".join(pieces).strip()))
+        pieces = [doc[i:i + 4] for i in range(0, len(doc), 4)]
+        truncated = False
+    try:
+        await resp.prepare(request)
+        for i, piece in enumerate(pieces):
+            chunk = {"choices": [{"delta": {"content": piece}}]}
+            if i == len(pieces) - 1 and truncated:
+                chunk["choices"][0]["finish_reason"] = "length"
+            await resp.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            stats["tokens"] += 1
+            if gap:
+                await asyncio.sleep(gap)
+        if (payload.get("usage") or {}).get("include") or (payload.get("stream_options") or {}).get("include_usage"):
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(pieces),
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                "cost": (prompt_tokens + len(pieces)) * cfg.usd_per_token,
+            }
+            await resp.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode())
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+    except (ConnectionResetError, ClientConnectionResetError):
+        # the client hung up; a real provider would stop generating here
+        stats["aborted"] += 1
+    except asyncio.CancelledError:
+        stats["aborted"] += 1
+        raise
+    return resp
+
+
+def _models_catalog(n: int) -> bytes:
+    """A /models body about the size of OpenRouter's: long descriptions and full metadata per model."""
+    data = []
+    for i in range(n):
+        free = i % 4 == 0
+        price = "0" if free else f"{(i % 20 + 1) * 1e-7:.7f}"
+        data.append({
+            "id": f"mock/model-{i}" + (":free" if free else ""),
+            "name": f"Mock: Model {i}" + (" (free)" if free else ""),
+            "created": 1700000000 + i,
+            "description": " ".join(WORDS) * 8,
+            "context_length": 131072,
+            "architecture": {"modality": "text->text", "input_modalities": ["text"],
+                             "output_modalities": ["text"], "tokenizer": "Other"},
+            "pricing": {"prompt": price, "completion": price, "request": "0", "image": "0"},
+            "top_provider": {"context_length": 131072, "max_completion_tokens": 8192, "is_moderated": False},
+            "supported_parameters": ["max_tokens", "temperature", "response_format", "structured_outputs"],
+        })
+    return json.dumps({"data": data}).encode()
+
+
+async def list_models(request: web.Request) -> web.Response:
+    cfg: MockConfig = request.app["cfg"]
+    stats = request.app["stats"]
+    body = request.app["models_body"]
+    etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+    headers = {"ETag": etag, "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    await asyncio.sleep(cfg.models_latency)
+    if request.headers.get("If-None-Match") == etag:
+        stats["models_304"] += 1
+        return web.Response(status=304, headers=headers)
+    stats["models"] += 1
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+
+def create_app(cfg: MockConfig | None = None) -> web.Application:
+    app = web.Application()
+    app["cfg"] = cfg or MockConfig()
+    app["stats"] = {"stream": 0, "structured": 0, "tokens": 0, "aborted": 0, "429": 0, "503": 0, "cached_tokens": 0,
+                    "models": 0, "models_304": 0, "schemas": {}}
+    app["prefix_cache"] = set()
+    app["models_body"] = _models_catalog(app["cfg"].models)
+    app.router.add_post("/api/v1/chat/completions", chat_completions)
+    app.router.add_get("/api/v1/models", list_models)
+    return app
+
+
+class MockServer:
+    """Runs the mock on an ephemeral port inside the current event loop."""
+
+    def __init__(self, cfg: MockConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.app = create_app(cfg)
+        self.host = host
+        self.port = port
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/v1"
+
+    @property
+    def stats(self) -> dict:
+        return self.app["stats"]
+
+    async def __aenter__(self) -> "MockServer":
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+class MockProcess:
+    """Runs the mock as its own process, so a benchmark whose client load
+    shares the event loop cannot starve the upstream it measures against.
+    Stats stay in the other process; model_delays and models_latency are not
+    passed on."""
+
+    def __init__(self, cfg: MockConfig | None = None, host: str = "127.0.0.1", port: int = 9101):
+        self.cfg = cfg or MockConfig()
+        self.host = host
+        self.port = port
+        self._proc: asyncio.subprocess.Process | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/v1"
+
+    def _args(self) -> list[str]:
+        c = self.cfg
+        args = [
+            "--host", self.host, "--port", str(self.port),
+            "--ttft", str(c.ttft), "--tokens-per-sec", str(c.tokens_per_sec), "--tokens", str(c.tokens),
+            "--prefill-tokens-per-sec", str(c.prefill_tokens_per_sec),
+            "--error-rate", str(c.error_rate), "--rate-limit-rate", str(c.rate_limit_rate),
+            "--retry-after", str(c.retry_after),
+            "--ttft-spike-rate", str(c.ttft_spike_rate), "--ttft-spike", str(c.ttft_spike),
+            "--models", str(c.models),
+        ]
+        return args if c.prompt_cache else args + ["--no-prompt-cache"]
+
+    async def __aenter__(self) -> "MockProcess":
+        self._proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "benchmarks.mock_openrouter", *self._args(),
+            stdout=asyncio.subprocess.DEVNULL,
+        )
+        for _ in range(200):
+            try:
+                _, writer = await asyncio.open_connection(self.host, self.port)
+                writer.close()
+                return self
+            except OSError:
+                await asyncio.sleep(0.05)
+        raise RuntimeError("mock did not start")
+
+    async def __aexit__(self, *exc):
+        self._proc.terminate()
+        await self._proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenRouter server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--ttft-spike-rate", type=float, default=0.0)
+    parser.add_argument("--ttft-spike", type=float, default=3.0)
+    parser.add_argument("--no-prompt-cache", action="store_true")
+    parser.add_argument("--models", type=int, default=300)
+    parser.add_argument("--seed", type=int, help="make injected errors and spikes repeatable")
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    cfg = MockConfig(
+        ttft=args.ttft,
+        tokens_per_sec=args.tokens_per_sec,
+        tokens=args.tokens,
+        prefill_tokens_per_sec=args.prefill_tokens_per_sec,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        ttft_spike_rate=args.ttft_spike_rate,
+        ttft_spike=args.ttft_spike,
+        prompt_cache=not args.no_prompt_cache,
+        models=args.models,
+    )
+    web.run_app(create_app(cfg), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
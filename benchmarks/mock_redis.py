@@ -0,0 +1,179 @@
+"""Minimal Redis-protocol (RESP2) server for exercising RedisStore without Redis.
+
+Supports PING, GET, MGET, SET (with EX), DEL, DBSIZE, FLUSHDB, SCAN, the
+WATCH/MULTI/EXEC transactions RedisStore.acas needs, and answers CLIENT with
++OK. Run with ``python -m benchmarks.mock_redis --port 6390``.
+"""
+import argparse
+import asyncio
+import fnmatch
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _Client:
+    """Per-connection transaction state."""
+
+    def __init__(self):
+        # watched key -> its write count when WATCH was sent
+        self.watched: Dict[bytes, int] = {}
+        self.queued: Optional[List[List[bytes]]] = None
+
+
+class MockRedis:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._writes: Dict[bytes, int] = {}
+        self._server: asyncio.AbstractServer | None = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def _execute(self, args: List[bytes]) -> bytes:
+        cmd = args[0].upper()
+        if cmd == b"PING":
+            return b"+PONG\r\n"
+        if cmd == b"CLIENT":
+            return b"+OK\r\n"
+        if cmd == b"GET":
+            value = self._get(args[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if cmd == b"MGET":
+            values = [self._get(k) for k in args[1:]]
+            body = b"".join(b"$-1\r\n" if v is None else b"$%d\r\n%s\r\n" % (len(v), v) for v in values)
+            return b"*%d\r\n%s" % (len(values), body)
+        if cmd == b"SET":
+            expires_at = None
+            opts = [a.upper() for a in args[3:]]
+            if b"EX" in opts:
+                expires_at = time.time() + int(args[3 + opts.index(b"EX") + 1])
+            self._data[args[1]] = (args[2], expires_at)
+            self._touch(args[1])
+            return b"+OK\r\n"
+        if cmd == b"DEL":
+            deleted = [k for k in args[1:] if self._data.pop(k, None) is not None]
+            for k in deleted:
+                self._touch(k)
+            return b":%d\r\n" % len(deleted)
+        if cmd == b"DBSIZE":
+            return b":%d\r\n" % len(self._data)
+        if cmd == b"FLUSHDB":
+            for k in self._data:
+                self._touch(k)
+            self._data.clear()
+            return b"+OK\r\n"
+        if cmd == b"SCAN":
+            # the cursor is an offset into the keys in insertion order, COUNT keys per call
+            opts = [a.upper() for a in args]
+            pattern = args[opts.index(b"MATCH") + 1] if b"MATCH" in opts else b"*"
+            count = int(args[opts.index(b"COUNT") + 1]) if b"COUNT" in opts else 10
+            start = int(args[1])
+            window = list(self._data.items())[start:start + count]
+            nxt = start + count if start + count < len(self._data) else 0
+            # expired keys are skipped but left in place, deleting them would shift the offsets
+            now = time.time()
+            keys = [k for k, (_, expires_at) in window if (expires_at is None or expires_at > now)
+                    and fnmatch.fnmatchcase(k.decode(), pattern.decode())]
+            body = b"".join(b"$%d\r\n%s\r\n" % (len(k), k) for k in keys)
+            cursor = str(nxt).encode()
+            return b"*2\r\n$%d\r\n%s\r\n*%d\r\n%s" % (len(cursor), cursor, len(keys), body)
+        return b"-ERR unknown command '%s'\r\n" % args[0]
+
+    def _touch(self, key: bytes):
+        self._writes[key] = self._writes.get(key, 0) + 1
+
+    def _transact(self, args: List[bytes], client: _Client) -> bytes:
+        cmd = args[0].upper()
+        if cmd == b"WATCH":
+            client.watched.update((k, self._writes.get(k, 0)) for k in args[1:])
+            return b"+OK\r\n"
+        if cmd == b"UNWATCH":
+            client.watched.clear()
+            return b"+OK\r\n"
+        if cmd == b"MULTI":
+            client.queued = []
+            return b"+OK\r\n"
+        if cmd == b"DISCARD":
+            client.queued = None
+            client.watched.clear()
+            return b"+OK\r\n"
+        if cmd == b"EXEC":
+            queued, client.queued = client.queued, None
+            if queued is None:
+                return b"-ERR EXEC without MULTI\r\n"
+            stale = any(self._writes.get(k, 0) != n for k, n in client.watched.items())
+            client.watched.clear()
+            if stale:
+                # a watched key was written since WATCH: abort with a null reply
+                return b"*-1\r\n"
+            replies = [self._execute(a) for a in queued]
+            return b"*%d\r\n%s" % (len(replies), b"".join(replies))
+        if client.queued is not None:
+            client.queued.append(args)
+            return b"+QUEUED\r\n"
+        return self._execute(args)
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> List[bytes]:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError
+        if not line.startswith(b"*"):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _Client()
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args:
+                    writer.write(self._transact(args, client))
+                    await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self) -> "MockRedis":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+async def _serve(host: str, port: int):
+    async with MockRedis(host, port) as server:
+        print(f"mock redis listening on {server.url}")
+        await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Redis server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    asyncio.run(_serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
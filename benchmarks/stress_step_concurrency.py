@@ -0,0 +1,134 @@
+"""Fire duplicate and concurrent step/judge requests at the same sessions and
+check that every turn is generated exactly once.
+
+    python -m benchmarks.stress_step_concurrency --sessions 20 --dupes 5
+    python -m benchmarks.stress_step_concurrency --workers 4
+
+With several workers the backend runs as uvicorn processes sharing a SQLite
+store. Locks are per process, so duplicates landing on different workers are
+generated more than once; the store's compare-and-set must still keep exactly
+one of them, in order, and one verdict.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+import httpx
+
+from backend.config import settings
+from .backend_server import BackendProcess, BackendServer
+from .mock_openrouter import MockConfig, MockServer
+
+
+async def _step(client: httpx.AsyncClient, sid: str, seq: int | None) -> dict:
+    params = {"session_id": sid}
+    if seq is not None:
+        params["seq"] = seq
+    text, final = "", None
+    async with client.stream("POST", "/debate/step_stream", params=params) as resp:
+        if resp.status_code != 200:
+            return {"status": resp.status_code}
+        async for line in resp.aiter_lines():
+            event = json.loads(line)
+            if "type" not in event:
+                # {"status": "done"} once every turn is generated
+                return {"status": 200, "done": True}
+            if event["type"] == "delta":
+                text += event["data"]
+            elif event["type"] in ("final", "error"):
+                final = event
+    return {"status": 200, "text": text.strip(), "final": final}
+
+
+async def _session(client: httpx.AsyncClient, rounds: int, dupes: int) -> list[str]:
+    errors = []
+    r = await client.post("/debate/start", json={"open_router_api_key": "stress", "topic": "t", "rounds": rounds})
+    sid = r.json()["session_id"]
+
+    for seq in range(rounds * 2):
+        # the same turn requested several times at once, as a retrying client would
+        results = await asyncio.gather(*(_step(client, sid, seq) for _ in range(dupes)))
+        # a duplicate that lost the commit to another worker ends in an error, not a final
+        texts = {res.get("text") for res in results
+                 if res["status"] == 200 and (res.get("final") or {}).get("type") != "error"}
+        if len(texts) != 1:
+            errors.append(f"{sid} seq {seq}: {len(texts)} different texts")
+
+    # legacy calls without seq must not overshoot rounds * 2
+    await asyncio.gather(*(_step(client, sid, None) for _ in range(dupes)))
+    verdicts = await asyncio.gather(*(client.post("/debate/judge", params={"session_id": sid}) for _ in range(dupes)))
+    if len({v.text for v in verdicts}) != 1:
+        errors.append(f"{sid}: judge returned different verdicts")
+
+    r = await client.post("/debate/step_stream", params={"session_id": sid})
+    history = r.json()["history"]
+    if len(history) != rounds * 2:
+        errors.append(f"{sid}: {len(history)} turns, expected {rounds * 2}")
+    roles = [t["role"] for t in history]
+    if roles != ["pro", "con"] * rounds:
+        errors.append(f"{sid}: roles out of order {roles}")
+    return errors
+
+
+async def _run(backend_url: str, args) -> list:
+    async with httpx.AsyncClient(base_url=backend_url, timeout=None) as client:
+        return await asyncio.gather(*(_session(client, args.rounds, args.dupes) for _ in range(args.sessions)))
+
+
+async def main_async(args) -> int:
+    cfg = MockConfig(ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, tokens=args.tokens)
+    async with MockServer(cfg) as upstream:
+        if args.workers == 1:
+            settings.openrouter_base_url = upstream.base_url
+            async with BackendServer() as backend:
+                per_session = await _run(backend.base_url, args)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {
+                    "OPENROUTER_BASE_URL": upstream.base_url,
+                    "STORE_BACKEND": "sqlite",
+                    "STORE_SQLITE_PATH": os.path.join(tmp, "stress.sqlite3"),
+                }
+                async with BackendProcess(env, workers=args.workers) as backend:
+                    per_session = await _run(backend.base_url, args)
+
+    errors = [e for errs in per_session for e in errs]
+    expected_turns = args.sessions * args.rounds * 2
+    calls = upstream.stats["schemas"]
+    if args.workers == 1:
+        if upstream.stats["stream"] != expected_turns:
+            errors.append(f"{upstream.stats['stream']} upstream turn calls, expected {expected_turns}")
+        # these transcripts stay far below CONTEXT_TOKENS, so no turn ever needs a
+        # summary: every structured call is the one verdict per session
+        if calls.get("JudgeResult", 0) != args.sessions:
+            errors.append(f"{calls.get('JudgeResult', 0)} upstream judge calls, expected {args.sessions}")
+        if upstream.stats["structured"] != args.sessions:
+            errors.append(f"{upstream.stats['structured']} upstream structured calls, expected {args.sessions}")
+    if calls.get("DebateSummary", 0) != 0:
+        errors.append(f"{calls['DebateSummary']} upstream summary calls, expected 0")
+
+    for e in errors:
+        print("FAIL", e)
+    print(f"{args.sessions} sessions x {args.dupes} duplicate requests: "
+          f"{upstream.stats['stream']} turn calls, {upstream.stats['structured']} judge calls, "
+          f"{len(errors)} errors")
+    return 1 if errors else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--dupes", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers sharing a SQLite store")
+    parser.add_argument("--ttft", type=float, default=0.02)
+    parser.add_argument("--tokens-per-sec", type=float, default=500.0)
+    parser.add_argument("--tokens", type=int, default=20)
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
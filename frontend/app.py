@@ -6,7 +6,7 @@ import streamlit as st
 import time
 
 API_BASE = "http://ai-debater-backend:8000"
-OPENROUTER_API = "https://openrouter.ai/api/v1/models"
+RENDER_INTERVAL = 0.05
 
 # --------------------------------------------------------
 # ⚙️ Utility functions
@@ -45,50 +45,30 @@ api_key = st.sidebar.text_input(
 # --------------------------------------------------------
 # 💸 Fetch Models
 # --------------------------------------------------------
-def fetch_models(api_key: str | None = None):
-    headers = {}
-    if api_key:
-        headers["Authorization"] = f"Bearer {api_key}"
+def fetch_models(tier: str):
+    # the backend holds one shared catalog; a rerun only revalidates our copy
+    cached = st.session_state.get("models")
+    if cached and cached[0] != tier:
+        cached = None
+    headers = {"If-None-Match": cached[1]} if cached else {}
 
     try:
-        resp = requests.get(OPENROUTER_API, headers=headers, timeout=10)
+        resp = requests.get(f"{API_BASE}/models", params={"tier": tier}, headers=headers, timeout=5)
+        if resp.status_code == 304:
+            return cached[2]
         resp.raise_for_status()
-        models = resp.json().get("data", [])
+        choices = resp.json()["models"]
     except Exception as e:
+        if cached:
+            return cached[2]
         st.sidebar.error(f"Failed to fetch models: {e}")
         return {}
 
-    # if no key → only free models
-    if not api_key:
-        models = [
-            m for m in models
-            if m.get("pricing", {}).get("prompt") == "0"
-            and m.get("pricing", {}).get("completion") == "0"
-        ]
-
-    choices = {}
-    for m in models:
-        name = m.get("name", m["id"])
-        pricing = m.get("pricing", {})
-        prompt_p = pricing.get("prompt")
-        completion_p = pricing.get("completion")
-        if prompt_p and completion_p:
-            try:
-                p_prompt = float(prompt_p) * 1_000_000
-                p_completion = float(completion_p) * 1_000_000
-                if p_prompt != 0 or p_completion != 0:
-                    name += f" — 💰 (${p_prompt:.3f}/${p_completion:.3f} per 1M tokens)"
-            except ValueError:
-                pass
-        choices[m["id"]] = name
-
+    st.session_state.models = (tier, resp.headers.get("ETag", ""), choices)
     return choices
 
-@st.cache_data(show_spinner=False)
-def get_model_choices(api_key):
-    return fetch_models(api_key)
-
-choices = get_model_choices(api_key)
+# if no key → only free models
+choices = fetch_models("all" if api_key else "free")
 
 # --------------------------------------------------------
 # 🧩 Debate Configuration Form
@@ -102,6 +82,9 @@ with st.sidebar.form("config_form"):
     pro_model = st.selectbox("Pro Model", options=list(choices.keys()),
                              format_func=lambda x: choices[x])
     pro_temperature = st.slider("Pro Temperature", 0.0, 2.0, 0.8, 0.05)
+    pro_fallbacks = st.multiselect("Pro Fallback Models", options=list(choices.keys()),
+                                   format_func=lambda x: choices[x],
+                                   help="Raced against the pro model when it is slow to start or fails.")
 
     st.markdown("### 🔴 Con Side (Negative)")
     con_persona = st.text_input("Con Persona", "Creative, skeptical, challenges assumptions.")
@@ -109,12 +92,33 @@ with st.sidebar.form("config_form"):
                              format_func=lambda x: choices[x],
                              index=min(1, len(choices)-1))
     con_temperature = st.slider("Con Temperature", 0.0, 2.0, 0.8, 0.05)
+    con_fallbacks = st.multiselect("Con Fallback Models", options=list(choices.keys()),
+                                   format_func=lambda x: choices[x],
+                                   help="Raced against the con model when it is slow to start or fails.")
 
     st.markdown("### ⚖️ Judge")
     judge_model = st.selectbox("Judge Model", options=list(choices.keys()),
                                format_func=lambda x: choices[x],
                                index=min(2, len(choices)-1))
     judge_temperature = st.slider("Judge Temperature", 0.0, 2.0, 0.2, 0.05)
+    judge_incremental = st.checkbox(
+        "Score turns as they happen",
+        help="Judge each turn in the background so the verdict is ready when the debate ends.",
+    )
+
+    prefix_stable = st.checkbox(
+        "Cache-friendly prompts",
+        help="Keep each turn's prompt an append-only extension of the last one so provider prompt caches hit.",
+    )
+
+    parallel_openings = st.checkbox(
+        "Parallel opening statements",
+        help="Write both opening statements at once; neither side sees the other's opening.",
+    )
+    parallel_closings = st.checkbox(
+        "Parallel closing statements",
+        help="Write both closing statements of the last round at once.",
+    )
 
     submitted = st.form_submit_button("🎬 Start Debate")
 
@@ -126,16 +130,19 @@ if "session_id" not in st.session_state:
     st.session_state.history = []
     st.session_state.finished = False
     st.session_state.judged = False
+    st.session_state.verdict = None
     st.session_state.config = {}
 
 # --------------------------------------------------------
 # 🔄 Async Streaming Functions
 # --------------------------------------------------------
 
-async def stream_turn(session_id):
-    url = f"{API_BASE}/debate/step_stream"
+async def stream_events(path: str, session_id: str):
+    url = f"{API_BASE}{path}"
+    # a whole debate can outlive aiohttp's default 5 minute total timeout
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=300)
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
             async with session.post(url, params={"session_id": session_id}) as resp:
                 if resp.status != 200:
                     text = await resp.text()
@@ -156,73 +163,142 @@ async def stream_turn(session_id):
         print(f"⚠️ Connection closed early: {e}")
     except Exception as e:
         print(f"Unexpected error: {e}")
-    
 
-async def run_turn(session_id: str):
-    placeholder = st.empty()
-    role, buffer = None, ""
-    async for event in stream_turn(session_id):
-        if event["type"] == "delta":
-            role = event["role"]
-            buffer += event["data"]
-
-            model_name = (
-                st.session_state.config["pro_model"]
-                if role == "pro"
-                else st.session_state.config["con_model"]
-            )
-
-            with placeholder.container():
-                st.markdown(
-                    f"{format_speaker(role, model_name)}\n\n{buffer}",
-                    unsafe_allow_html=True,
+
+class TurnView:
+    """A turn drawn as it streams. Finished paragraphs are drawn once into
+    their own element and only the paragraph still arriving is re-rendered,
+    so a redraw costs one paragraph rather than the whole turn."""
+
+    def __init__(self, role: str, model: str):
+        # speaker line once per turn
+        self.speaker = st.empty()
+        self.speaker.markdown(format_speaker(role, model), unsafe_allow_html=True)
+        self.box = st.empty()
+        self.body = self.box.container()
+        self.tail = self.body.empty()
+        self.parts = []
+        self.open = ""
+        self.last_render = 0.0
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def add(self, delta: str):
+        self.parts.append(delta)
+        self.open += delta
+        if "\n\n" in self.open:
+            *done, self.open = self.open.split("\n\n")
+            for para in done:
+                if para.strip():
+                    self.tail.markdown(para, unsafe_allow_html=True)
+                    self.tail = self.body.empty()
+            self.last_render = 0.0
+        # the open paragraph is still capped to a few redraws per second
+        now = time.monotonic()
+        if now - self.last_render >= RENDER_INTERVAL:
+            self.tail.markdown(self.open, unsafe_allow_html=True)
+            self.last_render = now
+
+    def discard(self):
+        self.speaker.empty()
+        self.box.empty()
+
+    def finish(self, text: str, role: str, model=None):
+        # one full render, so markdown spanning paragraphs (lists, code blocks) comes out right
+        self.box.markdown(text, unsafe_allow_html=True)
+        if model:
+            # a fallback model may have answered instead of the configured one
+            self.speaker.markdown(format_speaker(role, model), unsafe_allow_html=True)
+
+
+async def run_debate():
+    status = st.empty()
+    status.info("🗣️ Debate in progress...")
+    # one view per streaming turn; parallel openings and closings stream two at once
+    turns = {}
+    last_render = 0.0
+    # the verdict as it streams in, drawn in place until the validated one arrives
+    verdict_box, partial = None, {"winner": "", "scores": {}, "reasoning": ""}
+
+    async for event in stream_events("/debate/run_stream", st.session_state.session_id):
+        if event["type"] == "round":
+            status.info(f"🗣️ Round {event['round']} of {event['rounds']}...")
+
+        elif event["type"] == "delta":
+            view = turns.get(event["seq"])
+            if view is None:
+                role = event["role"]
+                model_name = (
+                    st.session_state.config["pro_model"]
+                    if role == "pro"
+                    else st.session_state.config["con_model"]
                 )
+                view = turns[event["seq"]] = TurnView(role, model_name)
+            view.add(event["data"])
 
         elif event["type"] == "final":
-            if buffer:
-                st.session_state.history.append({"role": role, "text": buffer})
+            view = turns.pop(event["seq"], None)
+            if not event.get("stored", True):
+                # the backend dropped this turn and will generate it again
+                if view is not None:
+                    view.discard()
+                continue
+            text = event.get("text") or (view.text() if view is not None else "")
+            if view is not None:
+                view.finish(text, event["role"], event.get("model"))
+            if text:
+                st.session_state.history.append({"role": event["role"], "text": text, "model": event.get("model")})
             st.session_state.finished = event["finished"]
-            return
 
-async def run_debate():
-    st.session_state.judged = False
-    timed_notification("🗣️ Debate in progress...", "info", 2)
-    while not st.session_state.finished:
-        await run_turn(st.session_state.session_id)
-        await asyncio.sleep(0.5)
-    timed_notification("🏁 Debate completed — proceeding to judgement...", "success", 2)
-    await run_judgement()
-
-async def run_judgement():
-    st.session_state.judged = True
-    timed_notification("⚖️ Judging in progress...", "info", 2)
-    url = f"{API_BASE}/debate/judge"
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, params={"session_id": st.session_state.session_id}) as resp:
-            if resp.status != 200:
-                st.error(await resp.text())
-                return
-            result = await resp.json()
-            show_judgement(result)
+        elif event["type"] == "judging":
+            st.session_state.finished = True
+            status.info("⚖️ Debate completed — judging in progress...")
+
+        elif event["type"] in ("verdict_winner", "verdict_score", "verdict_reasoning"):
+            if event["type"] == "verdict_winner":
+                partial["winner"] = event["data"]
+            elif event["type"] == "verdict_score":
+                partial["scores"][event["criterion"]] = event["data"]
+            else:
+                partial["reasoning"] += event["data"]
+            if verdict_box is None:
+                verdict_box = st.empty()
+            now = time.monotonic()
+            if event["type"] != "verdict_reasoning" or now - last_render >= RENDER_INTERVAL:
+                show_judgement(partial, verdict_box)
+                last_render = now
+
+        elif event["type"] == "verdict":
+            status.empty()
+            st.session_state.judged = True
+            st.session_state.verdict = event["data"]
+            show_judgement(event["data"], verdict_box)
+
+        elif event["type"] == "error":
+            status.empty()
+            st.error(event["detail"])
 
 # --------------------------------------------------------
 # 🏆 Display Results
 # --------------------------------------------------------
-def show_judgement(result):
-    st.markdown("---")
-    st.subheader("🏆 Final Verdict")
-    st.success(f"**Winner: {result['winner'].upper()}**")
-    st.write("### Scores")
-    st.json(result["scores"])
-    st.write("### Reasoning")
-    st.write(result["reasoning"])
+def show_judgement(result, box=None):
+    with (box.container() if box is not None else st.container()):
+        st.markdown("---")
+        st.subheader("🏆 Final Verdict")
+        if result["winner"]:
+            st.success(f"**Winner: {result['winner'].upper()}**")
+        st.write("### Scores")
+        st.json(result["scores"])
+        st.write("### Reasoning")
+        st.write(result["reasoning"])
 
 # --------------------------------------------------------
 # 💬 Display History
 # --------------------------------------------------------
 def show_history():
     for turn in st.session_state.history:
-        model_name = (
+        model_name = turn.get("model") or (
             st.session_state.config["pro_model"]
             if turn["role"] == "pro"
             else st.session_state.config["con_model"]
@@ -244,6 +320,7 @@ if submitted:
     st.session_state.history = []
     st.session_state.finished = False
     st.session_state.judged = False
+    st.session_state.verdict = None
 
     cfg = {
         "topic": topic,
@@ -254,8 +331,14 @@ if submitted:
         "con_persona": con_persona,
         "con_model": con_model,
         "con_temperature": con_temperature,
+        "pro_fallback_models": pro_fallbacks,
+        "con_fallback_models": con_fallbacks,
         "judge_model": judge_model,
         "judge_temperature": judge_temperature,
+        "judge_mode": "incremental" if judge_incremental else "final",
+        "prompt_layout": "prefix_stable" if prefix_stable else "budgeted",
+        "debate_format": "parallel_openings" if parallel_openings else "alternating",
+        "parallel_closings": parallel_closings,
         "open_router_api_key": api_key or "",
     }
 
@@ -273,6 +356,9 @@ if submitted:
 if st.session_state.session_id:
     st.markdown("---")
     show_history()
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(run_debate())
+    if st.session_state.judged:
+        show_judgement(st.session_state.verdict)
+    else:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(run_debate())